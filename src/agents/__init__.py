@@ -0,0 +1,7 @@
+import os
+
+# CrewAI sends telemetry on every crew kickoff, which can stall for seconds when
+# offline. Disable it before any agent module imports crewai; set either
+# variable explicitly to override.
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
@@ -4,12 +4,68 @@ Cost-Saving Alternative Suggestion Agent
 Finds cost-effective alternatives for medicines using CrewAI and database lookup.
 """
 
-from crewai import Agent, Task, Crew
-from langchain_google_genai import ChatGoogleGenerativeAI
+from crewai import Agent
+from src.agents.llm import get_gemini_llm
 from src.database.manager import MedicineDatabaseManager
+import asyncio
 import json
+import logging
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stream CrewAI's step-by-step agent output; set AGENT_VERBOSE=1 when debugging prompts
+AGENT_VERBOSE = os.getenv("AGENT_VERBOSE", "").lower() in ("1", "true", "yes")
+
+# Upper bound on in-flight Gemini requests when classifying medicines concurrently
+LLM_CONCURRENCY = 50
+
+# Number of unknown medicine names classified by a single batched prompt
+GENERIC_BATCH_SIZE = 25
+
+# Alternative lookups run at once in worker threads on the shared database connection
+DB_LOOKUP_CONCURRENCY = 4
+
+GENERIC_NAME_PROMPT = """
+            Determine the generic name for the following medicine.
+            
+            Medicine Name: {medicine_name}
+            
+            Instructions:
+            1. Analyze the medicine name and determine its generic name
+            2. Consider common brand names and their generic equivalents
+            3. Return ONLY the generic name (e.g., "Acetaminophen" for "Tylenol")
+            4. If the medicine name is already a generic, return it as is
+            5. Use standard pharmaceutical naming conventions
+            
+            Examples:
+            - "Tylenol" → "Acetaminophen"
+            - "Advil" → "Ibuprofen"
+            - "Zyrtec" → "Cetirizine"
+            - "Prilosec" → "Omeprazole"
+            - "Lipitor" → "Atorvastatin"
+            - "Zoloft" → "Sertraline"
+            
+            Return the generic name only, nothing else.
+            """
+
+GENERIC_BATCH_PROMPT = """
+            Determine the generic name for each of the following medicines.
+            
+            Medicine Names:
+            {medicine_names}
+            
+            Instructions:
+            1. Analyze each medicine name and determine its generic name
+            2. Consider common brand names and their generic equivalents
+            3. If a medicine name is already a generic, map it to itself
+            4. Use standard pharmaceutical naming conventions
+            5. Use every medicine name exactly as given above as a key
+            
+            Return ONLY a JSON object mapping each medicine name to its generic name, e.g.
+            {{"Tylenol": "Acetaminophen", "Advil": "Ibuprofen"}}
+            """
 
 class AlternativeSuggestionAgent:
     """AI agent for finding cost-effective medicine alternatives."""
@@ -18,6 +74,9 @@ class AlternativeSuggestionAgent:
         """
         Initialize the alternative suggestion agent.
         
+        CrewAI telemetry is disabled when the src.agents package is imported
+        (see src/agents/__init__.py), so classifications never wait on it.
+        
         Args:
             api_key (str): Google Gemini API key (optional, can be set via env var)
             db_path (str): Path to the medicine database
@@ -26,17 +85,16 @@ class AlternativeSuggestionAgent:
         if api_key:
             os.environ["GOOGLE_API_KEY"] = api_key
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash-exp",
-            temperature=0.1,
-            google_api_key=os.getenv("GOOGLE_API_KEY")
-        )
+        self.llm = get_gemini_llm(os.getenv("GOOGLE_API_KEY"))
         
         # Initialize database manager
         self.db_manager = MedicineDatabaseManager(db_path)
         if not self.db_manager.connect():
             raise Exception("Failed to connect to medicine database")
         
+        # In-process layer over the database's generic_cache table
+        self._generic_cache: Dict[str, str] = {}
+        
         # Create the alternative suggestion agent
         self.agent = Agent(
             role="Cost-Saving Medicine Alternative Finder",
@@ -46,7 +104,7 @@ class AlternativeSuggestionAgent:
             classes, therapeutic equivalency, and cost optimization strategies. You always 
             prioritize patient safety while maximizing cost savings through generic alternatives 
             and therapeutic substitutions within the same medicine class.""",
-            verbose=True,
+            verbose=AGENT_VERBOSE,
             allow_delegation=False,
             llm=self.llm
         )
@@ -61,57 +119,181 @@ class AlternativeSuggestionAgent:
         Returns:
             str: Determined generic name
         """
-        task = Task(
-            description=f"""
-            Determine the generic name for the following medicine.
-            
-            Medicine Name: {medicine_name}
-            
-            Instructions:
-            1. Analyze the medicine name and determine its generic name
-            2. Consider common brand names and their generic equivalents
-            3. Return ONLY the generic name (e.g., "Acetaminophen" for "Tylenol")
-            4. If the medicine name is already a generic, return it as is
-            5. Use standard pharmaceutical naming conventions
-            
-            Examples:
-            - "Tylenol" → "Acetaminophen"
-            - "Advil" → "Ibuprofen"
-            - "Zyrtec" → "Cetirizine"
-            - "Prilosec" → "Omeprazole"
-            - "Lipitor" → "Atorvastatin"
-            - "Zoloft" → "Sertraline"
+        cached = self._cached_generics([medicine_name])
+        if cached:
+            return cached[medicine_name]
+        
+        try:
+            # Single-turn prompt; the agent has no tools, so no Crew is needed
+            result = self.llm.invoke(GENERIC_NAME_PROMPT.format(medicine_name=medicine_name)).content
+            # Return the generic name as determined by AI
+            generic_name = self._clean_generic_name(result)
+            self._remember_generics({medicine_name: generic_name})
+            return generic_name
             
-            Return the generic name only, nothing else.
-            """,
-            agent=self.agent,
-            expected_output="Generic name of the medicine"
-        )
+        except Exception as e:
+            print(f"Warning: Error determining generic for {medicine_name}: {e}")
+            return medicine_name  # Default fallback - use medicine name as generic
+    
+    async def adetermine_medicine_generic(self, medicine_name: str) -> str:
+        """
+        Async variant of determine_medicine_generic.
         
-        crew = Crew(
-            agents=[self.agent],
-            tasks=[task],
-            verbose=False
-        )
+        Calls the LLM directly with ainvoke so that many classifications can be
+        in flight at once instead of blocking on one Gemini round-trip each.
         
-        try:
-            result = crew.kickoff()
-            # Clean up the result
-            generic_name = str(result).strip().replace('"', '').replace("'", "")
+        Args:
+            medicine_name (str): Name of the medicine
             
-            # Return the generic name as determined by AI
+        Returns:
+            str: Determined generic name
+        """
+        cached = self._cached_generics([medicine_name])
+        if cached:
+            return cached[medicine_name]
+        
+        try:
+            response = await self.llm.ainvoke(GENERIC_NAME_PROMPT.format(medicine_name=medicine_name))
+            generic_name = self._clean_generic_name(response.content)
+            self._remember_generics({medicine_name: generic_name})
             return generic_name
             
         except Exception as e:
             print(f"Warning: Error determining generic for {medicine_name}: {e}")
             return medicine_name  # Default fallback - use medicine name as generic
     
-    def process_medicine_alternatives(self, medicine_data: Dict[str, Any]) -> Dict[str, Any]:
+    def _clean_generic_name(self, result) -> str:
+        """Strip whitespace and quotes from an LLM generic-name answer."""
+        return str(result).strip().replace('"', '').replace("'", "")
+    
+    def _cached_generics(self, medicine_names: List[str]) -> Dict[str, str]:
+        """
+        Return generics already known for the names without asking the LLM.
+        
+        A name that is itself a generic in the database maps to that generic;
+        other names are looked up in memory and then in the DB cache.
+        """
+        generics = {}
+        uncached = []
+        for medicine_name in medicine_names:
+            generic_name = (self.db_manager.get_known_generic(medicine_name)
+                            or self._generic_cache.get(medicine_name.strip().lower()))
+            if generic_name:
+                generics[medicine_name] = generic_name
+            else:
+                uncached.append(medicine_name)
+        
+        if uncached:
+            stored = self.db_manager.get_cached_generics(uncached)
+            for medicine_name, generic_name in stored.items():
+                self._generic_cache[medicine_name.strip().lower()] = generic_name
+            generics.update(stored)
+        
+        return generics
+    
+    def _remember_generics(self, generics: Dict[str, str]):
+        """Record AI-determined generics in memory and in the DB cache."""
+        for medicine_name, generic_name in generics.items():
+            self._generic_cache[medicine_name.strip().lower()] = generic_name
+        self.db_manager.cache_generics(generics)
+    
+    async def adetermine_generics_batch(self, medicine_names: List[str]) -> Dict[str, str]:
+        """
+        Use AI to determine generic names for several medicines with batched prompts.
+        
+        Names already in the generic cache are answered without the LLM; the
+        rest are split into GENERIC_BATCH_SIZE chunks, sent as one prompt per
+        chunk concurrently. Names the model leaves out, or whole chunks whose
+        answer is not valid JSON, are classified individually.
+        
+        Args:
+            medicine_names (list): Names of the medicines
+            
+        Returns:
+            dict: Mapping of medicine name to determined generic name
+        """
+        sem = asyncio.Semaphore(LLM_CONCURRENCY)
+        
+        async def classify_chunk(chunk: List[str]) -> Dict[str, str]:
+            async with sem:
+                try:
+                    response = await self.llm.ainvoke(
+                        GENERIC_BATCH_PROMPT.format(medicine_names="\n".join(chunk))
+                    )
+                    classified = self._parse_generic_map(response.content, chunk)
+                    self._remember_generics(classified)
+                    return classified
+                except Exception as e:
+                    print(f"Warning: Batch generic classification failed: {e}")
+                    return {}
+        
+        async def classify_one(medicine_name: str) -> str:
+            async with sem:
+                return await self.adetermine_medicine_generic(medicine_name)
+        
+        generics = self._cached_generics(medicine_names)
+        uncached = [name for name in medicine_names if name not in generics]
+        
+        chunks = [uncached[i:i + GENERIC_BATCH_SIZE]
+                  for i in range(0, len(uncached), GENERIC_BATCH_SIZE)]
+        
+        for chunk_generics in await asyncio.gather(*(classify_chunk(chunk) for chunk in chunks)):
+            generics.update(chunk_generics)
+        
+        leftovers = [name for name in uncached if name not in generics]
+        if leftovers:
+            results = await asyncio.gather(*(classify_one(name) for name in leftovers))
+            generics.update(zip(leftovers, results))
+        
+        return generics
+    
+    def _parse_generic_map(self, result, medicine_names: List[str]) -> Dict[str, str]:
+        """
+        Parse a batched LLM answer into a name -> generic mapping.
+        
+        Keys are matched back to the requested names case-insensitively; names
+        missing from the answer are simply absent from the returned dict.
+        """
+        text = str(result)
+        start_idx = text.find('{')
+        end_idx = text.rfind('}') + 1
+        if start_idx == -1 or end_idx == 0:
+            raise json.JSONDecodeError("No JSON object found", text, 0)
+        
+        parsed = json.loads(text[start_idx:end_idx])
+        answers = {str(name).strip().lower(): generic for name, generic in parsed.items() if generic}
+        
+        generics = {}
+        for medicine_name in medicine_names:
+            generic = answers.get(medicine_name.strip().lower())
+            if generic:
+                generics[medicine_name] = self._clean_generic_name(generic)
+        return generics
+    
+    def _resolve_generic(self, medicine_name: str, db_info: Optional[Dict],
+                         classified: Dict[str, str]) -> Tuple[str, float]:
+        """Pick the generic name and price from the DB row or the AI classification."""
+        if db_info:
+            # Medicine found in database
+            generic_name = db_info["generic_name"]
+            original_price = db_info["price"]
+            logger.info("📊 Found in DB: Generic=%s, Price=$%s", generic_name, original_price)
+        else:
+            # Medicine not in database, use the AI-determined generic
+            generic_name = classified.get(medicine_name, medicine_name)
+            original_price = self.db_manager.get_market_price_estimate(medicine_name, generic_name)
+            logger.info("🤖 AI Classified: Generic=%s, Est. Price=$%s", generic_name, original_price)
+        
+        return generic_name, original_price
+    
+    def process_medicine_alternatives(self, medicine_data: Dict[str, Any],
+                                      db_infos: Optional[Dict[str, Optional[Dict]]] = None) -> Dict[str, Any]:
         """
         Process a single medicine to find alternatives.
         
         Args:
             medicine_data (dict): Medicine data with name and quantity
+            db_infos (dict, optional): Prefetched database info keyed by medicine name
             
         Returns:
             dict: Enhanced medicine data with alternatives
@@ -119,27 +301,108 @@ class AlternativeSuggestionAgent:
         medicine_name = medicine_data["name"]
         quantity = medicine_data["quantity"]
         
-        print(f"   🔍 Processing: {medicine_name}")
+        logger.info("🔍 Processing: %s", medicine_name)
         
         # Get medicine info from database
-        db_info = self.db_manager.get_medicine_info(medicine_name)
+        if db_infos is not None and medicine_name in db_infos:
+            db_info = db_infos[medicine_name]
+        else:
+            db_info = self.db_manager.get_medicine_info(medicine_name)
         
-        if db_info:
-            # Medicine found in database
-            generic_name = db_info["generic_name"]
-            original_price = db_info["price"]
-            print(f"      📊 Found in DB: Generic={generic_name}, Price=${original_price}")
+        classified = {}
+        if not db_info:
+            classified[medicine_name] = self.determine_medicine_generic(medicine_name)
+        
+        generic_name, original_price = self._resolve_generic(medicine_name, db_info, classified)
+        alternatives = self._find_alternatives(
+            self.db_manager, medicine_name, generic_name, original_price, quantity
+        )
+        return self._build_medicine_result(medicine_name, quantity, generic_name, original_price, alternatives)
+    
+    async def _process_all(self, medicines: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Process all medicines, preserving input order.
+        
+        Alternatives for database hits are looked up while the misses are being
+        classified through batched LLM prompts; alternatives for the misses are
+        looked up once their generics are known.
+        """
+        db_infos = self.db_manager.get_medicine_info_bulk([medicine["name"] for medicine in medicines])
+        misses = [name for name, info in db_infos.items() if not info]
+        
+        hit_indexes = [i for i, medicine in enumerate(medicines) if db_infos[medicine["name"]]]
+        hit_lookups = [
+            (medicines[i]["name"], db_infos[medicines[i]["name"]]["generic_name"],
+             db_infos[medicines[i]["name"]]["price"], medicines[i]["quantity"])
+            for i in hit_indexes
+        ]
+        
+        lookup_slots = asyncio.Semaphore(DB_LOOKUP_CONCURRENCY)
+        if misses:
+            classified, hit_alternatives = await asyncio.gather(
+                self.adetermine_generics_batch(misses),
+                self._find_alternatives_concurrently(hit_lookups, lookup_slots)
+            )
         else:
-            # Medicine not in database, use AI to determine generic
-            generic_name = self.determine_medicine_generic(medicine_name)
-            original_price = self.db_manager.get_market_price_estimate(medicine_name, generic_name)
-            print(f"      🤖 AI Classified: Generic={generic_name}, Est. Price=${original_price}")
+            classified, hit_alternatives = {}, await self._find_alternatives_concurrently(hit_lookups, lookup_slots)
+        
+        resolved = []
+        for medicine in medicines:
+            medicine_name = medicine["name"]
+            logger.info("🔍 Processing: %s", medicine_name)
+            generic_name, original_price = self._resolve_generic(
+                medicine_name, db_infos[medicine_name], classified
+            )
+            resolved.append((medicine_name, generic_name, original_price, medicine["quantity"]))
+        
+        alternatives: List[Optional[List[Dict]]] = [None] * len(medicines)
+        for i, medicine_alternatives in zip(hit_indexes, hit_alternatives):
+            alternatives[i] = medicine_alternatives
         
-        # Find alternatives
-        alternatives = self.db_manager.find_cheapest_alternatives(
+        miss_indexes = [i for i, found in enumerate(alternatives) if found is None]
+        miss_alternatives = await self._find_alternatives_concurrently(
+            [resolved[i] for i in miss_indexes], lookup_slots
+        )
+        for i, medicine_alternatives in zip(miss_indexes, miss_alternatives):
+            alternatives[i] = medicine_alternatives
+        
+        return [
+            self._build_medicine_result(medicine_name, quantity, generic_name, original_price, medicine_alternatives)
+            for (medicine_name, generic_name, original_price, quantity), medicine_alternatives
+            in zip(resolved, alternatives)
+        ]
+    
+    def _find_alternatives(self, db_manager: MedicineDatabaseManager, medicine_name: str,
+                           generic_name: str, original_price: float, quantity: str) -> List[Dict]:
+        """Find the cheapest in-stock alternatives using the given database connection."""
+        return db_manager.find_cheapest_alternatives(
             medicine_name, generic_name, original_price, quantity, min_stock=10, limit=3
         )
+    
+    async def _find_alternatives_concurrently(self, lookups: List[Tuple[str, str, float, str]],
+                                              lookup_slots: asyncio.Semaphore) -> List[List[Dict]]:
+        """
+        Find alternatives for many medicines in worker threads.
+        
+        The lookups share the agent's connection, each on its own cursor, and
+        at most DB_LOOKUP_CONCURRENCY of them run at once.
+        
+        Args:
+            lookups (list): (medicine_name, generic_name, original_price, quantity) tuples
+            lookup_slots (asyncio.Semaphore): Bounds the lookups running at once
+            
+        Returns:
+            list: Alternatives for each lookup, in input order
+        """
+        async def find_one(lookup: Tuple[str, str, float, str]) -> List[Dict]:
+            async with lookup_slots:
+                return await asyncio.to_thread(self._find_alternatives, self.db_manager, *lookup)
         
+        return await asyncio.gather(*(find_one(lookup) for lookup in lookups))
+    
+    def _build_medicine_result(self, medicine_name: str, quantity: str, generic_name: str,
+                               original_price: float, alternatives: List[Dict]) -> Dict[str, Any]:
+        """Build the result entry for a classified medicine and its alternatives."""
         # Prepare result
         result = {
             "name": medicine_name,
@@ -150,9 +413,9 @@ class AlternativeSuggestionAgent:
         }
         
         if alternatives:
-            print(f"      ✅ Found {len(alternatives)} alternatives")
+            logger.info("✅ %s: Found %d alternatives", medicine_name, len(alternatives))
         else:
-            print(f"      ⚠️  No alternatives found")
+            logger.info("⚠️  %s: No alternatives found", medicine_name)
         
         return result
     
@@ -175,13 +438,10 @@ class AlternativeSuggestionAgent:
                 print("❌ No medicines found in input JSON")
                 return json.dumps({"medicines": []})
             
-            print(f"🔍 Processing {len(medicines)} medicines for alternatives...")
+            logger.info("🔍 Processing %d medicines for alternatives...", len(medicines))
             
-            # Process each medicine
-            enhanced_medicines = []
-            for medicine in medicines:
-                enhanced_medicine = self.process_medicine_alternatives(medicine)
-                enhanced_medicines.append(enhanced_medicine)
+            # Resolve generics in batched, concurrent LLM calls
+            enhanced_medicines = asyncio.run(self._process_all(medicines))
             
             # Create output JSON
             output_data = {
@@ -193,7 +453,8 @@ class AlternativeSuggestionAgent:
                 }
             }
             
-            return json.dumps(output_data, indent=2)
+            # Compact output: callers parse it with json.loads, nobody reads it raw
+            return json.dumps(output_data, separators=(",", ":"))
             
         except json.JSONDecodeError as e:
             print(f"❌ Error parsing input JSON: {e}")
@@ -201,10 +462,17 @@ class AlternativeSuggestionAgent:
         except Exception as e:
             print(f"❌ Error processing alternatives: {e}")
             return json.dumps({"error": str(e)})
-        finally:
+    
+    def close(self):
+        """
+        Close the database connection opened by the constructor.
+        
+        The connection is kept across suggest_alternatives calls, so call this
+        once the agent is no longer needed.
+        """
+        if hasattr(self, 'db_manager'):
             self.db_manager.close()
     
     def __del__(self):
         """Cleanup database connection."""
-        if hasattr(self, 'db_manager'):
-            self.db_manager.close() 
\ No newline at end of file
+        self.close()
\ No newline at end of file
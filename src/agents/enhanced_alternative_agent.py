@@ -5,79 +5,27 @@ AI agent with multi-database intelligence for finding cost-effective medicine al
 
 import os
 import json
-from typing import Optional, List, Dict, Any
+import logging
+import asyncio
+import functools
+import itertools
+import textwrap
+from typing import Optional, List, Dict, Any, Tuple, Union
 from crewai import Agent, Task, Crew
-from langchain_google_genai import ChatGoogleGenerativeAI
-from src.database.multi_db_manager import MultiDatabaseManager
+from src.agents.llm import get_gemini_llm
+from src.database.drug_interactions_db import is_severe_interaction
+from src.database.multi_db_manager import get_multi_db_manager
+from src.utils.cache import peek_cached_many
 
+logger = logging.getLogger(__name__)
 
-class FastEnhancedAlternativeSuggestionAgent:
-    """Fast version of enhanced alternative suggestion agent with optimized database access."""
-    
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
-        self.multi_db = MultiDatabaseManager()
-        
-        # Initialize LLM
-        if self.api_key:
-            os.environ["GOOGLE_API_KEY"] = self.api_key
-        
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash-exp",
-            temperature=0.1,
-            google_api_key=os.getenv("GOOGLE_API_KEY")
-        )
-        
-        # Create a simplified agent
-        self.agent = Agent(
-            role="Fast Clinical Pharmacist",
-            goal="Quickly provide safe, cost-effective medicine alternatives with database insights",
-            backstory="You are an experienced pharmacist who provides rapid, evidence-based alternative suggestions using medical databases.",
-            llm=self.llm,
-            verbose=False  # Reduce output for speed
-        )
-    
-    def suggest_alternatives(self, medicines_json: str, 
-                           patient_age_years: Optional[int] = None,
-                           patient_conditions: Optional[List[str]] = None,
-                           budget_conscious: bool = True) -> str:
-        """
-        Fast alternative suggestions using optimized database access.
-        """
-        try:
-            # Parse input medicines
-            medicines_data = json.loads(medicines_json)
-            medicines = medicines_data.get("medicines", [])
-            
-            if not medicines:
-                return json.dumps({"error": "No medicines found in input"})
-            
-            # Convert age to months for database queries
-            patient_age_months = patient_age_years * 12 if patient_age_years else None
-            
-            # Connect to databases once
-            if not self.multi_db.connect_all():
-                return json.dumps({"error": "Failed to connect to medical databases"})
-            
-            # Get all medicine names for batch processing
-            medicine_names = [med.get('name', '').strip() for med in medicines if med.get('name')]
-            
-            # Batch database operations for speed
-            batch_medicine_info = self._get_batch_medicine_info(medicine_names, patient_age_months)
-            batch_safety_analysis = self._quick_safety_analysis(medicine_names, patient_age_months)
-            
-            # Prepare simplified context for AI
-            simplified_context = self._create_simplified_context(
-                medicines, batch_medicine_info, batch_safety_analysis,
-                patient_age_years, patient_conditions, budget_conscious
-            )
-            
-            # Create optimized task
-            task = Task(
-                description=f"""
+
+# Response contract for the fast agent, dedented once at import so each
+# request sends the JSON structure without the source indentation
+FAST_ANALYSIS_PROMPT = textwrap.dedent("""
                 Analyze this prescription quickly and provide JSON response:
                 
-                {simplified_context}
+                {context}
                 
                 Provide a JSON response with this EXACT structure:
                 {{
@@ -118,7 +66,111 @@ class FastEnhancedAlternativeSuggestionAgent:
                 }}
                 
                 Focus on speed and safety. Limit alternatives to 2-3 per medicine.
-                """,
+                """)
+
+# The prompt split around {context} with braces unescaped, so each request
+# joins three strings instead of parsing the template with str.format
+_FAST_PROMPT_HEAD, _FAST_PROMPT_TAIL = (
+    part.replace("{{", "{").replace("}}", "}") for part in FAST_ANALYSIS_PROMPT.split("{context}")
+)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_fast_agent(google_api_key: Optional[str]) -> Agent:
+    """Create the simplified pharmacist agent once per API key."""
+    return Agent(
+        role="Fast Clinical Pharmacist",
+        goal="Quickly provide safe, cost-effective medicine alternatives with database insights",
+        backstory="You are an experienced pharmacist who provides rapid, evidence-based alternative suggestions using medical databases.",
+        llm=get_gemini_llm(google_api_key),
+        verbose=False  # Reduce output for speed
+    )
+
+
+class FastEnhancedAlternativeSuggestionAgent:
+    """Fast version of enhanced alternative suggestion agent with optimized database access."""
+    
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        # Shared across agents; connections stay open between requests
+        self.multi_db = get_multi_db_manager()
+        
+        # Initialize LLM
+        if self.api_key:
+            os.environ["GOOGLE_API_KEY"] = self.api_key
+        
+        # Shared by every instance; created on first use
+        self.llm = get_gemini_llm(os.getenv("GOOGLE_API_KEY"))
+        self.agent = _get_fast_agent(os.getenv("GOOGLE_API_KEY"))
+    
+    def suggest_alternatives(self, medicines_json: str, 
+                           patient_age_years: Optional[int] = None,
+                           patient_conditions: Optional[List[str]] = None,
+                           budget_conscious: bool = True) -> str:
+        """
+        Fast alternative suggestions using optimized database access.
+        """
+        return json.dumps(self._suggest_alternatives(medicines_json, patient_age_years,
+                                                     patient_conditions, budget_conscious),
+                          ensure_ascii=False)
+    
+    def suggest_alternatives_obj(self, medicines_data: Dict, 
+                                 patient_age_years: Optional[int] = None,
+                                 patient_conditions: Optional[List[str]] = None,
+                                 budget_conscious: bool = True) -> Dict:
+        """
+        Same as suggest_alternatives, but takes and returns Python objects.
+        
+        Callers holding the extraction result as a dict should use this to
+        skip serializing the input and re-parsing it here.
+        
+        Args:
+            medicines_data (Dict): {"medicines": [...]} as returned by
+                MedicineExtractionAgent.extract_medicines_obj
+            
+        Returns:
+            Dict: The analysis, or a dict with an "error" key
+        """
+        return self._suggest_alternatives(medicines_data, patient_age_years,
+                                          patient_conditions, budget_conscious)
+    
+    def _suggest_alternatives(self, medicines_input: Union[str, Dict],
+                              patient_age_years: Optional[int],
+                              patient_conditions: Optional[List[str]],
+                              budget_conscious: bool) -> Dict:
+        """Run the analysis for a medicines JSON string or dict."""
+        try:
+            # Parse input medicines
+            medicines_data = json.loads(medicines_input) if isinstance(medicines_input, str) else medicines_input
+            medicines = medicines_data.get("medicines", [])
+            
+            if not medicines:
+                return {"error": "No medicines found in input"}
+            
+            # Convert age to months for database queries
+            patient_age_months = patient_age_years * 12 if patient_age_years else None
+            
+            # Connect to databases once; later requests reuse the connections
+            if not self.multi_db.connect_all():
+                return {"error": "Failed to connect to medical databases"}
+            
+            # Get all medicine names for batch processing
+            medicine_names = [med.get('name', '').strip() for med in medicines if med.get('name')]
+            
+            # Batch database operations, run concurrently for speed
+            batch_medicine_info, batch_safety_analysis = asyncio.run(
+                self._gather_database_context(medicine_names, patient_age_months)
+            )
+            
+            # Prepare simplified context for AI
+            simplified_context = self._create_simplified_context(
+                medicines, batch_medicine_info, batch_safety_analysis,
+                patient_age_years, patient_conditions, budget_conscious
+            )
+            
+            # Create optimized task
+            task = Task(
+                description=_FAST_PROMPT_HEAD + simplified_context + _FAST_PROMPT_TAIL,
                 agent=self.agent,
                 expected_output="Fast JSON response with medicine alternatives and safety analysis"
             )
@@ -126,173 +178,208 @@ class FastEnhancedAlternativeSuggestionAgent:
             # Execute quickly
             result = task.execute()
             
-            # Close database connections
-            self.multi_db.close_all()
-            
             # Clean and return result
-            return self._clean_json_result(result)
+            return self._parse_json_result(result)
             
         except Exception as e:
-            self.multi_db.close_all()
-            return json.dumps({
+            return {
                 "error": f"Error in fast alternative analysis: {str(e)}",
                 "fallback_message": "Please consult with a healthcare provider for medicine alternatives."
-            })
+            }
     
-    def _get_batch_medicine_info(self, medicine_names: List[str], patient_age_months: Optional[int]) -> Dict[str, Dict]:
-        """Get essential info for all medicines in one batch to improve speed."""
-        batch_info = {}
+    async def _gather_database_context(self, medicine_names: List[str],
+                                       patient_age_months: Optional[int]) -> Tuple[Dict[str, Dict], Dict]:
+        """Fetch per-medicine info and pair interactions concurrently, then run the safety analysis."""
+        batch_info, pair_interactions = await asyncio.gather(
+            self._get_batch_medicine_info_async(medicine_names, patient_age_months),
+            self._check_pair_interactions_async(medicine_names)
+        )
+        safety_analysis = self._quick_safety_analysis(
+            medicine_names, patient_age_months, batch_info, pair_interactions
+        )
+        return batch_info, safety_analysis
+    
+    async def _get_batch_medicine_info_async(self, medicine_names: List[str],
+                                             patient_age_months: Optional[int]) -> Dict[str, Dict]:
+        """Get essential info for all medicines, querying only the lookups not already cached."""
+        db = self.multi_db
+        # Per-medicine cached lookup, the batch query filling it, and extra arguments
+        lookups = {
+            'interactions': (db.interactions_db.get_drug_interactions, db.interactions_db.get_drug_interactions_batch, ()),
+            'side_effects': (db.side_effects_db.get_side_effects_for_medicine, db.side_effects_db.get_side_effects_batch, ()),
+            'effectiveness': (db.effectiveness_db.get_effectiveness_for_medicine, db.effectiveness_db.get_effectiveness_batch, ())
+        }
+        if patient_age_months:
+            lookups['age_checks'] = (
+                db.dosage_db.check_age_appropriateness, db.dosage_db.check_age_appropriateness_batch, (patient_age_months,)
+            )
+        
+        results, misses = {}, {}
+        for kind, (lookup, _, extra) in lookups.items():
+            results[kind], missing = peek_cached_many(lookup, medicine_names, *extra)
+            if missing:
+                misses[kind] = missing
+        
+        # Fully cached prescriptions skip the worker threads entirely
+        if misses:
+            fetched = await asyncio.gather(*(
+                asyncio.to_thread(lookups[kind][1], names, *lookups[kind][2])
+                for kind, names in misses.items()
+            ), return_exceptions=True)
+            for kind, found in zip(misses, fetched):
+                if isinstance(found, Exception):
+                    # Each database fails independently; its medicines are
+                    # simply missing from the lookup and get the defaults
+                    logger.error("❌ Fast %s lookup failed: %s", kind, found)
+                    continue
+                results[kind].update(found)
         
+        interactions = results['interactions']
+        side_effects = results['side_effects']
+        effectiveness = results['effectiveness']
+        age_checks = results.get('age_checks', {})
+        
+        batch_info = {}
         for med_name in medicine_names:
-            try:
-                # Get only essential information quickly
-                info = {
-                    'drug_interactions': [],
-                    'side_effects': [],
-                    'dosage_guidelines': [],
-                    'effectiveness_data': [],
-                    'conditions_treated': []
-                }
-                
-                # Quick drug interactions check
-                interactions = self.multi_db.drug_interactions_manager.check_interactions(med_name)
-                if interactions:
-                    info['drug_interactions'] = interactions[:3]  # Limit to 3 for speed
-                
-                # Quick side effects
-                side_effects = self.multi_db.side_effects_manager.get_medicine_side_effects(med_name)
-                if side_effects:
-                    info['side_effects'] = side_effects[:4]  # Limit to 4 for speed
-                
-                # Quick dosage info
-                if patient_age_months:
-                    dosage = self.multi_db.dosage_manager.get_age_appropriate_dosage(med_name, patient_age_months)
-                    if dosage:
-                        info['dosage_guidelines'] = [dosage]
-                
-                # Quick effectiveness
-                effectiveness = self.multi_db.effectiveness_manager.get_medicine_effectiveness(med_name)
-                if effectiveness:
-                    info['effectiveness_data'] = effectiveness[:2]  # Limit to 2 for speed
-                
-                batch_info[med_name] = info
-                
-            except Exception:
-                # If individual medicine fails, continue with others
-                batch_info[med_name] = {'error': 'Failed to fetch info'}
+            # Get only essential information quickly
+            info = {
+                'drug_interactions': interactions.get(med_name, [])[:3],  # Limit to 3 for speed
+                'side_effects': side_effects.get(med_name, [])[:4],  # Limit to 4 for speed
+                'dosage_guidelines': [],
+                'effectiveness_data': effectiveness.get(med_name, [])[:2],  # Limit to 2 for speed
+                'conditions_treated': []
+            }
+            age_check = age_checks.get(med_name, {})
+            if age_check.get('appropriate'):
+                info['dosage_guidelines'] = [age_check]
+            batch_info[med_name] = info
         
         return batch_info
     
-    def _quick_safety_analysis(self, medicine_names: List[str], patient_age_months: Optional[int]) -> Dict:
-        """Quick safety analysis without deep database queries."""
+    async def _check_pair_interactions_async(self, medicine_names: List[str]) -> Optional[List[Optional[Dict]]]:
+        """Check every pair of medicines for an interaction in one bulk query; None if the lookup fails."""
+        pairs = list(itertools.combinations(medicine_names, 2))
+        if not pairs:
+            # Fewer than two medicines; nothing can interact
+            return []
         try:
-            # Quick check for severe interactions
-            severe_interactions = []
-            for i, med1 in enumerate(medicine_names):
-                for med2 in medicine_names[i+1:]:
-                    interaction = self.multi_db.drug_interactions_manager.check_interactions(med1, med2)
-                    if interaction and any('severe' in str(inter).lower() for inter in interaction):
-                        severe_interactions.extend(interaction[:1])  # Limit to 1 per pair
-            
-            # Quick age appropriateness check
-            age_warnings = []
-            if patient_age_months and patient_age_months < 216:  # Less than 18 years
-                for med_name in medicine_names:
-                    dosage = self.multi_db.dosage_manager.get_age_appropriate_dosage(med_name, patient_age_months)
-                    if not dosage:
-                        age_warnings.append(f"No pediatric dosing for {med_name}")
-            
-            return {
-                'severe_interactions': severe_interactions[:3],  # Limit to 3
-                'age_warnings': age_warnings[:3],  # Limit to 3
-                'total_interactions': len(severe_interactions),
-                'safety_score': 'HIGH_RISK' if len(severe_interactions) > 2 else 
-                               'MODERATE_RISK' if len(severe_interactions) > 0 or len(age_warnings) > 0 else 
-                               'LOW_RISK'
-            }
-        except Exception:
+            found = await asyncio.to_thread(self.multi_db.interactions_db.check_interactions_bulk, pairs)
+        except Exception as e:
+            logger.error("❌ Fast pair interaction lookup failed: %s", e)
+            return None
+        return [found[pair] for pair in pairs]
+    
+    def _quick_safety_analysis(self, medicine_names: List[str], patient_age_months: Optional[int],
+                               batch_info: Dict[str, Dict], pair_interactions: Optional[List[Optional[Dict]]]) -> Dict:
+        """Quick safety analysis, reusing the age checks already fetched for batch_info."""
+        if pair_interactions is None:
             return {'error': 'Safety analysis failed', 'safety_score': 'UNKNOWN'}
+        
+        # Quick check for severe interactions
+        severe_interactions = [interaction for interaction in pair_interactions if is_severe_interaction(interaction)]
+        
+        # Quick age appropriateness check
+        age_warnings = []
+        if patient_age_months and patient_age_months < 216:  # Less than 18 years
+            age_warnings = [
+                f"No pediatric dosing for {med_name}"
+                for med_name in medicine_names
+                if not batch_info.get(med_name, {}).get('dosage_guidelines')
+            ]
+        
+        return {
+            'severe_interactions': severe_interactions[:3],  # Limit to 3
+            'age_warnings': age_warnings[:3],  # Limit to 3
+            'total_interactions': len(severe_interactions),
+            'safety_score': 'HIGH_RISK' if len(severe_interactions) > 2 else 
+                           'MODERATE_RISK' if len(severe_interactions) > 0 or len(age_warnings) > 0 else 
+                           'LOW_RISK'
+        }
     
     def _create_simplified_context(self, medicines: List[Dict], batch_info: Dict, 
                                  safety_analysis: Dict, patient_age_years: Optional[int],
                                  patient_conditions: Optional[List[str]], budget_conscious: bool) -> str:
         """Create simplified context for faster AI processing."""
         
-        context_parts = []
-        
         # Patient info
-        context_parts.append(f"Patient: {patient_age_years} years old" if patient_age_years else "Patient: Age unknown")
+        context_parts = [f"Patient: {patient_age_years} years old" if patient_age_years else "Patient: Age unknown"]
         if patient_conditions:
             context_parts.append(f"Conditions: {', '.join(patient_conditions)}")
-        context_parts.append(f"Budget conscious: {budget_conscious}")
         
         # Safety summary
-        context_parts.append(f"\nSafety Analysis:")
-        context_parts.append(f"- Safety Score: {safety_analysis.get('safety_score', 'UNKNOWN')}")
-        if safety_analysis.get('severe_interactions'):
-            context_parts.append(f"- Severe Interactions: {len(safety_analysis['severe_interactions'])}")
-        if safety_analysis.get('age_warnings'):
-            context_parts.append(f"- Age Warnings: {len(safety_analysis['age_warnings'])}")
+        severe_interactions = safety_analysis.get('severe_interactions')
+        age_warnings = safety_analysis.get('age_warnings')
+        context_parts.extend((
+            f"Budget conscious: {budget_conscious}",
+            "\nSafety Analysis:",
+            f"- Safety Score: {safety_analysis.get('safety_score', 'UNKNOWN')}"
+        ))
+        if severe_interactions:
+            context_parts.append(f"- Severe Interactions: {len(severe_interactions)}")
+        if age_warnings:
+            context_parts.append(f"- Age Warnings: {len(age_warnings)}")
         
         # Medicine details (simplified)
-        context_parts.append(f"\nMedicines to analyze:")
+        context_parts.append("\nMedicines to analyze:")
+        append = context_parts.append
         for med in medicines:
-            med_name = med.get('name', '')
-            quantity = med.get('quantity', '')
+            # Stripped like the names batch_info is keyed by
+            med_name = med.get('name', '').strip()
+            append(f"\n{med_name} ({med.get('quantity', '')}):")
             
-            context_parts.append(f"\n{med_name} ({quantity}):")
+            info = batch_info.get(med_name)
+            if info is None:
+                continue
             
-            if med_name in batch_info:
-                info = batch_info[med_name]
-                
-                # Key interactions
-                if info.get('drug_interactions'):
-                    context_parts.append(f"  - Interactions: {len(info['drug_interactions'])}")
-                
-                # Key side effects
-                if info.get('side_effects'):
-                    context_parts.append(f"  - Side effects: {len(info['side_effects'])}")
-                
-                # Effectiveness
-                if info.get('effectiveness_data'):
-                    context_parts.append(f"  - Effectiveness data available")
+            # Key interactions and side effects
+            interactions = info.get('drug_interactions')
+            if interactions:
+                append(f"  - Interactions: {len(interactions)}")
+            side_effects = info.get('side_effects')
+            if side_effects:
+                append(f"  - Side effects: {len(side_effects)}")
+            
+            # Effectiveness
+            if info.get('effectiveness_data'):
+                append("  - Effectiveness data available")
         
         return '\n'.join(context_parts)
     
-    def _clean_json_result(self, result: str) -> str:
-        """Clean and validate JSON result quickly."""
+    def _parse_json_result(self, result: str) -> Dict:
+        """
+        Strip markdown fences from the model's answer and parse it.
+        
+        Answers that parse but are not an analysis object (e.g. a bare list,
+        or no medicine_alternatives list) get the same fallback as invalid JSON.
+        """
         try:
             # Clean the result - remove markdown code blocks if present
-            cleaned_result = result.strip()
-            if cleaned_result.startswith("```json"):
-                cleaned_result = cleaned_result[7:]
-            if cleaned_result.endswith("```"):
-                cleaned_result = cleaned_result[:-3]
-            cleaned_result = cleaned_result.strip()
+            cleaned_result = result.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
             
-            # Validate it's proper JSON
-            parsed_result = json.loads(cleaned_result)
-            return json.dumps(parsed_result, ensure_ascii=False, indent=2)
+            parsed = json.loads(cleaned_result)
+            if isinstance(parsed, dict) and isinstance(parsed.get("medicine_alternatives"), list):
+                return parsed
+            logger.warning("❌ Fast agent result has an unexpected shape: %.200s...", result)
             
         except json.JSONDecodeError as e:
-            print(f"❌ Fast agent JSON parsing error: {e}")
-            print(f"Raw result preview: {result[:200]}...")
-            
-            # Return simplified fallback
-            return json.dumps({
-                "prescription_analysis": {
-                    "overall_safety_assessment": "Analysis completed but parsing failed",
-                    "critical_warnings": [],
-                    "recommendations_summary": "Please consult healthcare provider"
-                },
-                "medicine_alternatives": [],
-                "overall_recommendations": {
-                    "prescription_changes": "Manual review needed",
-                    "follow_up_needed": "Consult healthcare provider",
-                    "pharmacist_consultation": True,
-                    "doctor_consultation": True
-                }
-            })
+            # %.200s truncates the preview only if the record is emitted
+            logger.warning("❌ Fast agent JSON parsing error: %s; raw result preview: %.200s...", e, result)
+        
+        # Return simplified fallback
+        return {
+            "prescription_analysis": {
+                "overall_safety_assessment": "Analysis completed but parsing failed",
+                "critical_warnings": [],
+                "recommendations_summary": "Please consult healthcare provider"
+            },
+            "medicine_alternatives": [],
+            "overall_recommendations": {
+                "prescription_changes": "Manual review needed",
+                "follow_up_needed": "Consult healthcare provider",
+                "pharmacist_consultation": True,
+                "doctor_consultation": True
+            }
+        }
 
 
 # Keep the original class for compatibility but use fast version by default
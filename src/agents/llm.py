@@ -0,0 +1,32 @@
+"""
+Gemini LLM Client
+Shared chat model used by every agent, created once per API key.
+"""
+
+import functools
+from typing import Optional
+from langchain_google_genai import ChatGoogleGenerativeAI
+
+GEMINI_MODEL = "gemini-2.0-flash-exp"
+GEMINI_TEMPERATURE = 0.1
+
+
+@functools.lru_cache(maxsize=1)
+def get_gemini_llm(google_api_key: Optional[str]) -> ChatGoogleGenerativeAI:
+    """
+    Return the Gemini chat model for an API key, creating it on first use.
+    
+    Building the client configures the Google SDK, so agents share one
+    instance instead of constructing a new one per request.
+    
+    Args:
+        google_api_key (str): Google Gemini API key
+    
+    Returns:
+        ChatGoogleGenerativeAI: Chat model configured for the agents
+    """
+    return ChatGoogleGenerativeAI(
+        model=GEMINI_MODEL,
+        temperature=GEMINI_TEMPERATURE,
+        google_api_key=google_api_key
+    )
@@ -5,20 +5,64 @@ AI agent that extracts medicine names and quantities from text content.
 Enhanced with fuzzy search capabilities for better typo handling.
 """
 
-from crewai import Agent, Task, Crew
-from langchain_google_genai import ChatGoogleGenerativeAI
+from crewai import Agent
+from src.agents.llm import get_gemini_llm
+import functools
 import json
 import re
 import os
+import asyncio
+import logging
 
 # Add fuzzy search import for typo handling
 try:
-    from src.utils.fuzzy_search import FuzzyMedicineSearch
+    from src.utils.fuzzy_search import shared_fuzzy_search
     FUZZY_SEARCH_AVAILABLE = True
 except ImportError:
     FUZZY_SEARCH_AVAILABLE = False
     print("⚠️  Fuzzy search not available - using exact matching only")
 
+logger = logging.getLogger(__name__)
+
+EXTRACTION_PROMPT = """
+            Analyze the following text content and extract ONLY medicine names and their quantities.
+            
+            Text Content:
+            {text_content}
+            
+            Instructions:
+            1. Identify all medicine names in the text
+            2. Extract the corresponding quantities for each medicine
+            3. Return ONLY the medicine name and quantity, nothing else
+            4. If a medicine appears multiple times, combine quantities if possible
+            5. Handle various quantity formats (tablets, capsules, mg, ml, etc.)
+            6. Return the result as a JSON array with 'name' and 'quantity' fields
+            
+            Expected Output Format:
+            [
+                {{"name": "Medicine Name", "quantity": "10 tablets"}},
+                {{"name": "Another Medicine", "quantity": "500mg"}}
+            ]
+            
+            Be precise and only include medicines that are clearly mentioned with quantities.
+            """
+
+
+@functools.lru_cache(maxsize=1)
+def _get_extraction_agent(google_api_key):
+    """Create the medicine extraction agent once per API key."""
+    return Agent(
+        role="Medicine Data Extractor",
+        goal="Extract medicine names and quantities from medical documents accurately",
+        backstory="""You are an expert medical data analyst specialized in extracting 
+        medicine information from various document formats. You have extensive experience 
+        in pharmaceutical terminology and can identify medicine names and quantities 
+        even when they appear in different formats or abbreviations.""",
+        verbose=True,
+        allow_delegation=False,
+        llm=get_gemini_llm(google_api_key)
+    )
+
 class MedicineExtractionAgent:
     """AI agent for extracting medicine names and quantities from text."""
     
@@ -33,24 +77,9 @@ class MedicineExtractionAgent:
         if api_key:
             os.environ["GOOGLE_API_KEY"] = api_key
         
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash-exp",
-            temperature=0.1,
-            google_api_key=os.getenv("GOOGLE_API_KEY")
-        )
-        
-        # Create the medicine extraction agent
-        self.agent = Agent(
-            role="Medicine Data Extractor",
-            goal="Extract medicine names and quantities from medical documents accurately",
-            backstory="""You are an expert medical data analyst specialized in extracting 
-            medicine information from various document formats. You have extensive experience 
-            in pharmaceutical terminology and can identify medicine names and quantities 
-            even when they appear in different formats or abbreviations.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm
-        )
+        # LLM client and agent are shared by every extraction agent
+        self.llm = get_gemini_llm(os.getenv("GOOGLE_API_KEY"))
+        self.agent = _get_extraction_agent(os.getenv("GOOGLE_API_KEY"))
     
     def extract_medicines(self, text_content):
         """
@@ -60,88 +89,115 @@ class MedicineExtractionAgent:
             text_content (str): Text content extracted from PDF
             
         Returns:
-            list: List of dictionaries containing medicine name and quantity
+            str: JSON string with the extracted medicines
         """
-        # Create the extraction task
-        task = Task(
-            description=f"""
-            Analyze the following text content and extract ONLY medicine names and their quantities.
-            
-            Text Content:
-            {text_content}
+        return json.dumps(self.extract_medicines_obj(text_content))
+    
+    def extract_medicines_obj(self, text_content):
+        """
+        Extract medicine names and quantities, returning Python objects.
+        
+        Callers that pass the result straight to another agent should use
+        this instead of extract_medicines to skip a JSON round trip. The
+        prompt is sent straight to the LLM with nothing stored on the
+        instance, so concurrent extractions on a shared agent stay separate.
+        
+        Args:
+            text_content (str): Text content extracted from PDF
             
-            Instructions:
-            1. Identify all medicine names in the text
-            2. Extract the corresponding quantities for each medicine
-            3. Return ONLY the medicine name and quantity, nothing else
-            4. If a medicine appears multiple times, combine quantities if possible
-            5. Handle various quantity formats (tablets, capsules, mg, ml, etc.)
-            6. Return the result as a JSON array with 'name' and 'quantity' fields
+        Returns:
+            dict: {"medicines": [...]} with name and quantity per medicine
+        """
+        try:
+            response = self.llm.invoke(EXTRACTION_PROMPT.format(text_content=text_content))
+            return self._medicines_from_result(response.content)
             
-            Expected Output Format:
-            [
-                {{"name": "Medicine Name", "quantity": "10 tablets"}},
-                {{"name": "Another Medicine", "quantity": "500mg"}}
-            ]
+        except Exception as e:
+            logger.error("Error during extraction: %s", e)
+            return {"medicines": []}
+    
+    async def extract_medicines_async(self, text_content):
+        """
+        Extract medicine names and quantities without blocking the event loop.
+        
+        Args:
+            text_content (str): Text content extracted from PDF
             
-            Be precise and only include medicines that are clearly mentioned with quantities.
-            """,
-            agent=self.agent,
-            expected_output="JSON array of medicines with names and quantities"
-        )
+        Returns:
+            str: JSON string with the extracted medicines
+        """
+        return json.dumps(await self.extract_medicines_obj_async(text_content))
+    
+    async def extract_medicines_obj_async(self, text_content):
+        """
+        Extract medicine names and quantities without blocking the event loop.
         
-        # Create crew and execute task
-        crew = Crew(
-            agents=[self.agent],
-            tasks=[task],
-            verbose=True
-        )
+        The prompt goes through the LLM's async API, and parsing and fuzzy
+        enhancement run in a worker thread, so callers can overlap other setup
+        with the LLM round trip.
         
+        Args:
+            text_content (str): Text content extracted from PDF
+            
+        Returns:
+            dict: {"medicines": [...]} with name and quantity per medicine
+        """
         try:
-            result = crew.kickoff()
+            response = await self.llm.ainvoke(EXTRACTION_PROMPT.format(text_content=text_content))
+            return await asyncio.to_thread(self._medicines_from_result, response.content)
             
-            # Try to parse the result as JSON
-            try:
-                # Extract JSON from the result if it's wrapped in text
-                if isinstance(result, str):
-                    # Look for JSON array in the result
-                    start_idx = result.find('[')
-                    end_idx = result.rfind(']') + 1
-                    if start_idx != -1 and end_idx != 0:
-                        json_str = result[start_idx:end_idx]
-                        medicines = json.loads(json_str)
-                    else:
-                        # If no JSON found, return empty list
-                        medicines = []
-                elif isinstance(result, list):
-                    # If result is already a list, use it directly
-                    medicines = result
+        except Exception as e:
+            logger.error("Error during extraction: %s", e)
+            return {"medicines": []}
+    
+    def _medicines_from_result(self, result):
+        """
+        Parse the agent's answer, validate it and apply fuzzy name correction.
+        
+        Args:
+            result: Raw agent output (text, or an already parsed list)
+            
+        Returns:
+            dict: {"medicines": [...]} with name and quantity per medicine
+        """
+        # Try to parse the result as JSON
+        try:
+            # Extract JSON from the result if it's wrapped in text
+            if isinstance(result, str):
+                # Look for JSON array in the result
+                start_idx = result.find('[')
+                end_idx = result.rfind(']') + 1
+                if start_idx != -1 and end_idx != 0:
+                    json_str = result[start_idx:end_idx]
+                    medicines = json.loads(json_str)
                 else:
+                    # If no JSON found, return empty list
                     medicines = []
+            elif isinstance(result, list):
+                # If result is already a list, use it directly
+                medicines = result
+            else:
+                medicines = []
+            
+            # Validate the structure
+            if isinstance(medicines, list):
+                validated_medicines = []
+                for medicine in medicines:
+                    if isinstance(medicine, dict) and 'name' in medicine and 'quantity' in medicine:
+                        validated_medicines.append({
+                            'name': str(medicine['name']).strip(),
+                            'quantity': str(medicine['quantity']).strip()
+                        })
                 
-                # Validate the structure
-                if isinstance(medicines, list):
-                    validated_medicines = []
-                    for medicine in medicines:
-                        if isinstance(medicine, dict) and 'name' in medicine and 'quantity' in medicine:
-                            validated_medicines.append({
-                                'name': str(medicine['name']).strip(),
-                                'quantity': str(medicine['quantity']).strip()
-                            })
-                    
-                    # ENHANCEMENT: Apply fuzzy search to improve medicine names
-                    enhanced_medicines = self._enhance_with_fuzzy_search(validated_medicines)
-                    return json.dumps({"medicines": enhanced_medicines})
-                else:
-                    return json.dumps({"medicines": []})
-                    
-            except json.JSONDecodeError:
-                print("Warning: Could not parse agent output as JSON. Returning empty result.")
-                return json.dumps({"medicines": []})
+                # ENHANCEMENT: Apply fuzzy search to improve medicine names
+                enhanced_medicines = self._enhance_with_fuzzy_search(validated_medicines)
+                return {"medicines": enhanced_medicines}
+            else:
+                return {"medicines": []}
                 
-        except Exception as e:
-            print(f"Error during extraction: {str(e)}")
-            return json.dumps({"medicines": []})
+        except json.JSONDecodeError:
+            logger.warning("Could not parse agent output as JSON. Returning empty result.")
+            return {"medicines": []}
     
     def _enhance_with_fuzzy_search(self, medicines):
         """
@@ -158,43 +214,38 @@ class MedicineExtractionAgent:
             return medicines
         
         enhanced_medicines = []
-        fuzzy_searcher = FuzzyMedicineSearch()
         
-        for medicine in medicines:
+        try:
+            # Match every extracted name in one batched fuzzy search, on the
+            # process-wide searcher so its name index stays warm between requests
+            with shared_fuzzy_search() as searcher:
+                best_matches = searcher.match_many(
+                    [medicine['name'] for medicine in medicines], min_score=85
+                )
+        except Exception as e:
+            logger.warning("Fuzzy search failed: %s", e)
+            # If fuzzy search fails, keep the original names
+            best_matches = [None] * len(medicines)
+        
+        for medicine, best_match in zip(medicines, best_matches):
             medicine_name = medicine['name']
             quantity = medicine['quantity']
             
-            try:
-                # Try fuzzy search to see if we can find a better match
-                search_results = fuzzy_searcher.search_with_suggestions(medicine_name, limit=1)
+            if best_match:
+                # Found a high-confidence match, use the corrected name
+                corrected_name = best_match[0]
                 
-                if (search_results['matches'] and 
-                    search_results['confidence'] in ['high', 'medium'] and
-                    search_results['matches'][0]['similarity_score'] >= 85):
-                    
-                    # Found a high-confidence match, use the corrected name
-                    corrected_name = search_results['matches'][0]['name']
-                    
-                    if corrected_name.lower() != medicine_name.lower():
-                        print(f"✅ Fuzzy search enhanced: '{medicine_name}' → '{corrected_name}'")
-                    
-                    enhanced_medicines.append({
-                        'name': corrected_name,
-                        'quantity': quantity,
-                        'original_name': medicine_name if corrected_name.lower() != medicine_name.lower() else None,
-                        'fuzzy_enhanced': corrected_name.lower() != medicine_name.lower()
-                    })
-                else:
-                    # No good match found, keep original
-                    enhanced_medicines.append({
-                        'name': medicine_name,
-                        'quantity': quantity,
-                        'fuzzy_enhanced': False
-                    })
-                    
-            except Exception as e:
-                print(f"Warning: Fuzzy search failed for '{medicine_name}': {e}")
-                # If fuzzy search fails, keep original
+                if corrected_name.lower() != medicine_name.lower():
+                    logger.info("✅ Fuzzy search enhanced: '%s' → '%s'", medicine_name, corrected_name)
+                
+                enhanced_medicines.append({
+                    'name': corrected_name,
+                    'quantity': quantity,
+                    'original_name': medicine_name if corrected_name.lower() != medicine_name.lower() else None,
+                    'fuzzy_enhanced': corrected_name.lower() != medicine_name.lower()
+                })
+            else:
+                # No good match found, keep original
                 enhanced_medicines.append({
                     'name': medicine_name,
                     'quantity': quantity,
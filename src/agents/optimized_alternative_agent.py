@@ -1,86 +1,35 @@
 import os
 import json
-from typing import Optional, List, Dict, Any
+import logging
+import functools
+import hashlib
+import itertools
+import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Union
 from crewai import Agent, Task, Crew
-from langchain_google_genai import ChatGoogleGenerativeAI
-from src.database.manager import MedicineDatabaseManager
-from src.database.drug_interactions_db import DrugInteractionsManager
-from src.database.side_effects_db import SideEffectsManager
-from src.database.dosage_db import DosageGuidelinesManager
+from src.agents.llm import get_gemini_llm
+from src.database.drug_interactions_db import is_severe_interaction
+from src.database.side_effects_db import is_severe_side_effect
+from src.database.multi_db_manager import get_multi_db_manager
+from src.utils.cache import analysis_cache, peek_cached_many
 
+logger = logging.getLogger(__name__)
 
-class OptimizedAlternativeSuggestionAgent:
-    """Optimized alternative suggestion agent using only critical databases for maximum performance."""
-    
-    def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
-        
-        # Initialize only critical databases for performance
-        self.medicine_db = MedicineDatabaseManager()
-        self.interactions_db = DrugInteractionsManager()
-        self.side_effects_db = SideEffectsManager()
-        self.dosage_db = DosageGuidelinesManager()
-        
-        # Initialize LLM
-        if self.api_key:
-            os.environ["GOOGLE_API_KEY"] = self.api_key
-        
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.0-flash-exp",
-            temperature=0.1,
-            google_api_key=os.getenv("GOOGLE_API_KEY")
-        )
-        
-        # Create a streamlined agent
-        self.agent = Agent(
-            role="Optimized Clinical Pharmacist",
-            goal="Rapidly provide safe, cost-effective medicine alternatives with essential safety intelligence",
-            backstory="You are an experienced pharmacist who provides rapid, safety-focused alternative suggestions using core medical databases.",
-            llm=self.llm,
-            verbose=False
-        )
-    
-    def suggest_alternatives(self, medicines_json: str, 
-                           patient_age_years: Optional[int] = None,
-                           patient_conditions: Optional[List[str]] = None,
-                           budget_conscious: bool = True) -> str:
-        """
-        Optimized alternative suggestions using only critical databases for speed.
-        """
-        try:
-            # Parse input medicines
-            medicines_data = json.loads(medicines_json)
-            medicines = medicines_data.get("medicines", [])
-            
-            if not medicines:
-                return json.dumps({"error": "No medicines found in input"})
-            
-            # Convert age to months for database queries
-            patient_age_months = patient_age_years * 12 if patient_age_years else None
-            
-            # Connect to only critical databases
-            if not self._connect_critical_databases():
-                return json.dumps({"error": "Failed to connect to critical medical databases"})
-            
-            # Get all medicine names for batch processing
-            medicine_names = [med.get('name', '').strip() for med in medicines if med.get('name')]
-            
-            # Optimized batch database operations
-            batch_medicine_info = self._get_critical_medicine_info(medicine_names, patient_age_months)
-            batch_safety_analysis = self._critical_safety_analysis(medicine_names, patient_age_months)
-            
-            # Prepare streamlined context for AI
-            optimized_context = self._create_optimized_context(
-                medicines, batch_medicine_info, batch_safety_analysis,
-                patient_age_years, patient_conditions, budget_conscious
-            )
-            
-            # Create optimized task
-            task = Task(
-                description=f"""
+# Requests may prepare the shared databases from several threads at once
+_connect_lock = threading.Lock()
+
+# Part of every analysis cache key; bump it when the prompt or the database
+# contents change, so answers built from the old ones are no longer served
+ANALYSIS_CACHE_VERSION = 1
+
+# Response contract for the optimized agent, dedented once at import so each
+# request sends the JSON structure without the source indentation
+OPTIMIZED_ANALYSIS_PROMPT = textwrap.dedent("""
                 Analyze this prescription quickly using core safety databases and provide JSON response:
                 
-                {optimized_context}
+                {context}
                 
                 Provide a JSON response with this EXACT structure:
                 {{
@@ -122,7 +71,165 @@ class OptimizedAlternativeSuggestionAgent:
                 
                 Focus on speed and critical safety. Limit alternatives to 2-3 per medicine.
                 Only include information from the 4 core databases: medicine info, drug interactions, side effects, and dosage guidelines.
-                """,
+                """)
+
+# The prompt split around {context} with braces unescaped, so each request
+# joins three strings instead of parsing the template with str.format
+_OPTIMIZED_PROMPT_HEAD, _OPTIMIZED_PROMPT_TAIL = (
+    part.replace("{{", "{").replace("}}", "}") for part in OPTIMIZED_ANALYSIS_PROMPT.split("{context}")
+)
+
+
+class _JSONListStream:
+    """Decode the objects of one JSON list as its text streams in."""
+    
+    def __init__(self, key: str):
+        self._key = f'"{key}"'
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = None  # Just past the list's '[' once found
+        self._done = False
+    
+    def feed(self, text: str) -> List[Any]:
+        """Add streamed text and return the list items completed by it."""
+        self._buffer += text
+        if self._pos is None:
+            key = self._buffer.find(self._key)
+            bracket = self._buffer.find("[", key + len(self._key)) if key >= 0 else -1
+            if bracket < 0:
+                return []
+            self._pos = bracket + 1
+        
+        items = []
+        buffer = self._buffer
+        while not self._done:
+            pos = self._pos
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._done = True
+                break
+            try:
+                item, self._pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The item is still incomplete
+                break
+            items.append(item)
+        return items
+
+
+@functools.lru_cache(maxsize=1)
+def _get_optimized_agent(google_api_key: Optional[str]) -> Agent:
+    """Create the streamlined pharmacist agent once per API key."""
+    return Agent(
+        role="Optimized Clinical Pharmacist",
+        goal="Rapidly provide safe, cost-effective medicine alternatives with essential safety intelligence",
+        backstory="You are an experienced pharmacist who provides rapid, safety-focused alternative suggestions using core medical databases.",
+        llm=get_gemini_llm(google_api_key),
+        verbose=False
+    )
+
+
+def _analysis_cache_key(medicines: List[Dict], patient_age_years: Optional[int],
+                        patient_conditions: Optional[List[str]], budget_conscious: bool) -> str:
+    """Digest of a canonical JSON encoding of everything the analysis depends on."""
+    canonical = json.dumps(
+        [ANALYSIS_CACHE_VERSION, medicines, patient_age_years, patient_conditions, budget_conscious],
+        sort_keys=True, ensure_ascii=False, separators=(",", ":")
+    )
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+def _cache_analysis(cache_key: str, analysis: Dict):
+    """Keep a complete analysis; errors and the parse-failure fallback (no alternatives) are retried."""
+    if analysis.get("medicine_alternatives"):
+        analysis_cache.set(cache_key, json.dumps(analysis, ensure_ascii=False))
+
+
+class OptimizedAlternativeSuggestionAgent:
+    """Optimized alternative suggestion agent using only critical databases for maximum performance."""
+    
+    def __init__(self, api_key: Optional[str] = None):
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        
+        # Only the critical databases, taken from the process-wide manager so
+        # their connections stay open across requests until interpreter exit
+        multi_db = get_multi_db_manager()
+        self.medicine_db = multi_db.medicine_db
+        self.interactions_db = multi_db.interactions_db
+        self.side_effects_db = multi_db.side_effects_db
+        self.dosage_db = multi_db.dosage_db
+        
+        # Initialize LLM
+        if self.api_key:
+            os.environ["GOOGLE_API_KEY"] = self.api_key
+        
+        # Shared by every instance; created on first use
+        self.llm = get_gemini_llm(os.getenv("GOOGLE_API_KEY"))
+        self.agent = _get_optimized_agent(os.getenv("GOOGLE_API_KEY"))
+    
+    def suggest_alternatives(self, medicines_json: str, 
+                           patient_age_years: Optional[int] = None,
+                           patient_conditions: Optional[List[str]] = None,
+                           budget_conscious: bool = True) -> str:
+        """
+        Optimized alternative suggestions using only critical databases for speed.
+        """
+        return json.dumps(self._suggest_alternatives(medicines_json, patient_age_years,
+                                                     patient_conditions, budget_conscious),
+                          ensure_ascii=False)
+    
+    def suggest_alternatives_obj(self, medicines_data: Dict, 
+                                 patient_age_years: Optional[int] = None,
+                                 patient_conditions: Optional[List[str]] = None,
+                                 budget_conscious: bool = True) -> Dict:
+        """
+        Same as suggest_alternatives, but takes and returns Python objects.
+        
+        Callers holding the extraction result as a dict should use this to
+        skip serializing the input and re-parsing it here.
+        
+        Args:
+            medicines_data (Dict): {"medicines": [...]} as returned by
+                MedicineExtractionAgent.extract_medicines_obj
+            
+        Returns:
+            Dict: The analysis, or a dict with an "error" key
+        """
+        return self._suggest_alternatives(medicines_data, patient_age_years,
+                                          patient_conditions, budget_conscious)
+    
+    def _suggest_alternatives(self, medicines_input: Union[str, Dict],
+                              patient_age_years: Optional[int],
+                              patient_conditions: Optional[List[str]],
+                              budget_conscious: bool) -> Dict:
+        """Run the analysis for a medicines JSON string or dict."""
+        try:
+            # Parse input medicines
+            medicines_data = json.loads(medicines_input) if isinstance(medicines_input, str) else medicines_input
+            medicines = medicines_data.get("medicines", [])
+            
+            if not medicines:
+                return {"error": "No medicines found in input"}
+            
+            # Repeat prescriptions are answered without the LLM round trip;
+            # each hit decodes its own copy, so callers may modify it
+            cache_key = _analysis_cache_key(medicines, patient_age_years,
+                                            patient_conditions, budget_conscious)
+            cached = analysis_cache.get(cache_key)
+            if cached is not None:
+                return json.loads(cached)
+            
+            prompt = self._build_analysis_prompt(medicines, patient_age_years,
+                                                 patient_conditions, budget_conscious)
+            if prompt is None:
+                return {"error": "Failed to connect to critical medical databases"}
+            
+            # Create optimized task
+            task = Task(
+                description=prompt,
                 agent=self.agent,
                 expected_output="Optimized JSON response with medicine alternatives and critical safety analysis"
             )
@@ -130,126 +237,217 @@ class OptimizedAlternativeSuggestionAgent:
             # Execute quickly
             result = task.execute()
             
-            # Close database connections
-            self._close_critical_databases()
-            
             # Clean and return result
-            return self._clean_json_result(result)
+            analysis = self._parse_json_result(result)
+            _cache_analysis(cache_key, analysis)
+            return analysis
             
         except Exception as e:
-            self._close_critical_databases()
-            return json.dumps({
+            return {
                 "error": f"Error in optimized alternative analysis: {str(e)}",
                 "fallback_message": "Please consult with a healthcare provider for medicine alternatives."
-            })
+            }
     
-    def _connect_critical_databases(self) -> bool:
-        """Connect to only the 4 critical databases for performance."""
+    def stream_alternatives(self, medicines_data: Dict,
+                            patient_age_years: Optional[int] = None,
+                            patient_conditions: Optional[List[str]] = None,
+                            budget_conscious: bool = True) -> Iterator[Dict]:
+        """
+        Stream the analysis, yielding each medicine's alternatives as soon as
+        the model has written them.
+        
+        The prompt goes straight to the LLM's streaming API instead of through
+        the blocking CrewAI task, so callers can forward the first medicine
+        long before the full answer is complete.
+        
+        Args:
+            medicines_data (Dict): {"medicines": [...]} as returned by
+                MedicineExtractionAgent.extract_medicines_obj
+            
+        Yields:
+            Dict: {"medicine_alternative": {...}} per medicine, then
+                {"result": {...}} with the full analysis, or {"error": ...}
+        """
+        medicines = medicines_data.get("medicines", [])
+        if not medicines:
+            yield {"error": "No medicines found in input"}
+            return
+        
         try:
-            connections = [
-                self.medicine_db.connect(),
-                self.interactions_db.connect(),
-                self.side_effects_db.connect(),
-                self.dosage_db.connect()
-            ]
-            return all(connections)
+            cache_key = _analysis_cache_key(medicines, patient_age_years,
+                                            patient_conditions, budget_conscious)
+            cached = analysis_cache.get(cache_key)
+            if cached is not None:
+                analysis = json.loads(cached)
+                for alternative in analysis["medicine_alternatives"]:
+                    yield {"medicine_alternative": alternative}
+                yield {"result": analysis}
+                return
+            
+            prompt = self._build_analysis_prompt(medicines, patient_age_years,
+                                                 patient_conditions, budget_conscious)
+            if prompt is None:
+                yield {"error": "Failed to connect to critical medical databases"}
+                return
+            
+            chunks = []
+            alternatives = _JSONListStream("medicine_alternatives")
+            for chunk in self.llm.stream(prompt):
+                chunks.append(chunk.content)
+                for alternative in alternatives.feed(chunk.content):
+                    yield {"medicine_alternative": alternative}
+            
+            analysis = self._parse_json_result("".join(chunks))
+            _cache_analysis(cache_key, analysis)
+            yield {"result": analysis}
+            
         except Exception as e:
-            print(f"❌ Failed to connect to critical databases: {e}")
+            yield {
+                "error": f"Error in optimized alternative analysis: {str(e)}",
+                "fallback_message": "Please consult with a healthcare provider for medicine alternatives."
+            }
+    
+    def _build_analysis_prompt(self, medicines: List[Dict], patient_age_years: Optional[int],
+                               patient_conditions: Optional[List[str]], budget_conscious: bool) -> Optional[str]:
+        """Look up the critical safety data and build the analysis prompt; None if the databases are unavailable."""
+        # Convert age to months for database queries
+        patient_age_months = patient_age_years * 12 if patient_age_years else None
+        
+        # Connect to only critical databases
+        if not self._connect_critical_databases():
+            return None
+        
+        # Get all medicine names for batch processing
+        medicine_names = [med.get('name', '').strip() for med in medicines if med.get('name')]
+        
+        # Optimized batch database operations, run concurrently
+        batch_medicine_info, batch_safety_analysis = self._gather_critical_context(
+            medicine_names, patient_age_months
+        )
+        
+        # Prepare streamlined context for AI
+        optimized_context = self._create_optimized_context(
+            medicines, batch_medicine_info, batch_safety_analysis,
+            patient_age_years, patient_conditions, budget_conscious
+        )
+        return _OPTIMIZED_PROMPT_HEAD + optimized_context + _OPTIMIZED_PROMPT_TAIL
+    
+    def prepare_databases(self) -> bool:
+        """
+        Open the critical databases ahead of suggest_alternatives.
+        
+        Opening the medicine database prepares its schema and caches, so
+        callers can run this while they wait on medicine extraction;
+        suggest_alternatives then reuses the open connections.
+        
+        Returns:
+            bool: True if every critical database is connected
+        """
+        # Connecting would create an empty medicines database
+        if not os.path.exists(self.medicine_db.db_path):
             return False
+        return self._connect_critical_databases()
     
-    def _close_critical_databases(self):
-        """Close critical database connections."""
+    def _connect_critical_databases(self) -> bool:
+        """Connect to only the 4 critical databases for performance; open connections are reused."""
         try:
-            self.medicine_db.close()
-            self.interactions_db.close()
-            self.side_effects_db.close()
-            self.dosage_db.close()
-        except Exception:
-            pass
+            with _connect_lock:
+                connections = [
+                    self.medicine_db.connect(),
+                    self.interactions_db.connect(),
+                    self.side_effects_db.connect(),
+                    self.dosage_db.connect()
+                ]
+            return all(connections)
+        except Exception as e:
+            logger.error("❌ Failed to connect to critical databases: %s", e)
+            return False
     
-    def _get_critical_medicine_info(self, medicine_names: List[str], patient_age_months: Optional[int]) -> Dict[str, Dict]:
-        """Get only critical safety info for all medicines in one batch."""
-        batch_info = {}
+    def _gather_critical_context(self, medicine_names: List[str],
+                                 patient_age_months: Optional[int]) -> Tuple[Dict[str, Dict], Dict]:
+        """Run the bulk lookups in parallel threads, then build batch_info and the safety analysis."""
+        # Per-medicine cached lookup, the batch query filling it, and extra arguments
+        cached_kinds = {
+            'interactions': (self.interactions_db.get_drug_interactions, self.interactions_db.get_drug_interactions_batch, ()),
+            'side_effects': (self.side_effects_db.get_side_effects_for_medicine, self.side_effects_db.get_side_effects_batch, ())
+        }
+        if patient_age_months:
+            cached_kinds['age_checks'] = (
+                self.dosage_db.check_age_appropriateness, self.dosage_db.check_age_appropriateness_batch, (patient_age_months,)
+            )
         
-        for med_name in medicine_names:
-            try:
-                # Get only critical information for speed
-                info = {
-                    'basic_info': None,
-                    'drug_interactions': [],
-                    'side_effects': [],
-                    'dosage_guidelines': []
-                }
-                
-                # Basic medicine info
-                try:
-                    basic_info = self.medicine_db.search_medicine(med_name)
-                    if basic_info:
-                        info['basic_info'] = basic_info[0] if basic_info else None
-                except Exception:
-                    pass
-                
-                # Critical drug interactions check
-                try:
-                    interactions = self.interactions_db.check_interactions(med_name)
-                    if interactions:
-                        info['drug_interactions'] = interactions[:2]  # Limit to 2 for speed
-                except Exception:
-                    pass
+        lookups = {}
+        # Nothing to look up without medicines, and nothing to pair for one
+        if medicine_names:
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                futures = {'basic_info': executor.submit(self.medicine_db.get_medicine_info_bulk, medicine_names)}
+                if len(medicine_names) > 1:
+                    pairs = list(itertools.combinations(medicine_names, 2))
+                    futures['pair_interactions'] = executor.submit(self.interactions_db.check_interactions_bulk, pairs)
+                # Medicines seen in recent prescriptions are served from the lookup cache
+                for kind, (lookup, batch, extra) in cached_kinds.items():
+                    lookups[kind], missing = peek_cached_many(lookup, medicine_names, *extra)
+                    if missing:
+                        futures[kind] = executor.submit(batch, missing, *extra)
                 
-                # Critical side effects
-                try:
-                    side_effects = self.side_effects_db.get_medicine_side_effects(med_name)
-                    if side_effects:
-                        info['side_effects'] = side_effects[:3]  # Limit to 3 for speed
-                except Exception:
-                    pass
-                
-                # Critical dosage info (age appropriateness)
-                if patient_age_months:
+                for kind, future in futures.items():
+                    found = lookups.setdefault(kind, {})
                     try:
-                        dosage = self.dosage_db.get_age_appropriate_dosage(med_name, patient_age_months)
-                        if dosage:
-                            info['dosage_guidelines'] = [dosage]
+                        found.update(future.result())
                     except Exception:
-                        pass
-                
-                batch_info[med_name] = info
-                
-            except Exception:
-                # If individual medicine fails, continue with others
-                batch_info[med_name] = {'error': 'Failed to fetch critical info'}
+                        # Each database fails independently; its medicines are
+                        # simply missing from the lookup and get the defaults
+                        logger.exception("❌ Critical %s lookup failed", kind)
+        
+        batch_info = self._get_critical_medicine_info(medicine_names, lookups)
+        safety_analysis = self._critical_safety_analysis(
+            medicine_names, patient_age_months, batch_info, lookups.get('pair_interactions', {})
+        )
+        return batch_info, safety_analysis
+    
+    def _get_critical_medicine_info(self, medicine_names: List[str], lookups: Dict[str, Dict]) -> Dict[str, Dict]:
+        """Get only critical safety info for each medicine from the bulk lookup results."""
+        basic_info = lookups.get('basic_info', {})
+        interactions = lookups.get('interactions', {})
+        side_effects = lookups.get('side_effects', {})
+        age_checks = lookups.get('age_checks', {})
+        
+        batch_info = {}
+        for med_name in medicine_names:
+            age_check = age_checks.get(med_name, {})
+            batch_info[med_name] = {
+                'basic_info': basic_info.get(med_name),
+                'drug_interactions': interactions.get(med_name, [])[:2],  # Limit to 2 for speed
+                'side_effects': side_effects.get(med_name, [])[:3],  # Limit to 3 for speed
+                'dosage_guidelines': [age_check] if age_check.get('appropriate') else []
+            }
         
         return batch_info
     
-    def _critical_safety_analysis(self, medicine_names: List[str], patient_age_months: Optional[int]) -> Dict:
-        """Quick critical safety analysis using only essential databases."""
+    def _critical_safety_analysis(self, medicine_names: List[str], patient_age_months: Optional[int],
+                                  batch_info: Dict[str, Dict],
+                                  pair_interactions: Dict[Tuple[str, str], Optional[Dict]]) -> Dict:
+        """Quick critical safety analysis, reusing the age checks already fetched for batch_info."""
         try:
             # Critical interaction check
             severe_interactions = []
             total_interactions = 0
             
-            for i, med1 in enumerate(medicine_names):
-                for med2 in medicine_names[i+1:]:
-                    try:
-                        interaction = self.interactions_db.check_interactions(med1, med2)
-                        if interaction:
-                            total_interactions += len(interaction)
-                            severe = [inter for inter in interaction if 'severe' in str(inter).lower()]
-                            severe_interactions.extend(severe[:1])  # Limit to 1 severe per pair
-                    except Exception:
-                        continue
+            # At most one interaction row per pair
+            for interaction in pair_interactions.values():
+                if interaction:
+                    total_interactions += 1
+                    if is_severe_interaction(interaction):
+                        severe_interactions.append(interaction)
             
             # Critical age appropriateness check
             age_warnings = []
             if patient_age_months and patient_age_months < 216:  # Less than 18 years
-                for med_name in medicine_names:
-                    try:
-                        dosage = self.dosage_db.get_age_appropriate_dosage(med_name, patient_age_months)
-                        if not dosage:
-                            age_warnings.append(f"No pediatric dosing for {med_name}")
-                    except Exception:
-                        continue
+                age_warnings = [
+                    f"No pediatric dosing for {med_name}"
+                    for med_name in medicine_names
+                    if not batch_info.get(med_name, {}).get('dosage_guidelines')
+                ]
             
             return {
                 'severe_interactions': severe_interactions[:2],  # Limit to 2
@@ -267,85 +465,92 @@ class OptimizedAlternativeSuggestionAgent:
                                  patient_conditions: Optional[List[str]], budget_conscious: bool) -> str:
         """Create optimized context focusing only on critical safety information."""
         
-        context_parts = []
-        
         # Patient info
-        context_parts.append(f"Patient: {patient_age_years} years old" if patient_age_years else "Patient: Age unknown")
+        context_parts = [f"Patient: {patient_age_years} years old" if patient_age_years else "Patient: Age unknown"]
         if patient_conditions:
             context_parts.append(f"Conditions: {', '.join(patient_conditions)}")
-        context_parts.append(f"Budget conscious: {budget_conscious}")
         
         # Critical safety summary
-        context_parts.append(f"\nCritical Safety Analysis:")
-        context_parts.append(f"- Safety Score: {safety_analysis.get('safety_score', 'UNKNOWN')}")
-        if safety_analysis.get('severe_interactions'):
-            context_parts.append(f"- Severe Interactions: {len(safety_analysis['severe_interactions'])}")
-        if safety_analysis.get('age_warnings'):
-            context_parts.append(f"- Age Warnings: {len(safety_analysis['age_warnings'])}")
+        severe_interactions = safety_analysis.get('severe_interactions')
+        age_warnings = safety_analysis.get('age_warnings')
+        context_parts.extend((
+            f"Budget conscious: {budget_conscious}",
+            "\nCritical Safety Analysis:",
+            f"- Safety Score: {safety_analysis.get('safety_score', 'UNKNOWN')}"
+        ))
+        if severe_interactions:
+            context_parts.append(f"- Severe Interactions: {len(severe_interactions)}")
+        if age_warnings:
+            context_parts.append(f"- Age Warnings: {len(age_warnings)}")
         
         # Critical medicine details
-        context_parts.append(f"\nMedicines for critical analysis:")
+        context_parts.append("\nMedicines for critical analysis:")
+        append = context_parts.append
+        pediatric = bool(patient_age_years and patient_age_years < 18)
         for med in medicines:
-            med_name = med.get('name', '')
-            quantity = med.get('quantity', '')
+            # Stripped like the names batch_info is keyed by
+            med_name = med.get('name', '').strip()
+            append(f"\n{med_name} ({med.get('quantity', '')}):")
             
-            context_parts.append(f"\n{med_name} ({quantity}):")
+            info = batch_info.get(med_name)
+            if info is None:
+                continue
             
-            if med_name in batch_info:
-                info = batch_info[med_name]
-                
-                # Critical interactions
-                if info.get('drug_interactions'):
-                    context_parts.append(f"  - Critical interactions: {len(info['drug_interactions'])}")
-                
-                # Critical side effects
-                if info.get('side_effects'):
-                    severe_effects = [se for se in info['side_effects'] if 'severe' in str(se).lower()]
-                    if severe_effects:
-                        context_parts.append(f"  - Severe side effects: {len(severe_effects)}")
-                
-                # Age appropriateness
-                if info.get('dosage_guidelines'):
-                    context_parts.append(f"  - Age-appropriate dosing available")
-                elif patient_age_years and patient_age_years < 18:
-                    context_parts.append(f"  - WARNING: No pediatric dosing data")
+            # Critical interactions
+            interactions = info.get('drug_interactions')
+            if interactions:
+                append(f"  - Critical interactions: {len(interactions)}")
+            
+            # Critical side effects
+            side_effects = info.get('side_effects')
+            if side_effects:
+                severe_count = sum(1 for se in side_effects if is_severe_side_effect(se))
+                if severe_count:
+                    append(f"  - Severe side effects: {severe_count}")
+            
+            # Age appropriateness
+            if info.get('dosage_guidelines'):
+                append("  - Age-appropriate dosing available")
+            elif pediatric:
+                append("  - WARNING: No pediatric dosing data")
         
         return '\n'.join(context_parts)
     
-    def _clean_json_result(self, result: str) -> str:
-        """Clean and validate JSON result quickly."""
+    def _parse_json_result(self, result: str) -> Dict:
+        """
+        Strip markdown fences from the model's answer and parse it.
+        
+        Answers that parse but are not an analysis object (e.g. a bare list,
+        or no medicine_alternatives list) get the same fallback as invalid JSON.
+        """
         try:
             # Clean the result - remove markdown code blocks if present
-            cleaned_result = result.strip()
-            if cleaned_result.startswith("```json"):
-                cleaned_result = cleaned_result[7:]
-            if cleaned_result.endswith("```"):
-                cleaned_result = cleaned_result[:-3]
-            cleaned_result = cleaned_result.strip()
+            cleaned_result = result.strip().removeprefix("```json").removeprefix("```").removesuffix("```").strip()
             
-            # Validate it's proper JSON
-            parsed_result = json.loads(cleaned_result)
-            return json.dumps(parsed_result, ensure_ascii=False, indent=2)
+            parsed = json.loads(cleaned_result)
+            if isinstance(parsed, dict) and isinstance(parsed.get("medicine_alternatives"), list):
+                return parsed
+            logger.warning("❌ Optimized agent result has an unexpected shape: %.200s...", result)
             
         except json.JSONDecodeError as e:
-            print(f"❌ Optimized agent JSON parsing error: {e}")
-            print(f"Raw result preview: {result[:200]}...")
-            
-            # Return simplified fallback
-            return json.dumps({
-                "prescription_analysis": {
-                    "overall_safety_assessment": "Critical analysis completed but parsing failed",
-                    "critical_warnings": [],
-                    "recommendations_summary": "Please consult healthcare provider"
-                },
-                "medicine_alternatives": [],
-                "overall_recommendations": {
-                    "prescription_changes": "Manual review needed",
-                    "follow_up_needed": "Consult healthcare provider",
-                    "pharmacist_consultation": True,
-                    "doctor_consultation": True
-                }
-            })
+            # %.200s truncates the preview only if the record is emitted
+            logger.warning("❌ Optimized agent JSON parsing error: %s; raw result preview: %.200s...", e, result)
+        
+        # Return simplified fallback
+        return {
+            "prescription_analysis": {
+                "overall_safety_assessment": "Critical analysis completed but parsing failed",
+                "critical_warnings": [],
+                "recommendations_summary": "Please consult healthcare provider"
+            },
+            "medicine_alternatives": [],
+            "overall_recommendations": {
+                "prescription_changes": "Manual review needed",
+                "follow_up_needed": "Consult healthcare provider",
+                "pharmacist_consultation": True,
+                "doctor_consultation": True
+            }
+        }
 
 
 def test_optimized_alternative_agent():
@@ -7,11 +7,18 @@ Serves the frontend and processes prescription files.
 from fastapi import FastAPI, UploadFile, File, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse
+import asyncio
+import functools
+import json
+import logging
+import queue
 import tempfile
 import os
-import json
+import shutil
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 # Import our existing pipeline components
 from src.utils.pdf_reader import PDFReader
@@ -19,7 +26,13 @@ from src.agents.medicine_agent import MedicineExtractionAgent
 from src.agents.optimized_alternative_agent import OptimizedAlternativeSuggestionAgent
 
 # Import the new fuzzy search module (safe addition)
-from src.utils.fuzzy_search import FuzzyMedicineSearch, search_medicine_fuzzy
+from src.utils.fuzzy_search import search_medicine_fuzzy, shared_fuzzy_search
+
+logger = logging.getLogger(__name__)
+
+# Level for the app's own loggers; progress is logged at INFO, so deployments
+# keep the default WARNING and only hear about problems
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
 
 app = FastAPI(title="Medicine Alternative API", version="1.0.0")
 
@@ -37,37 +50,130 @@ frontend_dist = Path("generic-saver-bot/dist")
 if frontend_dist.exists():
     app.mount("/static", StaticFiles(directory=str(frontend_dist)), name="static")
 
-def process_prescription_file(file_path: str) -> dict:
+# Stateless, so one reader serves every request
+pdf_reader = PDFReader()
+
+# Prescriptions processed at once; each holds worker threads and LLM calls,
+# so later uploads wait here instead of crowding the shared thread pool
+MAX_CONCURRENT_PRESCRIPTIONS = 8
+prescription_slots = asyncio.Semaphore(MAX_CONCURRENT_PRESCRIPTIONS)
+
+class PrescriptionSlotResponse(StreamingResponse):
+    """
+    StreamingResponse that owns a prescription slot.
+    
+    The alternatives are produced while the body streams, so the slot taken
+    for extraction is released only once the stream has finished, failed or
+    been abandoned by the client.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            prescription_slots.release()
+
+# Uploads are copied to disk in chunks of this size, so large scans are never
+# held in memory whole
+UPLOAD_COPY_CHUNK_SIZE = 64 * 1024
+
+@functools.lru_cache(maxsize=1)
+def get_prescription_agents() -> Tuple[MedicineExtractionAgent, OptimizedAlternativeSuggestionAgent]:
+    """
+    Return the agents shared by every request, creating them on first use.
+    
+    Requests only use the agents' async extraction and per-call analysis,
+    which keep no per-request state on the instances.
+    
+    Returns:
+        Tuple[MedicineExtractionAgent, OptimizedAlternativeSuggestionAgent]:
+            Extraction and alternative suggestion agents
+    """
+    return MedicineExtractionAgent(), OptimizedAlternativeSuggestionAgent()
+
+_log_listener: Optional[QueueListener] = None
+
+@app.on_event("startup")
+async def start_log_listener():
+    """
+    Route the app's log records through a queue to a listener thread.
+    
+    Request handlers only enqueue records; the listener does the blocking
+    stderr writes, so logging never stalls the event loop.
+    """
+    global _log_listener
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    
+    app_logger = logging.getLogger("src")
+    app_logger.setLevel(LOG_LEVEL)
+    app_logger.addHandler(QueueHandler(log_queue))
+    app_logger.propagate = False
+    
+    _log_listener = QueueListener(log_queue, stream_handler)
+    _log_listener.start()
+
+@app.on_event("shutdown")
+async def stop_log_listener():
+    """Flush the queued log records before the process exits."""
+    if _log_listener is not None:
+        _log_listener.stop()
+
+@app.on_event("startup")
+async def create_prescription_agents():
+    """Create the shared agents before the first request arrives."""
+    try:
+        await asyncio.to_thread(get_prescription_agents)
+    except Exception as e:
+        # Requests retry the creation and report the error themselves
+        logger.warning("⚠️ Could not create agents at startup: %s", e)
+
+async def extract_prescription_medicines(file_path: str) -> Tuple[List[Dict], OptimizedAlternativeSuggestionAgent]:
+    """
+    Read a prescription file and extract its medicines.
+    
+    The alternative agent's databases are opened while the extraction LLM
+    call is in flight.
+    
+    Args:
+        file_path (str): Path of the uploaded prescription
+    
+    Returns:
+        Tuple[List[Dict], OptimizedAlternativeSuggestionAgent]: Extracted
+            medicines, and the alternative agent with its databases ready
+    """
+    logger.info("🔍 Processing file: %s", file_path)
+    
+    # Step 1: Extract text from PDF
+    text_content = await asyncio.to_thread(pdf_reader.extract_text, file_path)
+    
+    if not text_content.strip():
+        raise Exception("No text content found in PDF")
+    
+    logger.info("✅ Text extracted: %d characters", len(text_content))
+    
+    # Step 2: Extract medicines using AI agent, preparing the alternative
+    # agent's databases at the same time
+    extraction_agent, alternative_agent = get_prescription_agents()
+    # Agents exchange Python objects here, skipping JSON round trips
+    medicines_data, _ = await asyncio.gather(
+        extraction_agent.extract_medicines_obj_async(text_content),
+        asyncio.to_thread(alternative_agent.prepare_databases)
+    )
+    medicines = medicines_data.get("medicines", [])
+    logger.info("✅ Found %d medicines in extraction result", len(medicines))
+    return medicines, alternative_agent
+
+async def process_prescription_file(file_path: str) -> dict:
     """
     Process prescription file and return alternatives.
     Converts main_pipeline.py logic to function-based approach.
+    
+    Blocking steps run in worker threads.
     """
     try:
-        print(f"🔍 Processing file: {file_path}")
-        
-        # Step 1: Extract text from PDF
-        pdf_reader = PDFReader()
-        text_content = pdf_reader.extract_text(file_path)
-        
-        if not text_content.strip():
-            raise Exception("No text content found in PDF")
-        
-        print(f"✅ Text extracted: {len(text_content)} characters")
-        
-        # Step 2: Extract medicines using AI agent
-        extraction_agent = MedicineExtractionAgent()
-        medicines_json = extraction_agent.extract_medicines(text_content)
-        
-        # Parse the JSON result
-        try:
-            print(f"🔍 Parsing medicines JSON: {medicines_json[:200]}...")
-            medicines_data = json.loads(medicines_json)
-            medicines = medicines_data.get("medicines", [])
-            print(f"✅ Found {len(medicines)} medicines in extraction result")
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON decode error: {e}")
-            print(f"Raw medicines_json: {medicines_json}")
-            medicines = []
+        medicines, alternative_agent = await extract_prescription_medicines(file_path)
         
         if not medicines:
             return {
@@ -79,69 +185,70 @@ def process_prescription_file(file_path: str) -> dict:
                 }
             }
         
-        print(f"✅ Found {len(medicines)} medicines")
-        
         # Step 3: Check if database exists
         if not os.path.exists("data/medicines.db"):
             raise Exception("Medicine database not found. Please create it first.")
         
         # Step 4: Find alternatives using Enhanced AI agent with multi-database intelligence
-        alternative_agent = OptimizedAlternativeSuggestionAgent()
-        input_json = json.dumps({"medicines": medicines})
-        alternatives_result = alternative_agent.suggest_alternatives(input_json)
-        
-        # Parse the alternatives result
-        try:
-            print(f"🔍 Parsing alternatives JSON: {alternatives_result[:200]}...")
-            alternatives_data = json.loads(alternatives_result)
-            print(f"✅ Alternatives data parsed successfully")
-        except json.JSONDecodeError as e:
-            print(f"❌ Alternatives JSON decode error: {e}")
-            print(f"Raw alternatives_result: {alternatives_result}")
-            raise Exception(f"Failed to parse alternatives result: {e}")
+        alternatives_data = await asyncio.to_thread(
+            alternative_agent.suggest_alternatives_obj, {"medicines": medicines}
+        )
         
         if "error" in alternatives_data:
             raise Exception(f"Alternative suggestion error: {alternatives_data['error']}")
         
-        print(f"✅ Processing completed successfully")
+        logger.info("✅ Processing completed successfully")
         return alternatives_data
         
     except Exception as e:
-        print(f"❌ Error processing prescription: {e}")
+        logger.error("❌ Error processing prescription: %s", e)
         raise e
 
+async def save_prescription_upload(prescription: UploadFile) -> str:
+    """
+    Validate an uploaded prescription and save it to a temporary file.
+    
+    Args:
+        prescription (UploadFile): Uploaded prescription
+    
+    Returns:
+        str: Path of the temporary file; the caller deletes it
+    """
+    # Validate file type
+    if prescription.content_type not in ["application/pdf", "image/jpeg", "image/png", "image/jpg"]:
+        logger.warning("❌ Invalid file type: %s", prescription.content_type)
+        raise HTTPException(
+            status_code=400, 
+            detail="Invalid file type. Please upload PDF, JPEG, or PNG files only."
+        )
+    
+    # Create temporary file
+    tmp_file_path = await asyncio.to_thread(_copy_upload_to_tempfile, prescription.file)
+    
+    logger.debug("💾 Temporary file created: %s", tmp_file_path)
+    return tmp_file_path
+
+def _copy_upload_to_tempfile(upload_file) -> str:
+    """Copy an upload to a temporary file in fixed-size chunks; returns its path."""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+        shutil.copyfileobj(upload_file, tmp_file, UPLOAD_COPY_CHUNK_SIZE)
+        return tmp_file.name
+
 @app.post("/api/process-prescription")
 async def process_prescription(prescription: UploadFile = File(...)):
     """
     Process uploaded prescription file and return medicine alternatives.
     """
-    print(f"🔍 Received file upload: {prescription.filename}")
-    print(f"📄 Content type: {prescription.content_type}")
-    print(f"📏 File size: {prescription.size}")
+    logger.info("🔍 Received file upload: %s (%s, %s bytes)",
+                prescription.filename, prescription.content_type, prescription.size)
     
     try:
-        # Validate file type
-        if prescription.content_type not in ["application/pdf", "image/jpeg", "image/png", "image/jpg"]:
-            print(f"❌ Invalid file type: {prescription.content_type}")
-            raise HTTPException(
-                status_code=400, 
-                detail="Invalid file type. Please upload PDF, JPEG, or PNG files only."
-            )
-        
-        # Create temporary file
-        print(f"📁 Creating temporary file...")
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
-            content = await prescription.read()
-            tmp_file.write(content)
-            tmp_file_path = tmp_file.name
-        
-        print(f"💾 Temporary file created: {tmp_file_path}")
+        tmp_file_path = await save_prescription_upload(prescription)
         
         try:
             # Process the file
-            print(f"🔄 Starting file processing...")
-            result = process_prescription_file(tmp_file_path)
-            print(f"✅ Processing completed, returning result")
+            async with prescription_slots:
+                result = await process_prescription_file(tmp_file_path)
             return result
             
         finally:
@@ -150,14 +257,56 @@ async def process_prescription(prescription: UploadFile = File(...)):
                 os.unlink(tmp_file_path)
                 
     except HTTPException as e:
-        print(f"❌ HTTP Exception: {e.detail}")
+        logger.warning("❌ HTTP Exception: %s", e.detail)
         raise
     except Exception as e:
-        print(f"❌ Unexpected error in API endpoint: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Unexpected error in API endpoint: %s", e)
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
+@app.post("/api/process-prescription/stream")
+async def process_prescription_stream(prescription: UploadFile = File(...)):
+    """
+    Process uploaded prescription file and stream the alternatives as NDJSON.
+    
+    Each line is one JSON object: {"medicines": [...]} once extraction is
+    done, {"medicine_alternative": {...}} for each medicine as soon as the
+    model has written it, and finally {"result": {...}} with the same
+    analysis /api/process-prescription returns, or {"error": ...}.
+    """
+    logger.info("🔍 Received file upload for streaming: %s", prescription.filename)
+    
+    try:
+        tmp_file_path = await save_prescription_upload(prescription)
+        try:
+            # Held through the stream; PrescriptionSlotResponse releases it
+            await prescription_slots.acquire()
+            try:
+                medicines, alternative_agent = await extract_prescription_medicines(tmp_file_path)
+                if medicines and not os.path.exists("data/medicines.db"):
+                    raise Exception("Medicine database not found. Please create it first.")
+            except BaseException:
+                prescription_slots.release()
+                raise
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.unlink(tmp_file_path)
+                
+    except HTTPException as e:
+        logger.warning("❌ HTTP Exception: %s", e.detail)
+        raise
+    except Exception as e:
+        logger.error("❌ Unexpected error in API endpoint: %s", e)
+        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+    
+    def ndjson_lines():
+        yield json.dumps({"medicines": medicines}) + "\n"
+        if medicines:
+            # Starlette iterates this generator in a worker thread
+            for item in alternative_agent.stream_alternatives({"medicines": medicines}):
+                yield json.dumps(item) + "\n"
+    
+    return PrescriptionSlotResponse(ndjson_lines(), media_type="application/x-ndjson")
+
 @app.get("/api/health")
 async def health_check():
     """Health check endpoint."""
@@ -166,7 +315,7 @@ async def health_check():
 @app.post("/api/test-upload")
 async def test_upload(file: UploadFile = File(...)):
     """Test file upload endpoint."""
-    print(f"🧪 Test upload received: {file.filename}, {file.content_type}, {file.size}")
+    logger.info("🧪 Test upload received: %s, %s, %s", file.filename, file.content_type, file.size)
     return {
         "message": "File received successfully",
         "filename": file.filename,
@@ -175,31 +324,47 @@ async def test_upload(file: UploadFile = File(...)):
     }
 
 # Serve frontend
+_index_html: Optional[bytes] = None
+
+def _frontend_index() -> Optional[bytes]:
+    """Return the built index.html, read once; None while the frontend is not built."""
+    global _index_html
+    if _index_html is None:
+        index_file = frontend_dist / "index.html"
+        if index_file.is_file():
+            _index_html = index_file.read_bytes()
+    return _index_html
+
+def _index_response() -> Optional[Response]:
+    """Serve index.html from memory; browsers revalidate it, since each build replaces it."""
+    index_html = _frontend_index()
+    if index_html is None:
+        return None
+    return Response(index_html, media_type="text/html", headers={"Cache-Control": "no-cache"})
+
 @app.get("/")
 async def serve_frontend():
     """Serve the frontend application."""
-    frontend_dist = Path("generic-saver-bot/dist")
-    if frontend_dist.exists():
-        index_file = frontend_dist / "index.html"
-        if index_file.exists():
-            return FileResponse(str(index_file))
+    index = _index_response()
+    if index is not None:
+        return index
     
     return {"message": "Medicine Alternative API", "frontend": "not built yet"}
 
 @app.get("/{path:path}")
 async def serve_frontend_routes(path: str):
     """Serve frontend routes for SPA."""
-    frontend_dist = Path("generic-saver-bot/dist")
-    if frontend_dist.exists():
-        # Try to serve the specific file
-        file_path = frontend_dist / path
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(str(file_path))
-        
-        # Fallback to index.html for SPA routing
-        index_file = frontend_dist / "index.html"
-        if index_file.exists():
-            return FileResponse(str(index_file))
+    # Try to serve the specific file
+    file_path = frontend_dist / path
+    if path and file_path.is_file():
+        # Vite puts content-hashed bundles under assets/, so they never change
+        headers = {"Cache-Control": "public, max-age=31536000, immutable"} if path.startswith("assets/") else None
+        return FileResponse(str(file_path), headers=headers)
+    
+    # Fallback to index.html for SPA routing
+    index = _index_response()
+    if index is not None:
+        return index
     
     raise HTTPException(status_code=404, detail="File not found")
 
@@ -207,6 +372,11 @@ async def serve_frontend_routes(path: str):
 # NEW FUZZY SEARCH ENDPOINTS (Safe additions - don't affect existing functionality)
 # ============================================================================
 
+def _shared_search(method: str, *args):
+    """Call a FuzzyMedicineSearch method on the process-wide searcher."""
+    with shared_fuzzy_search() as searcher:
+        return getattr(searcher, method)(*args)
+
 @app.get("/api/search/fuzzy/{medicine_name}")
 async def search_medicine_fuzzy_endpoint(medicine_name: str, limit: int = 5):
     """
@@ -221,8 +391,9 @@ async def search_medicine_fuzzy_endpoint(medicine_name: str, limit: int = 5):
         Dict: Search results with similarity scores and suggestions
     """
     try:
-        # Use the new fuzzy search functionality
-        results = search_medicine_fuzzy(medicine_name, limit)
+        # Use the new fuzzy search functionality; scoring runs in a worker
+        # thread so other requests are served meanwhile
+        results = await asyncio.to_thread(search_medicine_fuzzy, medicine_name, limit)
         
         return {
             "success": True,
@@ -232,7 +403,7 @@ async def search_medicine_fuzzy_endpoint(medicine_name: str, limit: int = 5):
         }
         
     except Exception as e:
-        print(f"❌ Error in fuzzy search: {e}")
+        logger.error("❌ Error in fuzzy search: %s", e)
         return {
             "success": False,
             "error": str(e),
@@ -262,8 +433,7 @@ async def get_medicine_suggestions(partial_name: str, limit: int = 10):
                 "message": "Query too short for suggestions"
             }
         
-        searcher = FuzzyMedicineSearch()
-        suggestions = searcher.get_suggestions(partial_name, limit)
+        suggestions = await asyncio.to_thread(_shared_search, "get_suggestions", partial_name, limit)
         
         return {
             "success": True,
@@ -273,7 +443,7 @@ async def get_medicine_suggestions(partial_name: str, limit: int = 10):
         }
         
     except Exception as e:
-        print(f"❌ Error getting suggestions: {e}")
+        logger.error("❌ Error getting suggestions: %s", e)
         return {
             "success": False,
             "error": str(e),
@@ -295,8 +465,7 @@ async def search_medicine_enhanced(medicine_name: str, limit: int = 5):
         Dict: Enhanced search results with confidence levels
     """
     try:
-        searcher = FuzzyMedicineSearch()
-        results = searcher.search_with_suggestions(medicine_name, limit)
+        results = await asyncio.to_thread(_shared_search, "search_with_suggestions", medicine_name, limit)
         
         return {
             "success": True,
@@ -306,7 +475,7 @@ async def search_medicine_enhanced(medicine_name: str, limit: int = 5):
         }
         
     except Exception as e:
-        print(f"❌ Error in enhanced search: {e}")
+        logger.error("❌ Error in enhanced search: %s", e)
         return {
             "success": False,
             "error": str(e),
@@ -5,27 +5,404 @@ Creates and manages medical conditions linked to medicines for treatment matchin
 
 import sqlite3
 import json
+import threading
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 
 
+# Medical conditions data:
+# (condition_name, category, description, symptoms, prevalence, severity_level)
+CONDITIONS_DATA = (
+    # Cardiovascular conditions
+    (
+        "Hypertension", "Cardiovascular",
+        "High blood pressure, a common cardiovascular condition",
+        "Often asymptomatic, headaches, dizziness, vision problems",
+        "Very common - affects 30-40% of adults",
+        "moderate"
+    ),
+    (
+        "Angina", "Cardiovascular",
+        "Chest pain due to reduced blood flow to the heart muscle",
+        "Chest pain, shortness of breath, fatigue, nausea",
+        "Common in older adults",
+        "moderate"
+    ),
+    (
+        "Atrial Fibrillation", "Cardiovascular",
+        "Irregular heart rhythm increasing stroke risk",
+        "Palpitations, shortness of breath, fatigue, chest pain",
+        "Common, especially in elderly",
+        "severe"
+    ),
+    (
+        "Heart Failure", "Cardiovascular",
+        "Heart cannot pump blood effectively",
+        "Shortness of breath, fatigue, leg swelling, rapid heartbeat",
+        "Common in elderly",
+        "severe"
+    ),
+    
+    # Infectious diseases
+    (
+        "Bacterial Pneumonia", "Infectious",
+        "Bacterial infection of the lungs",
+        "Cough, fever, chest pain, difficulty breathing, fatigue",
+        "Common respiratory infection",
+        "moderate"
+    ),
+    (
+        "Urinary Tract Infection", "Infectious",
+        "Bacterial infection of the urinary system",
+        "Burning urination, frequent urination, pelvic pain, fever",
+        "Very common, especially in women",
+        "mild"
+    ),
+    (
+        "Skin and Soft Tissue Infection", "Infectious",
+        "Bacterial infection of skin and underlying tissues",
+        "Redness, swelling, warmth, pain, pus formation",
+        "Common",
+        "mild"
+    ),
+    (
+        "Respiratory Tract Infection", "Infectious",
+        "Bacterial infection of respiratory system",
+        "Cough, sore throat, fever, congestion, fatigue",
+        "Very common",
+        "mild"
+    ),
+    
+    # Neurological conditions
+    (
+        "Anxiety Disorder", "Neurological",
+        "Excessive worry and fear affecting daily functioning",
+        "Excessive worry, restlessness, fatigue, difficulty concentrating",
+        "Very common - affects 18% of adults annually",
+        "moderate"
+    ),
+    (
+        "Depression", "Neurological",
+        "Persistent sadness and loss of interest",
+        "Persistent sadness, loss of interest, fatigue, sleep changes",
+        "Common - affects 8% of adults annually",
+        "moderate"
+    ),
+    (
+        "Bipolar Disorder", "Neurological",
+        "Mood disorder with alternating manic and depressive episodes",
+        "Mood swings, manic episodes, depressive episodes, sleep changes",
+        "Less common - affects 2-3% of adults",
+        "severe"
+    ),
+    (
+        "Schizophrenia", "Neurological",
+        "Chronic mental disorder affecting perception and behavior",
+        "Hallucinations, delusions, disorganized thinking, social withdrawal",
+        "Rare - affects 1% of population",
+        "severe"
+    ),
+    
+    # Metabolic conditions
+    (
+        "Type 2 Diabetes", "Metabolic",
+        "Insulin resistance leading to high blood sugar",
+        "Increased thirst, frequent urination, fatigue, blurred vision",
+        "Very common - affects 10% of adults",
+        "moderate"
+    ),
+    (
+        "Hyperlipidemia", "Metabolic",
+        "Elevated cholesterol and triglyceride levels",
+        "Usually asymptomatic until complications develop",
+        "Very common - affects 35% of adults",
+        "mild"
+    ),
+    
+    # Pain and inflammation
+    (
+        "Osteoarthritis", "Musculoskeletal",
+        "Degenerative joint disease causing pain and stiffness",
+        "Joint pain, stiffness, reduced range of motion, swelling",
+        "Very common in older adults",
+        "moderate"
+    ),
+    (
+        "Rheumatoid Arthritis", "Autoimmune",
+        "Autoimmune inflammatory arthritis",
+        "Joint pain, swelling, morning stiffness, fatigue",
+        "Common - affects 1% of adults",
+        "moderate"
+    ),
+    (
+        "Acute Pain", "Pain",
+        "Short-term pain from injury or medical procedures",
+        "Localized pain, inflammation, reduced function",
+        "Universal experience",
+        "mild"
+    ),
+    (
+        "Migraine", "Neurological",
+        "Severe headaches often with nausea and light sensitivity",
+        "Severe headache, nausea, vomiting, light sensitivity",
+        "Common - affects 15% of adults",
+        "moderate"
+    ),
+    
+    # Respiratory conditions
+    (
+        "Asthma", "Respiratory",
+        "Chronic inflammatory airway disease",
+        "Wheezing, cough, shortness of breath, chest tightness",
+        "Common - affects 8% of adults",
+        "moderate"
+    ),
+    (
+        "COPD", "Respiratory",
+        "Chronic obstructive pulmonary disease",
+        "Chronic cough, shortness of breath, excessive sputum",
+        "Common in smokers",
+        "severe"
+    ),
+    
+    # Allergic conditions
+    (
+        "Allergic Rhinitis", "Allergic",
+        "Seasonal or perennial nasal allergies",
+        "Sneezing, runny nose, itchy eyes, nasal congestion",
+        "Very common - affects 25% of adults",
+        "mild"
+    ),
+    (
+        "Urticaria", "Allergic",
+        "Hives or raised, itchy skin welts",
+        "Raised, itchy, red welts on skin",
+        "Common",
+        "mild"
+    ),
+    
+    # Gastrointestinal conditions
+    (
+        "GERD", "Gastrointestinal",
+        "Gastroesophageal reflux disease",
+        "Heartburn, acid regurgitation, chest pain, difficulty swallowing",
+        "Very common - affects 20% of adults",
+        "mild"
+    ),
+    (
+        "Constipation", "Gastrointestinal",
+        "Difficulty with bowel movements",
+        "Infrequent bowel movements, hard stools, straining",
+        "Very common",
+        "mild"
+    ),
+)
+
+# Treatment relationships data:
+# (condition_name, medicine_name, effectiveness_rating, dosage_recommendations,
+#  treatment_line, evidence_level)
+TREATMENTS_DATA = (
+    # Hypertension treatments
+    ("Hypertension", "Atenolol", 85, "25-100mg daily", "first-line", "high"),
+    ("Hypertension", "Amlodipine", 88, "2.5-10mg daily", "first-line", "high"),
+    ("Hypertension", "Candesartan", 87, "4-32mg daily", "first-line", "high"),
+    
+    # Angina treatments
+    ("Angina", "Atenolol", 82, "50-100mg daily", "first-line", "high"),
+    ("Angina", "Amlodipine", 80, "5-10mg daily", "first-line", "high"),
+    ("Angina", "Aspirin", 75, "75-100mg daily", "first-line", "high"),
+    
+    # Atrial Fibrillation treatments
+    ("Atrial Fibrillation", "Apixaban", 90, "5mg twice daily", "first-line", "high"),
+    ("Atrial Fibrillation", "Atenolol", 70, "25-100mg daily", "second-line", "moderate"),
+    
+    # Heart Failure treatments
+    ("Heart Failure", "Atenolol", 78, "6.25-25mg twice daily", "first-line", "high"),
+    ("Heart Failure", "Candesartan", 82, "4-32mg daily", "first-line", "high"),
+    ("Heart Failure", "Bumetanide", 85, "0.5-2mg daily", "first-line", "high"),
+    
+    # Bacterial Pneumonia treatments
+    ("Bacterial Pneumonia", "Amoxicillin", 85, "500mg three times daily", "first-line", "high"),
+    ("Bacterial Pneumonia", "Azithromycin", 82, "500mg daily for 3 days", "first-line", "high"),
+    ("Bacterial Pneumonia", "Cephalexin", 80, "500mg four times daily", "second-line", "high"),
+    ("Bacterial Pneumonia", "Ciprofloxacin", 88, "500mg twice daily", "second-line", "high"),
+    
+    # UTI treatments
+    ("Urinary Tract Infection", "Amoxicillin", 75, "500mg three times daily", "second-line", "moderate"),
+    ("Urinary Tract Infection", "Ciprofloxacin", 92, "250mg twice daily", "first-line", "high"),
+    ("Urinary Tract Infection", "Cephalexin", 85, "500mg four times daily", "first-line", "high"),
+    
+    # Skin infections
+    ("Skin and Soft Tissue Infection", "Amoxicillin", 80, "500mg three times daily", "first-line", "high"),
+    ("Skin and Soft Tissue Infection", "Cephalexin", 88, "500mg four times daily", "first-line", "high"),
+    ("Skin and Soft Tissue Infection", "Azithromycin", 78, "500mg daily", "alternative", "moderate"),
+    
+    # Respiratory infections
+    ("Respiratory Tract Infection", "Amoxicillin", 82, "500mg three times daily", "first-line", "high"),
+    ("Respiratory Tract Infection", "Azithromycin", 85, "500mg daily for 3 days", "first-line", "high"),
+    ("Respiratory Tract Infection", "Cephalexin", 78, "500mg four times daily", "second-line", "moderate"),
+    
+    # Anxiety treatments
+    ("Anxiety Disorder", "Alprazolam", 85, "0.25-0.5mg three times daily", "second-line", "high"),
+    ("Anxiety Disorder", "Atenolol", 65, "25-50mg daily", "alternative", "moderate"),
+    
+    # Depression treatments
+    ("Depression", "Bupropion", 75, "150mg twice daily", "first-line", "high"),
+    
+    # Bipolar disorder treatments
+    ("Bipolar Disorder", "Aripiprazole", 78, "10-30mg daily", "first-line", "high"),
+    ("Bipolar Disorder", "Asenapine", 75, "5-10mg twice daily", "second-line", "moderate"),
+    ("Bipolar Disorder", "Cariprazine", 73, "1.5-6mg daily", "second-line", "moderate"),
+    
+    # Schizophrenia treatments
+    ("Schizophrenia", "Aripiprazole", 82, "10-30mg daily", "first-line", "high"),
+    ("Schizophrenia", "Asenapine", 78, "5-10mg twice daily", "first-line", "high"),
+    ("Schizophrenia", "Cariprazine", 80, "1.5-6mg daily", "first-line", "high"),
+    
+    # Type 2 Diabetes treatments - Note: No direct medicines in our DB for diabetes
+    # {"condition": "Type 2 Diabetes", "medicine": "Metformin", "effectiveness": 85, "dosage": "500-1000mg twice daily", "line": "first-line", "evidence": "high"},
+    
+    # Hyperlipidemia treatments
+    ("Hyperlipidemia", "Atorvastatin", 88, "10-80mg daily", "first-line", "high"),
+    
+    # Pain and inflammation
+    ("Osteoarthritis", "Aspirin", 70, "325-650mg four times daily", "first-line", "high"),
+    ("Rheumatoid Arthritis", "Aspirin", 65, "325-975mg four times daily", "second-line", "moderate"),
+    ("Acute Pain", "Aspirin", 78, "325-650mg every 4-6 hours", "first-line", "high"),
+    ("Migraine", "Aspirin", 72, "900-1000mg at onset", "first-line", "high"),
+    
+    # Respiratory conditions
+    ("Asthma", "Budesonide", 85, "200-800mcg twice daily", "first-line", "high"),
+    ("COPD", "Budesonide", 75, "400-800mcg twice daily", "first-line", "high"),
+    
+    # Allergic conditions
+    ("Allergic Rhinitis", "Cetirizine", 88, "10mg daily", "first-line", "high"),
+    ("Allergic Rhinitis", "Bilastine", 85, "20mg daily", "first-line", "high"),
+    ("Urticaria", "Cetirizine", 90, "10mg daily", "first-line", "high"),
+    ("Urticaria", "Bilastine", 87, "20mg daily", "first-line", "high"),
+    
+    # Gastrointestinal conditions - Note: Limited medicines in our DB for GI conditions
+    ("Constipation", "Bisacodyl", 85, "5-15mg daily", "first-line", "high"),
+)
+
+
 class MedicalConditionsManager:
     """Manages medical conditions database for treatment recommendations."""
     
     def __init__(self, db_path: str = "data/conditions.db"):
         self.db_path = db_path
         self.conn = None
+        self._has_search_fts = False
+        # Every condition and treatment, loaded on the first lookup (see _treatment_graph)
+        self._graph: Optional[Dict[str, Dict]] = None
+        self._graph_lock = threading.Lock()
         
     def connect(self) -> bool:
-        """Connect to the database."""
+        """Connect to the database, reusing the connection if it is already open."""
+        if self.conn is not None:
+            return True
+        
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Agents run lookups on this connection from worker threads
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
+            self._configure()
+            if self._has_tables():
+                self._ensure_indexes()
+                self._ensure_search_fts()
             return True
         except Exception as e:
             print(f"Database connection error: {e}")
             return False
     
+    def _configure(self):
+        """Apply connection-wide PRAGMAs once per connection."""
+        try:
+            # WAL keeps lookups reading while populate_conditions writes, and
+            # NORMAL sync only fsyncs at checkpoints
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute("PRAGMA cache_size=-20000")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.execute("PRAGMA mmap_size=268435456")
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not configure database connection: {e}")
+    
+    def _has_tables(self) -> bool:
+        """Check whether create_tables has run on this database."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN ('conditions', 'condition_treatments')"
+        ).fetchone()[0] == 2
+    
+    def _ensure_indexes(self):
+        """Create the lookup indexes; also run on connect, so existing databases get new ones."""
+        try:
+            with self.conn:
+                # condition_name is UNIQUE, so SQLite already indexes it
+                self.conn.execute('DROP INDEX IF EXISTS idx_condition_name')
+                self.conn.execute('CREATE INDEX IF NOT EXISTS idx_condition_category ON conditions(category)')
+                # Serves get_medicines_for_condition's filter and ORDER BY in
+                # one index walk; it also covers plain condition_name lookups
+                self.conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_treatment_cond_eff
+                    ON condition_treatments(condition_name, effectiveness_rating DESC, treatment_line)
+                ''')
+                self.conn.execute('DROP INDEX IF EXISTS idx_treatment_condition')
+                # Partial index holding only the first-line rows get_first_line_treatments reads
+                self.conn.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_first_line
+                    ON condition_treatments(condition_name, effectiveness_rating DESC)
+                    WHERE treatment_line = 'first-line'
+                ''')
+                self.conn.execute('CREATE INDEX IF NOT EXISTS idx_treatment_medicine ON condition_treatments(medicine_name)')
+                self.conn.execute('CREATE INDEX IF NOT EXISTS idx_effectiveness ON condition_treatments(effectiveness_rating)')
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not create condition indexes: {e}")
+    
+    def _ensure_search_fts(self):
+        """
+        Create the trigram full-text index used by search_conditions.
+        
+        conditions_fts is an external-content FTS5 table over the searched
+        columns, kept in sync by triggers, so substring searches are answered
+        from the trigram index instead of scanning every row. Without FTS5 or
+        its trigram tokenizer (SQLite 3.34+) searches fall back to a LIKE scan.
+        """
+        if self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'conditions_fts'").fetchone():
+            self._has_search_fts = True
+            return
+        
+        try:
+            self.conn.executescript("""
+                BEGIN;
+                CREATE VIRTUAL TABLE conditions_fts USING fts5(
+                    condition_name, symptoms, description,
+                    content='conditions', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS conditions_fts_insert AFTER INSERT ON conditions BEGIN
+                    INSERT INTO conditions_fts(rowid, condition_name, symptoms, description)
+                    VALUES (new.id, new.condition_name, new.symptoms, new.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS conditions_fts_delete AFTER DELETE ON conditions BEGIN
+                    INSERT INTO conditions_fts(conditions_fts, rowid, condition_name, symptoms, description)
+                    VALUES ('delete', old.id, old.condition_name, old.symptoms, old.description);
+                END;
+                CREATE TRIGGER IF NOT EXISTS conditions_fts_update AFTER UPDATE ON conditions BEGIN
+                    INSERT INTO conditions_fts(conditions_fts, rowid, condition_name, symptoms, description)
+                    VALUES ('delete', old.id, old.condition_name, old.symptoms, old.description);
+                    INSERT INTO conditions_fts(rowid, condition_name, symptoms, description)
+                    VALUES (new.id, new.condition_name, new.symptoms, new.description);
+                END;
+                INSERT INTO conditions_fts(conditions_fts) VALUES ('rebuild');
+                COMMIT;
+            """)
+            self._has_search_fts = True
+        except sqlite3.Error as e:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            print(f"⚠️ Condition searches will scan the conditions table: {e}")
+            self._has_search_fts = False
+    
     def close(self):
         """Close database connection."""
         if self.conn:
@@ -68,405 +445,200 @@ class MedicalConditionsManager:
             )
         ''')
         
-        # Create indexes for efficient querying
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_condition_name ON conditions(condition_name)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_condition_category ON conditions(category)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_treatment_condition ON condition_treatments(condition_name)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_treatment_medicine ON condition_treatments(medicine_name)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_effectiveness ON condition_treatments(effectiveness_rating)')
-        
         self.conn.commit()
+        self._ensure_indexes()
+        self._ensure_search_fts()
         print("✅ Medical conditions tables created successfully")
     
     def populate_conditions(self):
         """Populate the database with medical conditions and treatment data."""
+        cursor = self.conn.cursor()
         
-        # Medical conditions data
-        conditions_data = [
-            # Cardiovascular conditions
-            {
-                "name": "Hypertension", "category": "Cardiovascular",
-                "description": "High blood pressure, a common cardiovascular condition",
-                "symptoms": "Often asymptomatic, headaches, dizziness, vision problems",
-                "prevalence": "Very common - affects 30-40% of adults",
-                "severity": "moderate"
-            },
-            {
-                "name": "Angina", "category": "Cardiovascular",
-                "description": "Chest pain due to reduced blood flow to the heart muscle",
-                "symptoms": "Chest pain, shortness of breath, fatigue, nausea",
-                "prevalence": "Common in older adults",
-                "severity": "moderate"
-            },
-            {
-                "name": "Atrial Fibrillation", "category": "Cardiovascular",
-                "description": "Irregular heart rhythm increasing stroke risk",
-                "symptoms": "Palpitations, shortness of breath, fatigue, chest pain",
-                "prevalence": "Common, especially in elderly",
-                "severity": "severe"
-            },
-            {
-                "name": "Heart Failure", "category": "Cardiovascular",
-                "description": "Heart cannot pump blood effectively",
-                "symptoms": "Shortness of breath, fatigue, leg swelling, rapid heartbeat",
-                "prevalence": "Common in elderly",
-                "severity": "severe"
-            },
-            
-            # Infectious diseases
-            {
-                "name": "Bacterial Pneumonia", "category": "Infectious",
-                "description": "Bacterial infection of the lungs",
-                "symptoms": "Cough, fever, chest pain, difficulty breathing, fatigue",
-                "prevalence": "Common respiratory infection",
-                "severity": "moderate"
-            },
-            {
-                "name": "Urinary Tract Infection", "category": "Infectious",
-                "description": "Bacterial infection of the urinary system",
-                "symptoms": "Burning urination, frequent urination, pelvic pain, fever",
-                "prevalence": "Very common, especially in women",
-                "severity": "mild"
-            },
-            {
-                "name": "Skin and Soft Tissue Infection", "category": "Infectious",
-                "description": "Bacterial infection of skin and underlying tissues",
-                "symptoms": "Redness, swelling, warmth, pain, pus formation",
-                "prevalence": "Common",
-                "severity": "mild"
-            },
-            {
-                "name": "Respiratory Tract Infection", "category": "Infectious",
-                "description": "Bacterial infection of respiratory system",
-                "symptoms": "Cough, sore throat, fever, congestion, fatigue",
-                "prevalence": "Very common",
-                "severity": "mild"
-            },
-            
-            # Neurological conditions
-            {
-                "name": "Anxiety Disorder", "category": "Neurological",
-                "description": "Excessive worry and fear affecting daily functioning",
-                "symptoms": "Excessive worry, restlessness, fatigue, difficulty concentrating",
-                "prevalence": "Very common - affects 18% of adults annually",
-                "severity": "moderate"
-            },
-            {
-                "name": "Depression", "category": "Neurological",
-                "description": "Persistent sadness and loss of interest",
-                "symptoms": "Persistent sadness, loss of interest, fatigue, sleep changes",
-                "prevalence": "Common - affects 8% of adults annually",
-                "severity": "moderate"
-            },
-            {
-                "name": "Bipolar Disorder", "category": "Neurological",
-                "description": "Mood disorder with alternating manic and depressive episodes",
-                "symptoms": "Mood swings, manic episodes, depressive episodes, sleep changes",
-                "prevalence": "Less common - affects 2-3% of adults",
-                "severity": "severe"
-            },
-            {
-                "name": "Schizophrenia", "category": "Neurological",
-                "description": "Chronic mental disorder affecting perception and behavior",
-                "symptoms": "Hallucinations, delusions, disorganized thinking, social withdrawal",
-                "prevalence": "Rare - affects 1% of population",
-                "severity": "severe"
-            },
-            
-            # Metabolic conditions
-            {
-                "name": "Type 2 Diabetes", "category": "Metabolic",
-                "description": "Insulin resistance leading to high blood sugar",
-                "symptoms": "Increased thirst, frequent urination, fatigue, blurred vision",
-                "prevalence": "Very common - affects 10% of adults",
-                "severity": "moderate"
-            },
-            {
-                "name": "Hyperlipidemia", "category": "Metabolic",
-                "description": "Elevated cholesterol and triglyceride levels",
-                "symptoms": "Usually asymptomatic until complications develop",
-                "prevalence": "Very common - affects 35% of adults",
-                "severity": "mild"
-            },
-            
-            # Pain and inflammation
-            {
-                "name": "Osteoarthritis", "category": "Musculoskeletal",
-                "description": "Degenerative joint disease causing pain and stiffness",
-                "symptoms": "Joint pain, stiffness, reduced range of motion, swelling",
-                "prevalence": "Very common in older adults",
-                "severity": "moderate"
-            },
-            {
-                "name": "Rheumatoid Arthritis", "category": "Autoimmune",
-                "description": "Autoimmune inflammatory arthritis",
-                "symptoms": "Joint pain, swelling, morning stiffness, fatigue",
-                "prevalence": "Common - affects 1% of adults",
-                "severity": "moderate"
-            },
-            {
-                "name": "Acute Pain", "category": "Pain",
-                "description": "Short-term pain from injury or medical procedures",
-                "symptoms": "Localized pain, inflammation, reduced function",
-                "prevalence": "Universal experience",
-                "severity": "mild"
-            },
-            {
-                "name": "Migraine", "category": "Neurological",
-                "description": "Severe headaches often with nausea and light sensitivity",
-                "symptoms": "Severe headache, nausea, vomiting, light sensitivity",
-                "prevalence": "Common - affects 15% of adults",
-                "severity": "moderate"
-            },
-            
-            # Respiratory conditions
-            {
-                "name": "Asthma", "category": "Respiratory",
-                "description": "Chronic inflammatory airway disease",
-                "symptoms": "Wheezing, cough, shortness of breath, chest tightness",
-                "prevalence": "Common - affects 8% of adults",
-                "severity": "moderate"
-            },
-            {
-                "name": "COPD", "category": "Respiratory",
-                "description": "Chronic obstructive pulmonary disease",
-                "symptoms": "Chronic cough, shortness of breath, excessive sputum",
-                "prevalence": "Common in smokers",
-                "severity": "severe"
-            },
-            
-            # Allergic conditions
-            {
-                "name": "Allergic Rhinitis", "category": "Allergic",
-                "description": "Seasonal or perennial nasal allergies",
-                "symptoms": "Sneezing, runny nose, itchy eyes, nasal congestion",
-                "prevalence": "Very common - affects 25% of adults",
-                "severity": "mild"
-            },
-            {
-                "name": "Urticaria", "category": "Allergic",
-                "description": "Hives or raised, itchy skin welts",
-                "symptoms": "Raised, itchy, red welts on skin",
-                "prevalence": "Common",
-                "severity": "mild"
-            },
-            
-            # Gastrointestinal conditions
-            {
-                "name": "GERD", "category": "Gastrointestinal",
-                "description": "Gastroesophageal reflux disease",
-                "symptoms": "Heartburn, acid regurgitation, chest pain, difficulty swallowing",
-                "prevalence": "Very common - affects 20% of adults",
-                "severity": "mild"
-            },
-            {
-                "name": "Constipation", "category": "Gastrointestinal",
-                "description": "Difficulty with bowel movements",
-                "symptoms": "Infrequent bowel movements, hard stools, straining",
-                "prevalence": "Very common",
-                "severity": "mild"
-            }
-        ]
+        condition_names = [condition[0] for condition in CONDITIONS_DATA]
+        treatment_keys = [treatment[:2] for treatment in TREATMENTS_DATA]
         
-        # Treatment relationships data
-        treatments_data = [
-            # Hypertension treatments
-            {"condition": "Hypertension", "medicine": "Atenolol", "effectiveness": 85, "dosage": "25-100mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Hypertension", "medicine": "Amlodipine", "effectiveness": 88, "dosage": "2.5-10mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Hypertension", "medicine": "Candesartan", "effectiveness": 87, "dosage": "4-32mg daily", "line": "first-line", "evidence": "high"},
-            
-            # Angina treatments
-            {"condition": "Angina", "medicine": "Atenolol", "effectiveness": 82, "dosage": "50-100mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Angina", "medicine": "Amlodipine", "effectiveness": 80, "dosage": "5-10mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Angina", "medicine": "Aspirin", "effectiveness": 75, "dosage": "75-100mg daily", "line": "first-line", "evidence": "high"},
-            
-            # Atrial Fibrillation treatments
-            {"condition": "Atrial Fibrillation", "medicine": "Apixaban", "effectiveness": 90, "dosage": "5mg twice daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Atrial Fibrillation", "medicine": "Atenolol", "effectiveness": 70, "dosage": "25-100mg daily", "line": "second-line", "evidence": "moderate"},
-            
-            # Heart Failure treatments
-            {"condition": "Heart Failure", "medicine": "Atenolol", "effectiveness": 78, "dosage": "6.25-25mg twice daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Heart Failure", "medicine": "Candesartan", "effectiveness": 82, "dosage": "4-32mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Heart Failure", "medicine": "Bumetanide", "effectiveness": 85, "dosage": "0.5-2mg daily", "line": "first-line", "evidence": "high"},
-            
-            # Bacterial Pneumonia treatments
-            {"condition": "Bacterial Pneumonia", "medicine": "Amoxicillin", "effectiveness": 85, "dosage": "500mg three times daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Bacterial Pneumonia", "medicine": "Azithromycin", "effectiveness": 82, "dosage": "500mg daily for 3 days", "line": "first-line", "evidence": "high"},
-            {"condition": "Bacterial Pneumonia", "medicine": "Cephalexin", "effectiveness": 80, "dosage": "500mg four times daily", "line": "second-line", "evidence": "high"},
-            {"condition": "Bacterial Pneumonia", "medicine": "Ciprofloxacin", "effectiveness": 88, "dosage": "500mg twice daily", "line": "second-line", "evidence": "high"},
-            
-            # UTI treatments
-            {"condition": "Urinary Tract Infection", "medicine": "Amoxicillin", "effectiveness": 75, "dosage": "500mg three times daily", "line": "second-line", "evidence": "moderate"},
-            {"condition": "Urinary Tract Infection", "medicine": "Ciprofloxacin", "effectiveness": 92, "dosage": "250mg twice daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Urinary Tract Infection", "medicine": "Cephalexin", "effectiveness": 85, "dosage": "500mg four times daily", "line": "first-line", "evidence": "high"},
-            
-            # Skin infections
-            {"condition": "Skin and Soft Tissue Infection", "medicine": "Amoxicillin", "effectiveness": 80, "dosage": "500mg three times daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Skin and Soft Tissue Infection", "medicine": "Cephalexin", "effectiveness": 88, "dosage": "500mg four times daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Skin and Soft Tissue Infection", "medicine": "Azithromycin", "effectiveness": 78, "dosage": "500mg daily", "line": "alternative", "evidence": "moderate"},
+        # One write transaction for the whole refresh: the lock is taken up
+        # front, the journal is synced once, and a failed insert rolls back
+        # to the previous data instead of leaving the tables half-filled
+        with self.conn:
+            cursor.execute('BEGIN IMMEDIATE')
             
-            # Respiratory infections
-            {"condition": "Respiratory Tract Infection", "medicine": "Amoxicillin", "effectiveness": 82, "dosage": "500mg three times daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Respiratory Tract Infection", "medicine": "Azithromycin", "effectiveness": 85, "dosage": "500mg daily for 3 days", "line": "first-line", "evidence": "high"},
-            {"condition": "Respiratory Tract Infection", "medicine": "Cephalexin", "effectiveness": 78, "dosage": "500mg four times daily", "line": "second-line", "evidence": "moderate"},
+            # Remove rows that are no longer part of the data set
+            cursor.execute(f'''
+                DELETE FROM condition_treatments
+                WHERE (condition_name, medicine_name) NOT IN (VALUES {', '.join(['(?, ?)'] * len(treatment_keys))})
+            ''', [value for key in treatment_keys for value in key])
+            cursor.execute(f'''
+                DELETE FROM conditions
+                WHERE condition_name NOT IN ({', '.join(['?'] * len(condition_names))})
+            ''', condition_names)
             
-            # Anxiety treatments
-            {"condition": "Anxiety Disorder", "medicine": "Alprazolam", "effectiveness": 85, "dosage": "0.25-0.5mg three times daily", "line": "second-line", "evidence": "high"},
-            {"condition": "Anxiety Disorder", "medicine": "Atenolol", "effectiveness": 65, "dosage": "25-50mg daily", "line": "alternative", "evidence": "moderate"},
-            
-            # Depression treatments
-            {"condition": "Depression", "medicine": "Bupropion", "effectiveness": 75, "dosage": "150mg twice daily", "line": "first-line", "evidence": "high"},
-            
-            # Bipolar disorder treatments
-            {"condition": "Bipolar Disorder", "medicine": "Aripiprazole", "effectiveness": 78, "dosage": "10-30mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Bipolar Disorder", "medicine": "Asenapine", "effectiveness": 75, "dosage": "5-10mg twice daily", "line": "second-line", "evidence": "moderate"},
-            {"condition": "Bipolar Disorder", "medicine": "Cariprazine", "effectiveness": 73, "dosage": "1.5-6mg daily", "line": "second-line", "evidence": "moderate"},
-            
-            # Schizophrenia treatments
-            {"condition": "Schizophrenia", "medicine": "Aripiprazole", "effectiveness": 82, "dosage": "10-30mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Schizophrenia", "medicine": "Asenapine", "effectiveness": 78, "dosage": "5-10mg twice daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Schizophrenia", "medicine": "Cariprazine", "effectiveness": 80, "dosage": "1.5-6mg daily", "line": "first-line", "evidence": "high"},
-            
-            # Type 2 Diabetes treatments - Note: No direct medicines in our DB for diabetes
-            # {"condition": "Type 2 Diabetes", "medicine": "Metformin", "effectiveness": 85, "dosage": "500-1000mg twice daily", "line": "first-line", "evidence": "high"},
-            
-            # Hyperlipidemia treatments
-            {"condition": "Hyperlipidemia", "medicine": "Atorvastatin", "effectiveness": 88, "dosage": "10-80mg daily", "line": "first-line", "evidence": "high"},
-            
-            # Pain and inflammation
-            {"condition": "Osteoarthritis", "medicine": "Aspirin", "effectiveness": 70, "dosage": "325-650mg four times daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Rheumatoid Arthritis", "medicine": "Aspirin", "effectiveness": 65, "dosage": "325-975mg four times daily", "line": "second-line", "evidence": "moderate"},
-            {"condition": "Acute Pain", "medicine": "Aspirin", "effectiveness": 78, "dosage": "325-650mg every 4-6 hours", "line": "first-line", "evidence": "high"},
-            {"condition": "Migraine", "medicine": "Aspirin", "effectiveness": 72, "dosage": "900-1000mg at onset", "line": "first-line", "evidence": "high"},
-            
-            # Respiratory conditions
-            {"condition": "Asthma", "medicine": "Budesonide", "effectiveness": 85, "dosage": "200-800mcg twice daily", "line": "first-line", "evidence": "high"},
-            {"condition": "COPD", "medicine": "Budesonide", "effectiveness": 75, "dosage": "400-800mcg twice daily", "line": "first-line", "evidence": "high"},
-            
-            # Allergic conditions
-            {"condition": "Allergic Rhinitis", "medicine": "Cetirizine", "effectiveness": 88, "dosage": "10mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Allergic Rhinitis", "medicine": "Bilastine", "effectiveness": 85, "dosage": "20mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Urticaria", "medicine": "Cetirizine", "effectiveness": 90, "dosage": "10mg daily", "line": "first-line", "evidence": "high"},
-            {"condition": "Urticaria", "medicine": "Bilastine", "effectiveness": 87, "dosage": "20mg daily", "line": "first-line", "evidence": "high"},
-            
-            # Gastrointestinal conditions - Note: Limited medicines in our DB for GI conditions
-            {"condition": "Constipation", "medicine": "Bisacodyl", "effectiveness": 85, "dosage": "5-15mg daily", "line": "first-line", "evidence": "high"},
-        ]
-        
-        cursor = self.conn.cursor()
-        
-        # Clear existing data
-        cursor.execute('DELETE FROM condition_treatments')
-        cursor.execute('DELETE FROM conditions')
-        
-        # Insert conditions
-        for condition in conditions_data:
-            cursor.execute('''
+            # Upsert conditions, one prepared statement for all rows; rows
+            # that already match are left untouched, so a repeat run writes nothing
+            cursor.executemany('''
                 INSERT INTO conditions 
                 (condition_name, category, description, symptoms, prevalence, severity_level)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                condition["name"], condition["category"], condition["description"],
-                condition["symptoms"], condition["prevalence"], condition["severity"]
-            ))
-        
-        # Insert treatments
-        for treatment in treatments_data:
-            cursor.execute('''
+                ON CONFLICT(condition_name) DO UPDATE SET
+                    category = excluded.category, description = excluded.description,
+                    symptoms = excluded.symptoms, prevalence = excluded.prevalence,
+                    severity_level = excluded.severity_level
+                WHERE (category, description, symptoms, prevalence, severity_level)
+                    IS NOT (excluded.category, excluded.description, excluded.symptoms,
+                            excluded.prevalence, excluded.severity_level)
+            ''', CONDITIONS_DATA)
+            
+            # Upsert treatments
+            cursor.executemany('''
                 INSERT INTO condition_treatments 
                 (condition_name, medicine_name, effectiveness_rating, dosage_recommendations, 
                  treatment_line, evidence_level)
                 VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                treatment["condition"], treatment["medicine"], treatment["effectiveness"],
-                treatment["dosage"], treatment["line"], treatment["evidence"]
-            ))
-        
-        self.conn.commit()
+                ON CONFLICT(condition_name, medicine_name) DO UPDATE SET
+                    effectiveness_rating = excluded.effectiveness_rating,
+                    dosage_recommendations = excluded.dosage_recommendations,
+                    treatment_line = excluded.treatment_line, evidence_level = excluded.evidence_level
+                WHERE (effectiveness_rating, dosage_recommendations, treatment_line, evidence_level)
+                    IS NOT (excluded.effectiveness_rating, excluded.dosage_recommendations,
+                            excluded.treatment_line, excluded.evidence_level)
+            ''', TREATMENTS_DATA)
         
         # Get counts
-        cursor.execute('SELECT COUNT(*) FROM conditions')
-        conditions_count = cursor.fetchone()[0]
-        cursor.execute('SELECT COUNT(*) FROM condition_treatments')
-        treatments_count = cursor.fetchone()[0]
+        cursor.execute('SELECT (SELECT COUNT(*) FROM conditions), (SELECT COUNT(*) FROM condition_treatments)')
+        conditions_count, treatments_count = cursor.fetchone()
         
         print(f"✅ Inserted {conditions_count} conditions and {treatments_count} treatments")
+        
+        # Lookups reload the new rows
+        self._graph = None
+    
+    def _fetch_dicts(self, query: str, params: Tuple = ()) -> List[Dict]:
+        """Run a query and return its rows as dicts, zipped from plain tuples."""
+        cursor = self.conn.cursor()
+        # Plain tuples skip the sqlite3.Row step and its by-name lookup of every column
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    
+    def _treatment_graph(self) -> Dict[str, Dict]:
+        """
+        Return every condition and treatment, indexed for the lookups.
+        
+        The tables hold a few dozen rows and only change in
+        populate_conditions, so they are read once and the lookups are
+        answered from dicts instead of SQLite.
+        
+        Returns:
+            Dict[str, Dict]: 'conditions' by name, and treatment lists by
+                condition ('by_condition') and by medicine ('by_medicine'),
+                each sorted by effectiveness_rating DESC, treatment_line
+        """
+        graph = self._graph
+        if graph is not None:
+            return graph
+        
+        with self._graph_lock:
+            if self._graph is None:
+                conditions = {
+                    row['condition_name']: row
+                    for row in self._fetch_dicts('SELECT * FROM conditions')
+                }
+                treatments = self._fetch_dicts('SELECT * FROM condition_treatments ORDER BY id')
+                # SQLite's ordering: NULL ratings last when descending, NULL lines first when ascending
+                treatments.sort(key=lambda t: (
+                    t['effectiveness_rating'] is None, -(t['effectiveness_rating'] or 0),
+                    t['treatment_line'] is not None, t['treatment_line'] or ''
+                ))
+                
+                by_condition, by_medicine = {}, {}
+                for treatment in treatments:
+                    by_condition.setdefault(treatment['condition_name'], []).append(treatment)
+                    by_medicine.setdefault(treatment['medicine_name'], []).append(treatment)
+                
+                self._graph = {
+                    'conditions': conditions,
+                    'by_condition': by_condition,
+                    'by_medicine': by_medicine
+                }
+            return self._graph
     
     def get_conditions_for_medicine(self, medicine_name: str) -> List[Dict]:
         """Get all conditions that can be treated with a specific medicine."""
         if not self.conn:
             return []
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT c.*, ct.effectiveness_rating, ct.dosage_recommendations, 
-                   ct.treatment_line, ct.evidence_level
-            FROM conditions c
-            JOIN condition_treatments ct ON c.condition_name = ct.condition_name
-            WHERE ct.medicine_name = ?
-            ORDER BY ct.effectiveness_rating DESC
-        ''', (medicine_name,))
-        
-        return [dict(row) for row in cursor.fetchall()]
+        graph = self._treatment_graph()
+        conditions = graph['conditions']
+        return [
+            {
+                **conditions[treatment['condition_name']],
+                'effectiveness_rating': treatment['effectiveness_rating'],
+                'dosage_recommendations': treatment['dosage_recommendations'],
+                'treatment_line': treatment['treatment_line'],
+                'evidence_level': treatment['evidence_level']
+            }
+            for treatment in graph['by_medicine'].get(medicine_name, [])
+            if treatment['condition_name'] in conditions
+        ]
     
     def get_medicines_for_condition(self, condition_name: str) -> List[Dict]:
         """Get all medicines that can treat a specific condition."""
         if not self.conn:
             return []
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT ct.*, c.category, c.severity_level
-            FROM condition_treatments ct
-            JOIN conditions c ON ct.condition_name = c.condition_name
-            WHERE ct.condition_name = ?
-            ORDER BY ct.effectiveness_rating DESC, ct.treatment_line
-        ''', (condition_name,))
+        graph = self._treatment_graph()
+        condition = graph['conditions'].get(condition_name)
+        if condition is None:
+            return []
         
-        return [dict(row) for row in cursor.fetchall()]
+        return [
+            {**treatment, 'category': condition['category'], 'severity_level': condition['severity_level']}
+            for treatment in graph['by_condition'].get(condition_name, [])
+        ]
     
     def search_conditions(self, search_term: str) -> List[Dict]:
         """Search for conditions by name or symptoms."""
         if not self.conn:
             return []
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
+        # A quoted trigram phrase matches the term anywhere in any indexed
+        # column, like the LIKE scan; the index needs at least 3 characters,
+        # and LIKE wildcards in the term keep their meaning only in the scan
+        if self._has_search_fts and len(search_term) >= 3 and not any(c in search_term for c in '%_'):
+            return self._fetch_dicts('''
+                SELECT * FROM conditions 
+                WHERE id IN (SELECT rowid FROM conditions_fts WHERE conditions_fts MATCH ?)
+                ORDER BY condition_name
+            ''', ('"' + search_term.replace('"', '""') + '"',))
+        
+        return self._fetch_dicts('''
             SELECT * FROM conditions 
-            WHERE condition_name LIKE ? OR symptoms LIKE ? OR description LIKE ?
+            WHERE condition_name LIKE ?1 OR symptoms LIKE ?1 OR description LIKE ?1
             ORDER BY condition_name
-        ''', (f'%{search_term}%', f'%{search_term}%', f'%{search_term}%'))
-        
-        return [dict(row) for row in cursor.fetchall()]
+        ''', (f'%{search_term}%',))
     
     def get_first_line_treatments(self, condition_name: str) -> List[Dict]:
         """Get first-line treatments for a condition."""
         if not self.conn:
             return []
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT * FROM condition_treatments 
-            WHERE condition_name = ? AND treatment_line = 'first-line'
-            ORDER BY effectiveness_rating DESC
-        ''', (condition_name,))
-        
-        return [dict(row) for row in cursor.fetchall()]
+        return [
+            dict(treatment)
+            for treatment in self._treatment_graph()['by_condition'].get(condition_name, [])
+            if treatment['treatment_line'] == 'first-line'
+        ]
     
     def get_high_effectiveness_treatments(self, condition_name: str, min_effectiveness: int = 80) -> List[Dict]:
         """Get highly effective treatments for a condition."""
         if not self.conn:
             return []
         
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            SELECT * FROM condition_treatments 
-            WHERE condition_name = ? AND effectiveness_rating >= ?
-            ORDER BY effectiveness_rating DESC
-        ''', (condition_name, min_effectiveness))
-        
-        return [dict(row) for row in cursor.fetchall()]
-
+        return [
+            dict(treatment)
+            for treatment in self._treatment_graph()['by_condition'].get(condition_name, [])
+            if treatment['effectiveness_rating'] is not None and treatment['effectiveness_rating'] >= min_effectiveness
+        ]
 
 def create_conditions_database():
     """Create and populate the medical conditions database."""
@@ -481,22 +653,29 @@ def create_conditions_database():
         print("\n📊 Database Statistics:")
         cursor = db.conn.cursor()
         
-        cursor.execute("SELECT COUNT(*) FROM conditions")
-        conditions_count = cursor.fetchone()[0]
-        print(f"  Total conditions: {conditions_count}")
-        
-        cursor.execute("SELECT COUNT(*) FROM condition_treatments")
-        treatments_count = cursor.fetchone()[0]
-        print(f"  Total treatments: {treatments_count}")
-        
-        cursor.execute("SELECT category, COUNT(*) FROM conditions GROUP BY category ORDER BY COUNT(*) DESC")
-        category_counts = cursor.fetchall()
+        # Every statistic in one query, each row tagged with the statistic it belongs to
+        cursor.execute("""
+            SELECT 'total', 'conditions', COUNT(*) FROM conditions
+            UNION ALL SELECT 'total', 'treatments', COUNT(*) FROM condition_treatments
+            UNION ALL SELECT 'category', category, COUNT(*) FROM conditions GROUP BY category
+            UNION ALL SELECT 'line', treatment_line, COUNT(*) FROM condition_treatments GROUP BY treatment_line
+        """)
+        stats = {'total': {}, 'category': [], 'line': []}
+        for kind, label, count in cursor.fetchall():
+            if kind == 'total':
+                stats['total'][label] = count
+            else:
+                stats[kind].append((label, count))
+        
+        print(f"  Total conditions: {stats['total']['conditions']}")
+        print(f"  Total treatments: {stats['total']['treatments']}")
+        
+        category_counts = sorted(stats['category'], key=lambda item: item[1], reverse=True)
         print("\n📋 Conditions by category:")
         for category, count in category_counts:
             print(f"  {category}: {count}")
         
-        cursor.execute("SELECT treatment_line, COUNT(*) FROM condition_treatments GROUP BY treatment_line")
-        line_counts = cursor.fetchall()
+        line_counts = stats['line']
         print("\n💊 Treatments by line:")
         for line, count in line_counts:
             print(f"  {line}: {count}")
@@ -4,9 +4,263 @@ Medicine Database Creator
 Creates a SQLite database with 500 medicines for cost-effective alternative suggestions.
 """
 
+import argparse
+import json
 import sqlite3
 import random
-from typing import List, Tuple
+from itertools import islice, repeat
+from typing import Iterable, Iterator, Tuple
+
+# Rows inserted per statement when populating the database
+INSERT_CHUNK_SIZE = 1000
+
+# Price/stock variants generated for each medicine
+VARIANTS_PER_MEDICINE = 5
+
+# Medicine classes with their common medicines:
+# (brand name, generic name, dosage form, strength, manufacturer)
+_MEDICINE_CLASSES = {
+    "Antibiotics": [
+        ("Amoxicillin", "Amoxicillin", "Capsule", "500mg", "Cipla"),
+        ("Azithromycin", "Azithromycin", "Tablet", "250mg", "Sun Pharma"),
+        ("Ciprofloxacin", "Ciprofloxacin", "Tablet", "500mg", "Dr. Reddy's"),
+        ("Doxycycline", "Doxycycline", "Capsule", "100mg", "Lupin"),
+        ("Cephalexin", "Cephalexin", "Capsule", "500mg", "Aurobindo"),
+        ("Metronidazole", "Metronidazole", "Tablet", "400mg", "Zydus"),
+        ("Clarithromycin", "Clarithromycin", "Tablet", "250mg", "Glenmark"),
+        ("Levofloxacin", "Levofloxacin", "Tablet", "500mg", "Torrent"),
+        ("Erythromycin", "Erythromycin", "Tablet", "250mg", "Alkem"),
+        ("Tetracycline", "Tetracycline", "Capsule", "250mg", "Mankind")
+    ],
+    "Pain Relievers": [
+        ("Paracetamol", "Acetaminophen", "Tablet", "500mg", "GSK"),
+        ("Ibuprofen", "Ibuprofen", "Tablet", "400mg", "Pfizer"),
+        ("Aspirin", "Acetylsalicylic Acid", "Tablet", "100mg", "Bayer"),
+        ("Diclofenac", "Diclofenac", "Tablet", "50mg", "Novartis"),
+        ("Naproxen", "Naproxen", "Tablet", "250mg", "Roche"),
+        ("Ketorolac", "Ketorolac", "Tablet", "10mg", "Abbott"),
+        ("Mefenamic Acid", "Mefenamic Acid", "Capsule", "250mg", "Sanofi"),
+        ("Tramadol", "Tramadol", "Tablet", "50mg", "Janssen"),
+        ("Codeine", "Codeine", "Tablet", "30mg", "Mallinckrodt"),
+        ("Morphine", "Morphine", "Tablet", "10mg", "Purdue")
+    ],
+    "Antihistamines": [
+        ("Cetirizine", "Cetirizine", "Tablet", "10mg", "UCB"),
+        ("Loratadine", "Loratadine", "Tablet", "10mg", "Merck"),
+        ("Fexofenadine", "Fexofenadine", "Tablet", "120mg", "Sanofi"),
+        ("Diphenhydramine", "Diphenhydramine", "Tablet", "25mg", "Johnson & Johnson"),
+        ("Chlorpheniramine", "Chlorpheniramine", "Tablet", "4mg", "GSK"),
+        ("Desloratadine", "Desloratadine", "Tablet", "5mg", "Merck"),
+        ("Levocetirizine", "Levocetirizine", "Tablet", "5mg", "UCB"),
+        ("Bilastine", "Bilastine", "Tablet", "20mg", "Menarini"),
+        ("Rupatadine", "Rupatadine", "Tablet", "10mg", "J. Uriach"),
+        ("Ebastine", "Ebastine", "Tablet", "10mg", "Almirall")
+    ],
+    "Antacids": [
+        ("Omeprazole", "Omeprazole", "Capsule", "20mg", "AstraZeneca"),
+        ("Pantoprazole", "Pantoprazole", "Tablet", "40mg", "Pfizer"),
+        ("Esomeprazole", "Esomeprazole", "Capsule", "20mg", "AstraZeneca"),
+        ("Lansoprazole", "Lansoprazole", "Capsule", "30mg", "Takeda"),
+        ("Rabeprazole", "Rabeprazole", "Tablet", "20mg", "Eisai"),
+        ("Ranitidine", "Ranitidine", "Tablet", "150mg", "GSK"),
+        ("Famotidine", "Famotidine", "Tablet", "20mg", "Merck"),
+        ("Cimetidine", "Cimetidine", "Tablet", "200mg", "GSK"),
+        ("Aluminum Hydroxide", "Aluminum Hydroxide", "Tablet", "500mg", "Bayer"),
+        ("Calcium Carbonate", "Calcium Carbonate", "Tablet", "500mg", "GSK")
+    ],
+    "Antihypertensives": [
+        ("Amlodipine", "Amlodipine", "Tablet", "5mg", "Pfizer"),
+        ("Lisinopril", "Lisinopril", "Tablet", "10mg", "Merck"),
+        ("Losartan", "Losartan", "Tablet", "50mg", "Merck"),
+        ("Metoprolol", "Metoprolol", "Tablet", "50mg", "AstraZeneca"),
+        ("Atenolol", "Atenolol", "Tablet", "50mg", "AstraZeneca"),
+        ("Valsartan", "Valsartan", "Tablet", "80mg", "Novartis"),
+        ("Irbesartan", "Irbesartan", "Tablet", "150mg", "Sanofi"),
+        ("Candesartan", "Candesartan", "Tablet", "8mg", "AstraZeneca"),
+        ("Telmisartan", "Telmisartan", "Tablet", "40mg", "Boehringer"),
+        ("Olmesartan", "Olmesartan", "Tablet", "20mg", "Daiichi Sankyo")
+    ],
+    "Antidiabetics": [
+        ("Metformin", "Metformin", "Tablet", "500mg", "Merck"),
+        ("Glibenclamide", "Glibenclamide", "Tablet", "5mg", "Sanofi"),
+        ("Glimepiride", "Glimepiride", "Tablet", "1mg", "Sanofi"),
+        ("Pioglitazone", "Pioglitazone", "Tablet", "15mg", "Takeda"),
+        ("Sitagliptin", "Sitagliptin", "Tablet", "100mg", "Merck"),
+        ("Linagliptin", "Linagliptin", "Tablet", "5mg", "Boehringer"),
+        ("Saxagliptin", "Saxagliptin", "Tablet", "5mg", "AstraZeneca"),
+        ("Vildagliptin", "Vildagliptin", "Tablet", "50mg", "Novartis"),
+        ("Dapagliflozin", "Dapagliflozin", "Tablet", "10mg", "AstraZeneca"),
+        ("Empagliflozin", "Empagliflozin", "Tablet", "10mg", "Boehringer")
+    ],
+    "Statins": [
+        ("Atorvastatin", "Atorvastatin", "Tablet", "10mg", "Pfizer"),
+        ("Simvastatin", "Simvastatin", "Tablet", "20mg", "Merck"),
+        ("Rosuvastatin", "Rosuvastatin", "Tablet", "10mg", "AstraZeneca"),
+        ("Pravastatin", "Pravastatin", "Tablet", "20mg", "Bristol-Myers"),
+        ("Fluvastatin", "Fluvastatin", "Capsule", "40mg", "Novartis"),
+        ("Lovastatin", "Lovastatin", "Tablet", "20mg", "Merck"),
+        ("Pitavastatin", "Pitavastatin", "Tablet", "2mg", "Kowa"),
+        ("Cerivastatin", "Cerivastatin", "Tablet", "0.3mg", "Bayer"),
+        ("Mevastatin", "Mevastatin", "Tablet", "20mg", "Merck"),
+        ("Compactin", "Compactin", "Tablet", "20mg", "Merck")
+    ],
+    "Antidepressants": [
+        ("Sertraline", "Sertraline", "Tablet", "50mg", "Pfizer"),
+        ("Fluoxetine", "Fluoxetine", "Capsule", "20mg", "Eli Lilly"),
+        ("Escitalopram", "Escitalopram", "Tablet", "10mg", "Lundbeck"),
+        ("Paroxetine", "Paroxetine", "Tablet", "20mg", "GSK"),
+        ("Citalopram", "Citalopram", "Tablet", "20mg", "Lundbeck"),
+        ("Venlafaxine", "Venlafaxine", "Capsule", "75mg", "Pfizer"),
+        ("Duloxetine", "Duloxetine", "Capsule", "30mg", "Eli Lilly"),
+        ("Bupropion", "Bupropion", "Tablet", "150mg", "GSK"),
+        ("Mirtazapine", "Mirtazapine", "Tablet", "15mg", "Merck"),
+        ("Trazodone", "Trazodone", "Tablet", "50mg", "Pfizer")
+    ],
+    "Antipsychotics": [
+        ("Risperidone", "Risperidone", "Tablet", "2mg", "Janssen"),
+        ("Olanzapine", "Olanzapine", "Tablet", "5mg", "Eli Lilly"),
+        ("Quetiapine", "Quetiapine", "Tablet", "25mg", "AstraZeneca"),
+        ("Aripiprazole", "Aripiprazole", "Tablet", "10mg", "Otsuka"),
+        ("Ziprasidone", "Ziprasidone", "Capsule", "40mg", "Pfizer"),
+        ("Paliperidone", "Paliperidone", "Tablet", "3mg", "Janssen"),
+        ("Asenapine", "Asenapine", "Tablet", "5mg", "Merck"),
+        ("Lurasidone", "Lurasidone", "Tablet", "40mg", "Sunovion"),
+        ("Iloperidone", "Iloperidone", "Tablet", "2mg", "Vanda"),
+        ("Cariprazine", "Cariprazine", "Capsule", "1.5mg", "Allergan")
+    ],
+    "Benzodiazepines": [
+        ("Alprazolam", "Alprazolam", "Tablet", "0.5mg", "Pfizer"),
+        ("Diazepam", "Diazepam", "Tablet", "5mg", "Roche"),
+        ("Lorazepam", "Lorazepam", "Tablet", "1mg", "Wyeth"),
+        ("Clonazepam", "Clonazepam", "Tablet", "0.5mg", "Roche"),
+        ("Temazepam", "Temazepam", "Capsule", "15mg", "Mallinckrodt"),
+        ("Oxazepam", "Oxazepam", "Tablet", "15mg", "Wyeth"),
+        ("Chlordiazepoxide", "Chlordiazepoxide", "Capsule", "10mg", "Roche"),
+        ("Flurazepam", "Flurazepam", "Capsule", "15mg", "Roche"),
+        ("Triazolam", "Triazolam", "Tablet", "0.25mg", "Upjohn"),
+        ("Estazolam", "Estazolam", "Tablet", "1mg", "Abbott")
+    ],
+    "Corticosteroids": [
+        ("Prednisone", "Prednisone", "Tablet", "5mg", "Merck"),
+        ("Methylprednisolone", "Methylprednisolone", "Tablet", "4mg", "Pfizer"),
+        ("Dexamethasone", "Dexamethasone", "Tablet", "0.5mg", "Merck"),
+        ("Hydrocortisone", "Hydrocortisone", "Tablet", "20mg", "Pfizer"),
+        ("Betamethasone", "Betamethasone", "Tablet", "0.5mg", "Merck"),
+        ("Triamcinolone", "Triamcinolone", "Tablet", "4mg", "Bristol-Myers"),
+        ("Fludrocortisone", "Fludrocortisone", "Tablet", "0.1mg", "Merck"),
+        ("Cortisone", "Cortisone", "Tablet", "25mg", "Merck"),
+        ("Budesonide", "Budesonide", "Capsule", "3mg", "AstraZeneca"),
+        ("Fluticasone", "Fluticasone", "Inhaler", "50mcg", "GSK")
+    ],
+    "Anticoagulants": [
+        ("Warfarin", "Warfarin", "Tablet", "5mg", "Bristol-Myers"),
+        ("Heparin", "Heparin", "Injection", "5000U", "Pfizer"),
+        ("Enoxaparin", "Enoxaparin", "Injection", "40mg", "Sanofi"),
+        ("Dabigatran", "Dabigatran", "Capsule", "150mg", "Boehringer"),
+        ("Rivaroxaban", "Rivaroxaban", "Tablet", "20mg", "Bayer"),
+        ("Apixaban", "Apixaban", "Tablet", "5mg", "Bristol-Myers"),
+        ("Fondaparinux", "Fondaparinux", "Injection", "2.5mg", "GSK"),
+        ("Dalteparin", "Dalteparin", "Injection", "5000U", "Pfizer"),
+        ("Tinzaparin", "Tinzaparin", "Injection", "4500U", "Leo Pharma"),
+        ("Argatroban", "Argatroban", "Injection", "100mg", "Mitsubishi")
+    ],
+    "Diuretics": [
+        ("Furosemide", "Furosemide", "Tablet", "40mg", "Sanofi"),
+        ("Hydrochlorothiazide", "Hydrochlorothiazide", "Tablet", "25mg", "Merck"),
+        ("Spironolactone", "Spironolactone", "Tablet", "25mg", "Pfizer"),
+        ("Chlorthalidone", "Chlorthalidone", "Tablet", "25mg", "Merck"),
+        ("Bumetanide", "Bumetanide", "Tablet", "1mg", "Roche"),
+        ("Torsemide", "Torsemide", "Tablet", "10mg", "Roche"),
+        ("Amiloride", "Amiloride", "Tablet", "5mg", "Merck"),
+        ("Triamterene", "Triamterene", "Capsule", "50mg", "Merck"),
+        ("Indapamide", "Indapamide", "Tablet", "2.5mg", "Servier"),
+        ("Metolazone", "Metolazone", "Tablet", "2.5mg", "Pfizer")
+    ],
+    "Bronchodilators": [
+        ("Salbutamol", "Albuterol", "Inhaler", "100mcg", "GSK"),
+        ("Terbutaline", "Terbutaline", "Tablet", "5mg", "AstraZeneca"),
+        ("Formoterol", "Formoterol", "Inhaler", "12mcg", "AstraZeneca"),
+        ("Salmeterol", "Salmeterol", "Inhaler", "25mcg", "GSK"),
+        ("Ipratropium", "Ipratropium", "Inhaler", "20mcg", "Boehringer"),
+        ("Tiotropium", "Tiotropium", "Inhaler", "18mcg", "Boehringer"),
+        ("Umeclidinium", "Umeclidinium", "Inhaler", "62.5mcg", "GSK"),
+        ("Glycopyrrolate", "Glycopyrrolate", "Inhaler", "15.6mcg", "Sunovion"),
+        ("Indacaterol", "Indacaterol", "Inhaler", "75mcg", "Novartis"),
+        ("Vilanterol", "Vilanterol", "Inhaler", "25mcg", "GSK")
+    ],
+    "Antiemetics": [
+        ("Ondansetron", "Ondansetron", "Tablet", "4mg", "GSK"),
+        ("Metoclopramide", "Metoclopramide", "Tablet", "10mg", "Baxter"),
+        ("Prochlorperazine", "Prochlorperazine", "Tablet", "5mg", "GSK"),
+        ("Domperidone", "Domperidone", "Tablet", "10mg", "Janssen"),
+        ("Granisetron", "Granisetron", "Tablet", "1mg", "Roche"),
+        ("Palonosetron", "Palonosetron", "Injection", "0.25mg", "Eisai"),
+        ("Dolasetron", "Dolasetron", "Tablet", "100mg", "Sanofi"),
+        ("Tropisetron", "Tropisetron", "Capsule", "5mg", "Novartis"),
+        ("Ramosetron", "Ramosetron", "Tablet", "0.1mg", "Astellas"),
+        ("Aprepitant", "Aprepitant", "Capsule", "125mg", "Merck")
+    ],
+    "Laxatives": [
+        ("Bisacodyl", "Bisacodyl", "Tablet", "5mg", "Boehringer"),
+        ("Senna", "Senna", "Tablet", "8.6mg", "GSK"),
+        ("Lactulose", "Lactulose", "Syrup", "10g", "Solvay"),
+        ("Polyethylene Glycol", "PEG", "Powder", "17g", "Bayer"),
+        ("Docusate", "Docusate", "Capsule", "100mg", "Purdue"),
+        ("Glycerin", "Glycerin", "Suppository", "2g", "Baxter"),
+        ("Milk of Magnesia", "Magnesium Hydroxide", "Liquid", "400mg", "Bayer"),
+        ("Mineral Oil", "Mineral Oil", "Liquid", "15ml", "Baxter"),
+        ("Psyllium", "Psyllium", "Powder", "3.4g", "Metamucil"),
+        ("Methylcellulose", "Methylcellulose", "Powder", "2g", "Citrucel")
+    ],
+    "Antifungals": [
+        ("Fluconazole", "Fluconazole", "Capsule", "150mg", "Pfizer"),
+        ("Itraconazole", "Itraconazole", "Capsule", "100mg", "Janssen"),
+        ("Ketoconazole", "Ketoconazole", "Tablet", "200mg", "Janssen"),
+        ("Terbinafine", "Terbinafine", "Tablet", "250mg", "Novartis"),
+        ("Griseofulvin", "Griseofulvin", "Tablet", "500mg", "GSK"),
+        ("Amphotericin B", "Amphotericin B", "Injection", "50mg", "Bristol-Myers"),
+        ("Caspofungin", "Caspofungin", "Injection", "50mg", "Merck"),
+        ("Micafungin", "Micafungin", "Injection", "100mg", "Astellas"),
+        ("Anidulafungin", "Anidulafungin", "Injection", "100mg", "Pfizer"),
+        ("Voriconazole", "Voriconazole", "Tablet", "200mg", "Pfizer")
+    ],
+    "Antivirals": [
+        ("Acyclovir", "Acyclovir", "Tablet", "400mg", "GSK"),
+        ("Valacyclovir", "Valacyclovir", "Tablet", "500mg", "GSK"),
+        ("Oseltamivir", "Oseltamivir", "Capsule", "75mg", "Roche"),
+        ("Zanamivir", "Zanamivir", "Inhaler", "5mg", "GSK"),
+        ("Ganciclovir", "Ganciclovir", "Capsule", "250mg", "Roche"),
+        ("Valganciclovir", "Valganciclovir", "Tablet", "450mg", "Roche"),
+        ("Famciclovir", "Famciclovir", "Tablet", "250mg", "Novartis"),
+        ("Ribavirin", "Ribavirin", "Capsule", "200mg", "Merck"),
+        ("Interferon", "Interferon", "Injection", "3MU", "Merck"),
+        ("Lamivudine", "Lamivudine", "Tablet", "100mg", "GSK")
+    ],
+    "Vitamins": [
+        ("Vitamin C", "Ascorbic Acid", "Tablet", "500mg", "Bayer"),
+        ("Vitamin D", "Cholecalciferol", "Capsule", "1000IU", "Pfizer"),
+        ("Vitamin B12", "Cyanocobalamin", "Tablet", "1000mcg", "Merck"),
+        ("Vitamin B6", "Pyridoxine", "Tablet", "50mg", "Bayer"),
+        ("Vitamin B1", "Thiamine", "Tablet", "100mg", "Merck"),
+        ("Vitamin B2", "Riboflavin", "Tablet", "50mg", "Bayer"),
+        ("Vitamin B3", "Niacin", "Tablet", "500mg", "Merck"),
+        ("Vitamin B5", "Pantothenic Acid", "Tablet", "100mg", "Bayer"),
+        ("Vitamin B7", "Biotin", "Tablet", "1000mcg", "Merck"),
+        ("Vitamin B9", "Folic Acid", "Tablet", "5mg", "Bayer")
+    ],
+    "Minerals": [
+        ("Calcium", "Calcium Carbonate", "Tablet", "500mg", "Bayer"),
+        ("Iron", "Ferrous Sulfate", "Tablet", "325mg", "Merck"),
+        ("Zinc", "Zinc Sulfate", "Tablet", "50mg", "Bayer"),
+        ("Magnesium", "Magnesium Oxide", "Tablet", "250mg", "Merck"),
+        ("Potassium", "Potassium Chloride", "Tablet", "20mEq", "Bayer"),
+        ("Selenium", "Selenium", "Tablet", "100mcg", "Merck"),
+        ("Copper", "Copper Sulfate", "Tablet", "2mg", "Bayer"),
+        ("Manganese", "Manganese Sulfate", "Tablet", "5mg", "Merck"),
+        ("Chromium", "Chromium Picolinate", "Tablet", "200mcg", "Bayer"),
+        ("Molybdenum", "Molybdenum", "Tablet", "75mcg", "Merck")
+    ]
+}
 
 class MedicineDatabaseCreator:
     """Creates and populates a medicine database with comprehensive medicine data."""
@@ -18,8 +272,14 @@ class MedicineDatabaseCreator:
         
     def connect(self):
         """Connect to SQLite database."""
-        self.conn = sqlite3.connect(self.db_path)
+        # Autocommit mode; insert_medicines manages its own transaction
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None)
         self.cursor = self.conn.cursor()
+        # Tuned for the one-shot bulk build; durability is restored after inserting
+        self.cursor.execute("PRAGMA journal_mode=WAL")
+        self.cursor.execute("PRAGMA synchronous=OFF")
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+        self.cursor.execute("PRAGMA cache_size=-64000")
         
     def close(self):
         """Close database connection."""
@@ -43,304 +303,125 @@ class MedicineDatabaseCreator:
         )
         """
         self.cursor.execute(create_table_sql)
+        self.create_indexes()
         self.conn.commit()
         
-    def get_medicine_data(self) -> List[Tuple]:
-        """Generate comprehensive medicine data with realistic names, classes, and prices."""
+    def create_indexes(self):
+        """Create indexes for the name, generic name and class lookups done on the medicines table."""
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_med_name ON medicines(name)")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_med_name_lower ON medicines(LOWER(name))")
+        # Serves the alternatives query: WHERE generic_name = ? ... ORDER BY price,
+        # and as a prefix every other generic_name lookup
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_med_generic_price
+            ON medicines(generic_name, price, stock_quantity)
+        """)
+        # Serves the per-class views: WHERE class = ? ORDER BY price, and the
+        # class summary's GROUP BY class with price aggregates
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_med_class_price
+            ON medicines(class, price)
+        """)
+        # Single-column generic index built by earlier versions; the composite covers it
+        self.cursor.execute("DROP INDEX IF EXISTS idx_med_generic")
         
-        # Medicine classes with their common medicines
-        medicine_classes = {
-            "Antibiotics": [
-                ("Amoxicillin", "Amoxicillin", "Capsule", "500mg", "Cipla"),
-                ("Azithromycin", "Azithromycin", "Tablet", "250mg", "Sun Pharma"),
-                ("Ciprofloxacin", "Ciprofloxacin", "Tablet", "500mg", "Dr. Reddy's"),
-                ("Doxycycline", "Doxycycline", "Capsule", "100mg", "Lupin"),
-                ("Cephalexin", "Cephalexin", "Capsule", "500mg", "Aurobindo"),
-                ("Metronidazole", "Metronidazole", "Tablet", "400mg", "Zydus"),
-                ("Clarithromycin", "Clarithromycin", "Tablet", "250mg", "Glenmark"),
-                ("Levofloxacin", "Levofloxacin", "Tablet", "500mg", "Torrent"),
-                ("Erythromycin", "Erythromycin", "Tablet", "250mg", "Alkem"),
-                ("Tetracycline", "Tetracycline", "Capsule", "250mg", "Mankind")
-            ],
-            "Pain Relievers": [
-                ("Paracetamol", "Acetaminophen", "Tablet", "500mg", "GSK"),
-                ("Ibuprofen", "Ibuprofen", "Tablet", "400mg", "Pfizer"),
-                ("Aspirin", "Acetylsalicylic Acid", "Tablet", "100mg", "Bayer"),
-                ("Diclofenac", "Diclofenac", "Tablet", "50mg", "Novartis"),
-                ("Naproxen", "Naproxen", "Tablet", "250mg", "Roche"),
-                ("Ketorolac", "Ketorolac", "Tablet", "10mg", "Abbott"),
-                ("Mefenamic Acid", "Mefenamic Acid", "Capsule", "250mg", "Sanofi"),
-                ("Tramadol", "Tramadol", "Tablet", "50mg", "Janssen"),
-                ("Codeine", "Codeine", "Tablet", "30mg", "Mallinckrodt"),
-                ("Morphine", "Morphine", "Tablet", "10mg", "Purdue")
-            ],
-            "Antihistamines": [
-                ("Cetirizine", "Cetirizine", "Tablet", "10mg", "UCB"),
-                ("Loratadine", "Loratadine", "Tablet", "10mg", "Merck"),
-                ("Fexofenadine", "Fexofenadine", "Tablet", "120mg", "Sanofi"),
-                ("Diphenhydramine", "Diphenhydramine", "Tablet", "25mg", "Johnson & Johnson"),
-                ("Chlorpheniramine", "Chlorpheniramine", "Tablet", "4mg", "GSK"),
-                ("Desloratadine", "Desloratadine", "Tablet", "5mg", "Merck"),
-                ("Levocetirizine", "Levocetirizine", "Tablet", "5mg", "UCB"),
-                ("Bilastine", "Bilastine", "Tablet", "20mg", "Menarini"),
-                ("Rupatadine", "Rupatadine", "Tablet", "10mg", "J. Uriach"),
-                ("Ebastine", "Ebastine", "Tablet", "10mg", "Almirall")
-            ],
-            "Antacids": [
-                ("Omeprazole", "Omeprazole", "Capsule", "20mg", "AstraZeneca"),
-                ("Pantoprazole", "Pantoprazole", "Tablet", "40mg", "Pfizer"),
-                ("Esomeprazole", "Esomeprazole", "Capsule", "20mg", "AstraZeneca"),
-                ("Lansoprazole", "Lansoprazole", "Capsule", "30mg", "Takeda"),
-                ("Rabeprazole", "Rabeprazole", "Tablet", "20mg", "Eisai"),
-                ("Ranitidine", "Ranitidine", "Tablet", "150mg", "GSK"),
-                ("Famotidine", "Famotidine", "Tablet", "20mg", "Merck"),
-                ("Cimetidine", "Cimetidine", "Tablet", "200mg", "GSK"),
-                ("Aluminum Hydroxide", "Aluminum Hydroxide", "Tablet", "500mg", "Bayer"),
-                ("Calcium Carbonate", "Calcium Carbonate", "Tablet", "500mg", "GSK")
-            ],
-            "Antihypertensives": [
-                ("Amlodipine", "Amlodipine", "Tablet", "5mg", "Pfizer"),
-                ("Lisinopril", "Lisinopril", "Tablet", "10mg", "Merck"),
-                ("Losartan", "Losartan", "Tablet", "50mg", "Merck"),
-                ("Metoprolol", "Metoprolol", "Tablet", "50mg", "AstraZeneca"),
-                ("Atenolol", "Atenolol", "Tablet", "50mg", "AstraZeneca"),
-                ("Valsartan", "Valsartan", "Tablet", "80mg", "Novartis"),
-                ("Irbesartan", "Irbesartan", "Tablet", "150mg", "Sanofi"),
-                ("Candesartan", "Candesartan", "Tablet", "8mg", "AstraZeneca"),
-                ("Telmisartan", "Telmisartan", "Tablet", "40mg", "Boehringer"),
-                ("Olmesartan", "Olmesartan", "Tablet", "20mg", "Daiichi Sankyo")
-            ],
-            "Antidiabetics": [
-                ("Metformin", "Metformin", "Tablet", "500mg", "Merck"),
-                ("Glibenclamide", "Glibenclamide", "Tablet", "5mg", "Sanofi"),
-                ("Glimepiride", "Glimepiride", "Tablet", "1mg", "Sanofi"),
-                ("Pioglitazone", "Pioglitazone", "Tablet", "15mg", "Takeda"),
-                ("Sitagliptin", "Sitagliptin", "Tablet", "100mg", "Merck"),
-                ("Linagliptin", "Linagliptin", "Tablet", "5mg", "Boehringer"),
-                ("Saxagliptin", "Saxagliptin", "Tablet", "5mg", "AstraZeneca"),
-                ("Vildagliptin", "Vildagliptin", "Tablet", "50mg", "Novartis"),
-                ("Dapagliflozin", "Dapagliflozin", "Tablet", "10mg", "AstraZeneca"),
-                ("Empagliflozin", "Empagliflozin", "Tablet", "10mg", "Boehringer")
-            ],
-            "Statins": [
-                ("Atorvastatin", "Atorvastatin", "Tablet", "10mg", "Pfizer"),
-                ("Simvastatin", "Simvastatin", "Tablet", "20mg", "Merck"),
-                ("Rosuvastatin", "Rosuvastatin", "Tablet", "10mg", "AstraZeneca"),
-                ("Pravastatin", "Pravastatin", "Tablet", "20mg", "Bristol-Myers"),
-                ("Fluvastatin", "Fluvastatin", "Capsule", "40mg", "Novartis"),
-                ("Lovastatin", "Lovastatin", "Tablet", "20mg", "Merck"),
-                ("Pitavastatin", "Pitavastatin", "Tablet", "2mg", "Kowa"),
-                ("Cerivastatin", "Cerivastatin", "Tablet", "0.3mg", "Bayer"),
-                ("Mevastatin", "Mevastatin", "Tablet", "20mg", "Merck"),
-                ("Compactin", "Compactin", "Tablet", "20mg", "Merck")
-            ],
-            "Antidepressants": [
-                ("Sertraline", "Sertraline", "Tablet", "50mg", "Pfizer"),
-                ("Fluoxetine", "Fluoxetine", "Capsule", "20mg", "Eli Lilly"),
-                ("Escitalopram", "Escitalopram", "Tablet", "10mg", "Lundbeck"),
-                ("Paroxetine", "Paroxetine", "Tablet", "20mg", "GSK"),
-                ("Citalopram", "Citalopram", "Tablet", "20mg", "Lundbeck"),
-                ("Venlafaxine", "Venlafaxine", "Capsule", "75mg", "Pfizer"),
-                ("Duloxetine", "Duloxetine", "Capsule", "30mg", "Eli Lilly"),
-                ("Bupropion", "Bupropion", "Tablet", "150mg", "GSK"),
-                ("Mirtazapine", "Mirtazapine", "Tablet", "15mg", "Merck"),
-                ("Trazodone", "Trazodone", "Tablet", "50mg", "Pfizer")
-            ],
-            "Antipsychotics": [
-                ("Risperidone", "Risperidone", "Tablet", "2mg", "Janssen"),
-                ("Olanzapine", "Olanzapine", "Tablet", "5mg", "Eli Lilly"),
-                ("Quetiapine", "Quetiapine", "Tablet", "25mg", "AstraZeneca"),
-                ("Aripiprazole", "Aripiprazole", "Tablet", "10mg", "Otsuka"),
-                ("Ziprasidone", "Ziprasidone", "Capsule", "40mg", "Pfizer"),
-                ("Paliperidone", "Paliperidone", "Tablet", "3mg", "Janssen"),
-                ("Asenapine", "Asenapine", "Tablet", "5mg", "Merck"),
-                ("Lurasidone", "Lurasidone", "Tablet", "40mg", "Sunovion"),
-                ("Iloperidone", "Iloperidone", "Tablet", "2mg", "Vanda"),
-                ("Cariprazine", "Cariprazine", "Capsule", "1.5mg", "Allergan")
-            ],
-            "Benzodiazepines": [
-                ("Alprazolam", "Alprazolam", "Tablet", "0.5mg", "Pfizer"),
-                ("Diazepam", "Diazepam", "Tablet", "5mg", "Roche"),
-                ("Lorazepam", "Lorazepam", "Tablet", "1mg", "Wyeth"),
-                ("Clonazepam", "Clonazepam", "Tablet", "0.5mg", "Roche"),
-                ("Temazepam", "Temazepam", "Capsule", "15mg", "Mallinckrodt"),
-                ("Oxazepam", "Oxazepam", "Tablet", "15mg", "Wyeth"),
-                ("Chlordiazepoxide", "Chlordiazepoxide", "Capsule", "10mg", "Roche"),
-                ("Flurazepam", "Flurazepam", "Capsule", "15mg", "Roche"),
-                ("Triazolam", "Triazolam", "Tablet", "0.25mg", "Upjohn"),
-                ("Estazolam", "Estazolam", "Tablet", "1mg", "Abbott")
-            ],
-            "Corticosteroids": [
-                ("Prednisone", "Prednisone", "Tablet", "5mg", "Merck"),
-                ("Methylprednisolone", "Methylprednisolone", "Tablet", "4mg", "Pfizer"),
-                ("Dexamethasone", "Dexamethasone", "Tablet", "0.5mg", "Merck"),
-                ("Hydrocortisone", "Hydrocortisone", "Tablet", "20mg", "Pfizer"),
-                ("Betamethasone", "Betamethasone", "Tablet", "0.5mg", "Merck"),
-                ("Triamcinolone", "Triamcinolone", "Tablet", "4mg", "Bristol-Myers"),
-                ("Fludrocortisone", "Fludrocortisone", "Tablet", "0.1mg", "Merck"),
-                ("Cortisone", "Cortisone", "Tablet", "25mg", "Merck"),
-                ("Budesonide", "Budesonide", "Capsule", "3mg", "AstraZeneca"),
-                ("Fluticasone", "Fluticasone", "Inhaler", "50mcg", "GSK")
-            ],
-            "Anticoagulants": [
-                ("Warfarin", "Warfarin", "Tablet", "5mg", "Bristol-Myers"),
-                ("Heparin", "Heparin", "Injection", "5000U", "Pfizer"),
-                ("Enoxaparin", "Enoxaparin", "Injection", "40mg", "Sanofi"),
-                ("Dabigatran", "Dabigatran", "Capsule", "150mg", "Boehringer"),
-                ("Rivaroxaban", "Rivaroxaban", "Tablet", "20mg", "Bayer"),
-                ("Apixaban", "Apixaban", "Tablet", "5mg", "Bristol-Myers"),
-                ("Fondaparinux", "Fondaparinux", "Injection", "2.5mg", "GSK"),
-                ("Dalteparin", "Dalteparin", "Injection", "5000U", "Pfizer"),
-                ("Tinzaparin", "Tinzaparin", "Injection", "4500U", "Leo Pharma"),
-                ("Argatroban", "Argatroban", "Injection", "100mg", "Mitsubishi")
-            ],
-            "Diuretics": [
-                ("Furosemide", "Furosemide", "Tablet", "40mg", "Sanofi"),
-                ("Hydrochlorothiazide", "Hydrochlorothiazide", "Tablet", "25mg", "Merck"),
-                ("Spironolactone", "Spironolactone", "Tablet", "25mg", "Pfizer"),
-                ("Chlorthalidone", "Chlorthalidone", "Tablet", "25mg", "Merck"),
-                ("Bumetanide", "Bumetanide", "Tablet", "1mg", "Roche"),
-                ("Torsemide", "Torsemide", "Tablet", "10mg", "Roche"),
-                ("Amiloride", "Amiloride", "Tablet", "5mg", "Merck"),
-                ("Triamterene", "Triamterene", "Capsule", "50mg", "Merck"),
-                ("Indapamide", "Indapamide", "Tablet", "2.5mg", "Servier"),
-                ("Metolazone", "Metolazone", "Tablet", "2.5mg", "Pfizer")
-            ],
-            "Bronchodilators": [
-                ("Salbutamol", "Albuterol", "Inhaler", "100mcg", "GSK"),
-                ("Terbutaline", "Terbutaline", "Tablet", "5mg", "AstraZeneca"),
-                ("Formoterol", "Formoterol", "Inhaler", "12mcg", "AstraZeneca"),
-                ("Salmeterol", "Salmeterol", "Inhaler", "25mcg", "GSK"),
-                ("Ipratropium", "Ipratropium", "Inhaler", "20mcg", "Boehringer"),
-                ("Tiotropium", "Tiotropium", "Inhaler", "18mcg", "Boehringer"),
-                ("Umeclidinium", "Umeclidinium", "Inhaler", "62.5mcg", "GSK"),
-                ("Glycopyrrolate", "Glycopyrrolate", "Inhaler", "15.6mcg", "Sunovion"),
-                ("Indacaterol", "Indacaterol", "Inhaler", "75mcg", "Novartis"),
-                ("Vilanterol", "Vilanterol", "Inhaler", "25mcg", "GSK")
-            ],
-            "Antiemetics": [
-                ("Ondansetron", "Ondansetron", "Tablet", "4mg", "GSK"),
-                ("Metoclopramide", "Metoclopramide", "Tablet", "10mg", "Baxter"),
-                ("Prochlorperazine", "Prochlorperazine", "Tablet", "5mg", "GSK"),
-                ("Domperidone", "Domperidone", "Tablet", "10mg", "Janssen"),
-                ("Granisetron", "Granisetron", "Tablet", "1mg", "Roche"),
-                ("Palonosetron", "Palonosetron", "Injection", "0.25mg", "Eisai"),
-                ("Dolasetron", "Dolasetron", "Tablet", "100mg", "Sanofi"),
-                ("Tropisetron", "Tropisetron", "Capsule", "5mg", "Novartis"),
-                ("Ramosetron", "Ramosetron", "Tablet", "0.1mg", "Astellas"),
-                ("Aprepitant", "Aprepitant", "Capsule", "125mg", "Merck")
-            ],
-            "Laxatives": [
-                ("Bisacodyl", "Bisacodyl", "Tablet", "5mg", "Boehringer"),
-                ("Senna", "Senna", "Tablet", "8.6mg", "GSK"),
-                ("Lactulose", "Lactulose", "Syrup", "10g", "Solvay"),
-                ("Polyethylene Glycol", "PEG", "Powder", "17g", "Bayer"),
-                ("Docusate", "Docusate", "Capsule", "100mg", "Purdue"),
-                ("Glycerin", "Glycerin", "Suppository", "2g", "Baxter"),
-                ("Milk of Magnesia", "Magnesium Hydroxide", "Liquid", "400mg", "Bayer"),
-                ("Mineral Oil", "Mineral Oil", "Liquid", "15ml", "Baxter"),
-                ("Psyllium", "Psyllium", "Powder", "3.4g", "Metamucil"),
-                ("Methylcellulose", "Methylcellulose", "Powder", "2g", "Citrucel")
-            ],
-            "Antifungals": [
-                ("Fluconazole", "Fluconazole", "Capsule", "150mg", "Pfizer"),
-                ("Itraconazole", "Itraconazole", "Capsule", "100mg", "Janssen"),
-                ("Ketoconazole", "Ketoconazole", "Tablet", "200mg", "Janssen"),
-                ("Terbinafine", "Terbinafine", "Tablet", "250mg", "Novartis"),
-                ("Griseofulvin", "Griseofulvin", "Tablet", "500mg", "GSK"),
-                ("Amphotericin B", "Amphotericin B", "Injection", "50mg", "Bristol-Myers"),
-                ("Caspofungin", "Caspofungin", "Injection", "50mg", "Merck"),
-                ("Micafungin", "Micafungin", "Injection", "100mg", "Astellas"),
-                ("Anidulafungin", "Anidulafungin", "Injection", "100mg", "Pfizer"),
-                ("Voriconazole", "Voriconazole", "Tablet", "200mg", "Pfizer")
-            ],
-            "Antivirals": [
-                ("Acyclovir", "Acyclovir", "Tablet", "400mg", "GSK"),
-                ("Valacyclovir", "Valacyclovir", "Tablet", "500mg", "GSK"),
-                ("Oseltamivir", "Oseltamivir", "Capsule", "75mg", "Roche"),
-                ("Zanamivir", "Zanamivir", "Inhaler", "5mg", "GSK"),
-                ("Ganciclovir", "Ganciclovir", "Capsule", "250mg", "Roche"),
-                ("Valganciclovir", "Valganciclovir", "Tablet", "450mg", "Roche"),
-                ("Famciclovir", "Famciclovir", "Tablet", "250mg", "Novartis"),
-                ("Ribavirin", "Ribavirin", "Capsule", "200mg", "Merck"),
-                ("Interferon", "Interferon", "Injection", "3MU", "Merck"),
-                ("Lamivudine", "Lamivudine", "Tablet", "100mg", "GSK")
-            ],
-            "Vitamins": [
-                ("Vitamin C", "Ascorbic Acid", "Tablet", "500mg", "Bayer"),
-                ("Vitamin D", "Cholecalciferol", "Capsule", "1000IU", "Pfizer"),
-                ("Vitamin B12", "Cyanocobalamin", "Tablet", "1000mcg", "Merck"),
-                ("Vitamin B6", "Pyridoxine", "Tablet", "50mg", "Bayer"),
-                ("Vitamin B1", "Thiamine", "Tablet", "100mg", "Merck"),
-                ("Vitamin B2", "Riboflavin", "Tablet", "50mg", "Bayer"),
-                ("Vitamin B3", "Niacin", "Tablet", "500mg", "Merck"),
-                ("Vitamin B5", "Pantothenic Acid", "Tablet", "100mg", "Bayer"),
-                ("Vitamin B7", "Biotin", "Tablet", "1000mcg", "Merck"),
-                ("Vitamin B9", "Folic Acid", "Tablet", "5mg", "Bayer")
-            ],
-            "Minerals": [
-                ("Calcium", "Calcium Carbonate", "Tablet", "500mg", "Bayer"),
-                ("Iron", "Ferrous Sulfate", "Tablet", "325mg", "Merck"),
-                ("Zinc", "Zinc Sulfate", "Tablet", "50mg", "Bayer"),
-                ("Magnesium", "Magnesium Oxide", "Tablet", "250mg", "Merck"),
-                ("Potassium", "Potassium Chloride", "Tablet", "20mEq", "Bayer"),
-                ("Selenium", "Selenium", "Tablet", "100mcg", "Merck"),
-                ("Copper", "Copper Sulfate", "Tablet", "2mg", "Bayer"),
-                ("Manganese", "Manganese Sulfate", "Tablet", "5mg", "Merck"),
-                ("Chromium", "Chromium Picolinate", "Tablet", "200mcg", "Bayer"),
-                ("Molybdenum", "Molybdenum", "Tablet", "75mcg", "Merck")
-            ]
-        }
-        
-        medicines = []
-        medicine_id = 1
+    def get_medicine_data(self) -> Iterator[Tuple]:
+        """Generate comprehensive medicine data with realistic names, classes, and prices, one row at a time."""
+        # One entry per variant: 5 variants per medicine = 50 medicines per class
+        variants = (
+            (class_name, brand_name, generic_name, dosage_form, strength, manufacturer, variant)
+            for class_name, class_medicines in _MEDICINE_CLASSES.items()
+            for brand_name, generic_name, dosage_form, strength, manufacturer in class_medicines
+            for variant in range(VARIANTS_PER_MEDICINE)
+        )
         
-        for class_name, class_medicines in medicine_classes.items():
-            for brand_name, generic_name, dosage_form, strength, manufacturer in class_medicines:
-                # Generate multiple variants with different prices and stock levels
-                for variant in range(5):  # 5 variants per medicine = 50 medicines per class
-                    # Price variation based on brand vs generic
-                    base_price = random.uniform(5.0, 50.0)
-                    if "generic" in generic_name.lower():
-                        price = base_price * 0.3  # Generic is cheaper
-                    else:
-                        price = base_price * random.uniform(0.8, 1.5)  # Brand variation
-                    
-                    # Stock quantity variation
-                    stock = random.randint(10, 500)
-                    
-                    # Create variant name
-                    if variant == 0:
-                        name = brand_name
-                    else:
-                        name = f"{brand_name} {chr(65 + variant)}"  # A, B, C, D variants
-                    
-                    medicines.append((
-                        name,
-                        class_name,
-                        stock,
-                        round(price, 2),
-                        generic_name,
-                        dosage_form,
-                        strength,
-                        manufacturer
-                    ))
-                    medicine_id += 1
+        # Random value streams, consumed in lockstep with the variants
+        rand, randint = random.random, random.randint
+        base_prices = (5.0 + 45.0 * rand() for _ in repeat(None))     # uniform(5.0, 50.0)
+        brand_factors = (0.8 + 0.7 * rand() for _ in repeat(None))    # uniform(0.8, 1.5)
+        stocks = (randint(10, 500) for _ in repeat(None))
         
-        return medicines
+        return (
+            (
+                # Create variant name: A, B, C, D variants
+                brand_name if variant == 0 else f"{brand_name} {chr(65 + variant)}",
+                class_name,
+                stock,
+                # Price variation based on brand vs generic (generic is cheaper)
+                round(base_price * (0.3 if "generic" in generic_name.lower() else brand_factor), 2),
+                generic_name,
+                dosage_form,
+                strength,
+                manufacturer
+            )
+            for (class_name, brand_name, generic_name, dosage_form, strength, manufacturer, variant),
+                base_price, brand_factor, stock
+            in zip(variants, base_prices, brand_factors, stocks)
+        )
     
-    def insert_medicines(self, medicines: List[Tuple]):
-        """Insert medicines into the database."""
+    def insert_medicines(self, medicines: Iterable[Tuple], replace: bool = False) -> int:
+        """
+        Insert medicines into the database.
+        
+        Rows are streamed from the iterable INSERT_CHUNK_SIZE at a time, so memory
+        use stays bounded by the chunk size. On SQLite 3.38+ each chunk is bound
+        once as a JSON array and expanded with json_each; older versions bind
+        every row through executemany. Everything runs in one transaction, so an
+        interrupted or failed seed leaves the table as it was.
+        
+        Args:
+            medicines (Iterable[Tuple]): Rows to insert
+            replace (bool): Delete the existing medicines in the same transaction
+        
+        Returns:
+            int: Number of medicines inserted
+        """
         insert_sql = """
         INSERT INTO medicines (name, class, stock_quantity, price, generic_name, dosage_form, strength, manufacturer)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """
+        json_insert_sql = """
+        INSERT INTO medicines (name, class, stock_quantity, price, generic_name, dosage_form, strength, manufacturer)
+        SELECT value ->> '$[0]', value ->> '$[1]', value ->> '$[2]', value ->> '$[3]',
+               value ->> '$[4]', value ->> '$[5]', value ->> '$[6]', value ->> '$[7]'
+        FROM json_each(?)
+        """
+        # The ->> operator needs SQLite 3.38
+        use_json = sqlite3.sqlite_version_info >= (3, 38, 0)
         
-        self.cursor.executemany(insert_sql, medicines)
-        self.conn.commit()
+        inserted = 0
+        medicines = iter(medicines)
+        self.cursor.execute("BEGIN")
+        try:
+            if replace:
+                self.cursor.execute("DELETE FROM medicines")
+            while batch := list(islice(medicines, INSERT_CHUNK_SIZE)):
+                if use_json:
+                    self.cursor.execute(json_insert_sql, (json.dumps(batch),))
+                else:
+                    self.cursor.executemany(insert_sql, batch)
+                inserted += len(batch)
+            self.cursor.execute("COMMIT")
+        except BaseException:
+            self.cursor.execute("ROLLBACK")
+            raise
+        
+        self.cursor.execute("PRAGMA synchronous=NORMAL")
+        return inserted
         
-    def create_database(self):
-        """Create and populate the medicine database."""
+    def expected_medicine_count(self) -> int:
+        """Number of rows a fully seeded database holds."""
+        return sum(len(class_medicines) for class_medicines in _MEDICINE_CLASSES.values()) * VARIANTS_PER_MEDICINE
+        
+    def create_database(self, force: bool = False):
+        """
+        Create and populate the medicine database.
+        
+        Does nothing if the database already holds the full seed data, and
+        refuses to seed on top of any other existing medicines (e.g. from a seed
+        made before seeding was a single transaction). With force, existing
+        medicines are deleted and reseeded in one transaction.
+        """
         try:
             print("🔧 Creating Medicine Database...")
             
@@ -348,16 +429,26 @@ class MedicineDatabaseCreator:
             self.create_table()
             print("   ✅ Table created successfully")
             
-            medicines = self.get_medicine_data()
-            print(f"   📊 Generated {len(medicines)} medicines across {len(set(med[1] for med in medicines))} classes")
+            if not force:
+                self.cursor.execute("SELECT COUNT(*) FROM medicines")
+                existing = self.cursor.fetchone()[0]
+                if existing == self.expected_medicine_count():
+                    print(f"   ✅ DB already populated with {existing} medicines, skipping (use --force to rebuild)")
+                    return
+                if existing:
+                    print(f"   ⚠️ DB holds {existing} medicines instead of the expected "
+                          f"{self.expected_medicine_count()}, not seeding on top of them (use --force to rebuild)")
+                    return
             
-            self.insert_medicines(medicines)
-            print("   ✅ Medicines inserted successfully")
+            inserted = self.insert_medicines(self.get_medicine_data(), replace=force)
+            if force:
+                print("   🗑️ Existing medicines replaced")
+            print(f"   ✅ {inserted} medicines inserted successfully")
             
             # Verify the data
-            self.cursor.execute("SELECT COUNT(*) FROM medicines")
-            count = self.cursor.fetchone()[0]
-            print(f"   📋 Total medicines in database: {count}")
+            self.cursor.execute("SELECT COUNT(*), COUNT(DISTINCT class) FROM medicines")
+            count, class_count = self.cursor.fetchone()
+            print(f"   📋 Total medicines in database: {count} across {class_count} classes")
             
             # Show sample data
             print("\n📋 Sample Medicines:")
@@ -381,8 +472,13 @@ class MedicineDatabaseCreator:
 
 def main():
     """Main function to create the medicine database."""
+    parser = argparse.ArgumentParser(description="Create and populate the medicine database.")
+    parser.add_argument("--force", action="store_true",
+                        help="delete existing medicines and reseed even if the database is populated")
+    args = parser.parse_args()
+    
     creator = MedicineDatabaseCreator()
-    creator.create_database()
+    creator.create_database(force=args.force)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
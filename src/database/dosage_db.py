@@ -7,6 +7,8 @@ import sqlite3
 import json
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
+from src.database.manager import SQLITE_MAX_PARAMS, padded_in_params
+from src.utils.cache import cached_lookup, store_cached
 
 
 class DosageGuidelinesManager:
@@ -17,9 +19,13 @@ class DosageGuidelinesManager:
         self.conn = None
         
     def connect(self) -> bool:
-        """Connect to the database."""
+        """Connect to the database, reusing the connection if it is already open."""
+        if self.conn is not None:
+            return True
+        
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Agents run lookups on this connection from worker threads
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
             return True
         except Exception as e:
@@ -384,7 +390,7 @@ class DosageGuidelinesManager:
             WHERE medicine_name = ? 
             AND (min_age_months <= ? AND max_age_months >= ?)
             AND (min_weight_kg <= ? AND max_weight_kg >= ?)
-            ORDER BY min_age_months
+            ORDER BY min_age_months, id
         ''', (medicine_name, age_months, age_months, weight_kg, weight_kg))
         
         return [dict(row) for row in cursor.fetchall()]
@@ -428,18 +434,65 @@ class DosageGuidelinesManager:
         cursor.execute('''
             SELECT * FROM dosage_guidelines 
             WHERE medicine_name = ?
-            ORDER BY min_age_months
+            ORDER BY min_age_months, id
         ''', (medicine_name,))
         
         return [dict(row) for row in cursor.fetchall()]
     
+    @cached_lookup()
     def check_age_appropriateness(self, medicine_name: str, age_months: int) -> Dict:
         """Check if medicine is age-appropriate and get recommendations."""
         guidelines = self.get_dosage_for_age_weight(medicine_name, age_months, 50)  # Default weight
+        all_guidelines = [] if guidelines else self.get_all_dosing_for_medicine(medicine_name)
+        return self._age_appropriateness_result(age_months, guidelines, all_guidelines)
+    
+    def check_age_appropriateness_batch(self, medicine_names: List[str], age_months: int) -> Dict[str, Dict]:
+        """
+        Check age appropriateness for several medicines with one query per chunk.
         
+        Args:
+            medicine_names (List[str]): Medicine names to check
+            age_months (int): Patient age in months
+            
+        Returns:
+            Dict[str, Dict]: check_age_appropriateness result per medicine name,
+                which are also cached for that method
+        """
+        all_dosing = {name: [] for name in medicine_names}
+        if self.conn and all_dosing:
+            names = list(all_dosing)
+            cursor = self.conn.cursor()
+            for i in range(0, len(names), SQLITE_MAX_PARAMS):
+                placeholders, params = padded_in_params(names[i:i + SQLITE_MAX_PARAMS])
+                cursor.execute(f'''
+                    SELECT * FROM dosage_guidelines 
+                    WHERE medicine_name IN ({placeholders})
+                    ORDER BY min_age_months, id
+                ''', params)
+                
+                for row in cursor.fetchall():
+                    all_dosing[row['medicine_name']].append(dict(row))
+        
+        results = {}
+        for name, all_guidelines in all_dosing.items():
+            # Same age and default-weight filter as get_dosage_for_age_weight
+            guidelines = [
+                g for g in all_guidelines
+                if None not in (g['min_age_months'], g['max_age_months'], g['min_weight_kg'], g['max_weight_kg'])
+                and g['min_age_months'] <= age_months <= g['max_age_months']
+                and g['min_weight_kg'] <= 50 <= g['max_weight_kg']
+            ]
+            results[name] = self._age_appropriateness_result(
+                age_months, guidelines, [] if guidelines else all_guidelines
+            )
+            store_cached(self.check_age_appropriateness, results[name], name, age_months)
+        
+        return results
+    
+    def _age_appropriateness_result(self, age_months: int, guidelines: List[Dict], all_guidelines: List[Dict]) -> Dict:
+        """Build the check_age_appropriateness result from the matching and all guidelines."""
         if not guidelines:
             # Check if there are any guidelines for this medicine
-            all_guidelines = self.get_all_dosing_for_medicine(medicine_name)
             if all_guidelines:
                 min_age = min(g['min_age_months'] for g in all_guidelines)
                 max_age = max(g['max_age_months'] for g in all_guidelines)
@@ -7,6 +7,16 @@ import sqlite3
 import json
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
+from src.database.manager import SQLITE_MAX_PARAMS, padded_batch_size, padded_in_params
+from src.utils.cache import cached_lookup, store_cached
+
+# Interaction severities that need a safety warning
+SEVERE_INTERACTION_LEVELS = frozenset({'severe', 'contraindicated'})
+
+
+def is_severe_interaction(interaction: Optional[Dict]) -> bool:
+    """Return True if an interaction row is severe or contraindicated."""
+    return bool(interaction) and interaction.get('interaction_severity') in SEVERE_INTERACTION_LEVELS
 
 
 class DrugInteractionsManager:
@@ -17,9 +27,13 @@ class DrugInteractionsManager:
         self.conn = None
         
     def connect(self) -> bool:
-        """Connect to the database."""
+        """Connect to the database, reusing the connection if it is already open."""
+        if self.conn is not None:
+            return True
+        
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Agents run lookups on this connection from worker threads
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
             return True
         except Exception as e:
@@ -324,22 +338,76 @@ class DrugInteractionsManager:
         count = cursor.fetchone()[0]
         print(f"✅ Inserted {count} drug interactions")
     
+    # Keyed in the order given: a row stored in that order wins over one stored reversed
+    @cached_lookup()
     def check_interactions(self, drug1: str, drug2: str) -> Optional[Dict]:
         """Check for interactions between two drugs."""
         if not self.conn:
             return None
         
         cursor = self.conn.cursor()
+        # Same preference as check_interactions_bulk: the given order, then lowest id
         cursor.execute('''
             SELECT * FROM drug_interactions 
             WHERE (drug1_name = ? AND drug2_name = ?) OR (drug1_name = ? AND drug2_name = ?)
-        ''', (drug1, drug2, drug2, drug1))
+            ORDER BY drug1_name = ? DESC, id
+            LIMIT 1
+        ''', (drug1, drug2, drug2, drug1, drug1))
         
         result = cursor.fetchone()
         if result:
             return dict(result)
         return None
     
+    def check_interactions_bulk(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[Dict]]:
+        """
+        Check several drug pairs for interactions with one query per chunk.
+        
+        Args:
+            pairs (List[Tuple[str, str]]): Drug pairs to check
+            
+        Returns:
+            Dict[Tuple[str, str], Optional[Dict]]: check_interactions result per
+                pair as given, which are also cached for that method
+        """
+        results = {pair: None for pair in pairs}
+        if not self.conn or not results:
+            return results
+        
+        wanted = list(results)
+        cursor = self.conn.cursor()
+        # Each pair is bound twice, once per column order
+        chunk_size = SQLITE_MAX_PARAMS // 4
+        for i in range(0, len(wanted), chunk_size):
+            chunk = wanted[i:i + chunk_size]
+            # Padded with NULL pairs so the prepared statement is reused
+            size = padded_batch_size(len(chunk), chunk_size)
+            values = ",".join(["(?,?)"] * (2 * size))
+            params = [name for drug1, drug2 in chunk for name in (drug1, drug2, drug2, drug1)]
+            params += [None] * (4 * (size - len(chunk)))
+            cursor.execute(f'''
+                SELECT * FROM drug_interactions 
+                WHERE (drug1_name, drug2_name) IN (VALUES {values})
+                ORDER BY id
+            ''', params)
+            
+            reversed_matches = {}
+            for row in cursor.fetchall():
+                interaction = dict(row)
+                pair = (interaction['drug1_name'], interaction['drug2_name'])
+                if pair in results and results[pair] is None:
+                    results[pair] = interaction
+                reversed_matches.setdefault(pair[::-1], interaction)
+            
+            # Pairs stored only in the other column order
+            for pair in chunk:
+                if results[pair] is None:
+                    results[pair] = reversed_matches.get(pair)
+        
+        for pair, interaction in results.items():
+            store_cached(self.check_interactions, interaction, *pair)
+        return results
+    
     def check_multiple_interactions(self, drug_list: List[str]) -> List[Dict]:
         """Check for interactions among multiple drugs."""
         interactions = []
@@ -352,6 +420,7 @@ class DrugInteractionsManager:
         
         return interactions
     
+    @cached_lookup()
     def get_drug_interactions(self, drug_name: str) -> List[Dict]:
         """Get all known interactions for a specific drug."""
         if not self.conn:
@@ -361,11 +430,49 @@ class DrugInteractionsManager:
         cursor.execute('''
             SELECT * FROM drug_interactions 
             WHERE drug1_name = ? OR drug2_name = ?
-            ORDER BY interaction_severity DESC
+            ORDER BY interaction_severity DESC, id
         ''', (drug_name, drug_name))
         
         return [dict(row) for row in cursor.fetchall()]
     
+    def get_drug_interactions_batch(self, drug_names: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Get all known interactions for several drugs with one query per chunk.
+        
+        Args:
+            drug_names (List[str]): Drug names to look up
+            
+        Returns:
+            Dict[str, List[Dict]]: Interactions per drug name, in the same order
+                as get_drug_interactions, which are also cached for that method
+        """
+        results = {name: [] for name in drug_names}
+        if not self.conn or not results:
+            return results
+        
+        names = list(results)
+        cursor = self.conn.cursor()
+        # Each name is bound twice, once per drug column
+        chunk_size = SQLITE_MAX_PARAMS // 2
+        for i in range(0, len(names), chunk_size):
+            chunk = names[i:i + chunk_size]
+            placeholders, params = padded_in_params(chunk, chunk_size)
+            cursor.execute(f'''
+                SELECT * FROM drug_interactions 
+                WHERE drug1_name IN ({placeholders}) OR drug2_name IN ({placeholders})
+                ORDER BY interaction_severity DESC, id
+            ''', params + params)
+            
+            in_chunk = set(chunk)
+            for row in cursor.fetchall():
+                interaction = dict(row)
+                for name in {interaction['drug1_name'], interaction['drug2_name']} & in_chunk:
+                    results[name].append(dict(interaction))
+        
+        for name, interactions in results.items():
+            store_cached(self.get_drug_interactions, interactions, name)
+        return results
+    
     def get_severe_interactions(self) -> List[Dict]:
         """Get all severe and contraindicated interactions."""
         if not self.conn:
@@ -7,6 +7,8 @@ import sqlite3
 import json
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
+from src.database.manager import SQLITE_MAX_PARAMS, padded_in_params
+from src.utils.cache import cached_lookup, store_cached
 
 
 class DrugEffectivenessManager:
@@ -17,9 +19,13 @@ class DrugEffectivenessManager:
         self.conn = None
         
     def connect(self) -> bool:
-        """Connect to the database."""
+        """Connect to the database, reusing the connection if it is already open."""
+        if self.conn is not None:
+            return True
+        
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Agents run lookups on this connection from worker threads
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
             return True
         except Exception as e:
@@ -340,6 +346,7 @@ class DrugEffectivenessManager:
         count = cursor.fetchone()[0]
         print(f"✅ Inserted {count} effectiveness records")
     
+    @cached_lookup()
     def get_effectiveness_for_medicine(self, medicine_name: str) -> List[Dict]:
         """Get all effectiveness data for a specific medicine."""
         if not self.conn:
@@ -349,11 +356,44 @@ class DrugEffectivenessManager:
         cursor.execute('''
             SELECT * FROM drug_effectiveness 
             WHERE medicine_name = ?
-            ORDER BY effectiveness_rating DESC
+            ORDER BY effectiveness_rating DESC, id
         ''', (medicine_name,))
         
         return [dict(row) for row in cursor.fetchall()]
     
+    def get_effectiveness_batch(self, medicine_names: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Get all effectiveness data for several medicines with one query per chunk.
+        
+        Args:
+            medicine_names (List[str]): Medicine names to look up
+            
+        Returns:
+            Dict[str, List[Dict]]: Effectiveness rows per medicine name, in the
+                same order as get_effectiveness_for_medicine, which are also
+                cached for that method
+        """
+        results = {name: [] for name in medicine_names}
+        if not self.conn or not results:
+            return results
+        
+        names = list(results)
+        cursor = self.conn.cursor()
+        for i in range(0, len(names), SQLITE_MAX_PARAMS):
+            placeholders, params = padded_in_params(names[i:i + SQLITE_MAX_PARAMS])
+            cursor.execute(f'''
+                SELECT * FROM drug_effectiveness 
+                WHERE medicine_name IN ({placeholders})
+                ORDER BY effectiveness_rating DESC, id
+            ''', params)
+            
+            for row in cursor.fetchall():
+                results[row['medicine_name']].append(dict(row))
+        
+        for name, effectiveness in results.items():
+            store_cached(self.get_effectiveness_for_medicine, effectiveness, name)
+        return results
+    
     def get_effectiveness_for_condition(self, condition: str) -> List[Dict]:
         """Get effectiveness data for all medicines treating a condition."""
         if not self.conn:
@@ -4,73 +4,245 @@ Medicine Database Manager
 Handles database operations for finding cost-effective alternatives.
 """
 
+import re
 import sqlite3
+import threading
+from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import json
 
+# Stay under SQLite's default limit on bound parameters per statement
+SQLITE_MAX_PARAMS = 900
+
+
+def padded_batch_size(count: int, limit: int = SQLITE_MAX_PARAMS) -> int:
+    """
+    Round a batch size up to a power of two, capped at limit.
+    
+    Batch queries pad their IN lists to this size so that batches of
+    different lengths share SQL text and reuse the prepared statement
+    sqlite3 caches per connection.
+    """
+    size = 1
+    while size < count:
+        size *= 2
+    return min(size, limit)
+
+
+def padded_in_params(chunk: List, limit: int = SQLITE_MAX_PARAMS) -> Tuple[str, List]:
+    """
+    Build IN-list placeholders and parameters padded with NULLs.
+    
+    NULL never matches in an IN list, so the padding does not change results.
+    
+    Args:
+        chunk (List): Values for the IN list, at most limit of them
+        limit (int): Chunk size used by the caller
+    
+    Returns:
+        Tuple[str, List]: The "?,?,..." placeholders and the padded parameters
+    """
+    size = padded_batch_size(len(chunk), limit)
+    return ",".join("?" * size), list(chunk) + [None] * (size - len(chunk))
+
+_QUANTITY_NUMBER = re.compile(r'\d+')
+
 class MedicineDatabaseManager:
     """Manages medicine database operations for finding alternatives."""
     
     def __init__(self, db_path: str = "data/medicines.db"):
         self.db_path = db_path
         self.conn = None
-        self.cursor = None
+        self._known_generics: Dict[str, str] = {}
+        self._has_name_fts = False
+        # Serialises connecting, closing and writes on the shared connection
+        self._lock = threading.Lock()
+
+    def connect(self, read_only: bool = False):
+        """
+        Connect to SQLite database.
+        
+        The connection is kept until close(); calling connect() again while it
+        is open reuses it.
         
-    def connect(self):
-        """Connect to SQLite database."""
+        Args:
+            read_only (bool): Open a lookup-only connection that may be used from
+                worker threads; auxiliary tables and caches are not prepared
+        """
+        # Taken even when connected, so no caller sees a half-prepared connection
+        with self._lock:
+            if self.conn is not None:
+                return True
+            
+            try:
+                if read_only:
+                    uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+                    self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                    self._has_name_fts = self._name_fts_exists()
+                    return True
+                
+                # May be shared across request threads (see get_multi_db_manager):
+                # every method runs its queries on its own cursor, and writes and
+                # commits hold self._lock
+                self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._configure()
+                self._ensure_schema()
+                self._ensure_name_fts()
+                self._load_known_generics()
+                return True
+            except Exception as e:
+                print(f"❌ Error connecting to database: {e}")
+                return False
+    
+    def _configure(self):
+        """Apply connection-wide PRAGMAs once per connection."""
         try:
-            self.conn = sqlite3.connect(self.db_path)
-            self.cursor = self.conn.cursor()
-            return True
-        except Exception as e:
-            print(f"❌ Error connecting to database: {e}")
+            cursor = self.conn.cursor()
+            # WAL lets the read-only lookup connections read while this one writes
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.execute("PRAGMA cache_size=-20000")
+            cursor.execute("PRAGMA temp_store=MEMORY")
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not configure database connection: {e}")
+    
+    def _ensure_schema(self):
+        """Create auxiliary tables and indexes used alongside the medicines table."""
+        try:
+            cursor = self.conn.cursor()
+            # Generic names determined by the AI agent, keyed by lowercased medicine name
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS generic_cache (
+                    name TEXT PRIMARY KEY,
+                    generic TEXT NOT NULL
+                )
+            """)
+            # Known generics are matched in memory (_known_generics), so the
+            # LOWER(generic_name) index earlier versions built is never used
+            cursor.execute("DROP INDEX IF EXISTS idx_generic_lower")
+            # Also created by create_db.py; ensured here for databases built before it did
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_med_name_lower
+                ON medicines(LOWER(name))
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_med_generic_price
+                ON medicines(generic_name, price, stock_quantity)
+            """)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not prepare auxiliary tables: {e}")
+    
+    def _name_fts_exists(self) -> bool:
+        """Check whether the medicines_fts trigram index has been created."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'medicines_fts'")
+            return cursor.fetchone() is not None
+        except sqlite3.Error:
             return False
+    
+    def _ensure_name_fts(self):
+        """
+        Create the trigram full-text index used for substring name lookups.
+        
+        medicines_fts is an external-content FTS5 table over medicines.name,
+        kept in sync by triggers, so '%name%' lookups are answered from the
+        trigram index instead of scanning every row. Without FTS5 or its
+        trigram tokenizer (SQLite 3.34+) lookups fall back to a LIKE scan.
+        """
+        if self._name_fts_exists():
+            self._has_name_fts = True
+            return
+        
+        try:
+            cursor = self.conn.cursor()
+            cursor.executescript("""
+                BEGIN;
+                CREATE VIRTUAL TABLE medicines_fts USING fts5(
+                    name, content='medicines', content_rowid='id', tokenize='trigram'
+                );
+                CREATE TRIGGER IF NOT EXISTS medicines_fts_insert AFTER INSERT ON medicines BEGIN
+                    INSERT INTO medicines_fts(rowid, name) VALUES (new.id, new.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS medicines_fts_delete AFTER DELETE ON medicines BEGIN
+                    INSERT INTO medicines_fts(medicines_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS medicines_fts_update AFTER UPDATE OF name ON medicines BEGIN
+                    INSERT INTO medicines_fts(medicines_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                    INSERT INTO medicines_fts(rowid, name) VALUES (new.id, new.name);
+                END;
+                INSERT INTO medicines_fts(medicines_fts) VALUES ('rebuild');
+                COMMIT;
+            """)
+            self._has_name_fts = True
+        except sqlite3.Error as e:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            print(f"⚠️ Substring name lookups will scan the medicines table: {e}")
+            self._has_name_fts = False
+    
+    def _load_known_generics(self):
+        """Load the generic names present in the database, keyed by lowercase name."""
+        try:
+            cursor = self.conn.cursor()
+            cursor.execute("SELECT DISTINCT generic_name FROM medicines")
+            self._known_generics = {row[0].lower(): row[0] for row in cursor.fetchall() if row[0]}
+        except sqlite3.Error as e:
+            print(f"⚠️ Could not load known generic names: {e}")
+            self._known_generics = {}
+    
+    def get_known_generic(self, medicine_name: str) -> Optional[str]:
+        """Return the database spelling if the name is itself a known generic."""
+        return self._known_generics.get(medicine_name.strip().lower())
             
     def close(self):
         """Close database connection."""
-        if self.conn:
-            self.conn.close()
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+            self.conn = None
     
     def get_medicine_info(self, medicine_name: str) -> Optional[Dict]:
         """Get medicine information from database."""
         try:
+            cursor = self.conn.cursor()
             # Try exact match first
-            self.cursor.execute("""
+            cursor.execute("""
                 SELECT name, class, price, stock_quantity, generic_name, manufacturer
                 FROM medicines 
                 WHERE LOWER(name) = LOWER(?)
                 LIMIT 1
             """, (medicine_name,))
             
-            result = self.cursor.fetchone()
+            result = cursor.fetchone()
             if result:
-                return {
-                    "name": result[0],
-                    "class": result[1],
-                    "price": result[2],
-                    "stock_quantity": result[3],
-                    "generic_name": result[4],
-                    "manufacturer": result[5]
-                }
+                return self._medicine_info_from_row(result)
             
             # Try partial match
-            self.cursor.execute("""
-                SELECT name, class, price, stock_quantity, generic_name, manufacturer
-                FROM medicines 
-                WHERE LOWER(name) LIKE LOWER(?)
-                LIMIT 1
-            """, (f"%{medicine_name}%",))
+            if self._has_name_fts:
+                # Trigram LIKE is case-insensitive; take the first match in table order
+                cursor.execute("""
+                    SELECT name, class, price, stock_quantity, generic_name, manufacturer
+                    FROM medicines 
+                    WHERE id = (
+                        SELECT rowid FROM medicines_fts
+                        WHERE name LIKE ?
+                        ORDER BY rowid
+                        LIMIT 1
+                    )
+                """, (f"%{medicine_name}%",))
+            else:
+                cursor.execute("""
+                    SELECT name, class, price, stock_quantity, generic_name, manufacturer
+                    FROM medicines 
+                    WHERE LOWER(name) LIKE LOWER(?)
+                    LIMIT 1
+                """, (f"%{medicine_name}%",))
             
-            result = self.cursor.fetchone()
+            result = cursor.fetchone()
             if result:
-                return {
-                    "name": result[0],
-                    "class": result[1],
-                    "price": result[2],
-                    "stock_quantity": result[3],
-                    "generic_name": result[4],
-                    "manufacturer": result[5]
-                }
+                return self._medicine_info_from_row(result)
             
             return None
             
@@ -78,10 +250,98 @@ class MedicineDatabaseManager:
             print(f"❌ Error getting medicine info: {e}")
             return None
     
+    def get_medicine_info_bulk(self, medicine_names: List[str]) -> Dict[str, Optional[Dict]]:
+        """
+        Get medicine information for many names at once.
+        
+        Exact (case-insensitive) matches are fetched with one IN query per
+        SQLITE_MAX_PARAMS names; only names without an exact match fall back
+        to the partial-match lookup of get_medicine_info.
+        
+        Returns:
+            dict: Medicine info (or None) keyed by each requested name
+        """
+        names = list(dict.fromkeys(medicine_names))
+        exact = {}
+        try:
+            cursor = self.conn.cursor()
+            keys = list({name.lower() for name in names})
+            for i in range(0, len(keys), SQLITE_MAX_PARAMS):
+                placeholders, params = padded_in_params(keys[i:i + SQLITE_MAX_PARAMS])
+                cursor.execute(f"""
+                    SELECT name, class, price, stock_quantity, generic_name, manufacturer
+                    FROM medicines 
+                    WHERE LOWER(name) IN ({placeholders})
+                    ORDER BY rowid
+                """, params)
+                
+                for row in cursor.fetchall():
+                    # Keep the first row per name, as LIMIT 1 does for single lookups
+                    exact.setdefault(row[0].lower(), self._medicine_info_from_row(row))
+                    
+        except Exception as e:
+            print(f"❌ Error getting medicine info: {e}")
+        
+        results = {}
+        for name in names:
+            info = exact.get(name.lower())
+            results[name] = info if info else self.get_medicine_info(name)
+        return results
+    
+    def _medicine_info_from_row(self, row: Tuple) -> Dict:
+        """Convert a medicines row into an info dict."""
+        return {
+            "name": row[0],
+            "class": row[1],
+            "price": row[2],
+            "stock_quantity": row[3],
+            "generic_name": row[4],
+            "manufacturer": row[5]
+        }
+    
+    def get_cached_generics(self, medicine_names: List[str]) -> Dict[str, str]:
+        """Get previously determined generic names for the given medicines."""
+        if not medicine_names:
+            return {}
+        try:
+            cursor = self.conn.cursor()
+            keys = {name: name.strip().lower() for name in medicine_names}
+            placeholders = ",".join("?" * len(keys))
+            cursor.execute(f"""
+                SELECT name, generic
+                FROM generic_cache
+                WHERE name IN ({placeholders})
+            """, list(keys.values()))
+            
+            found = dict(cursor.fetchall())
+            return {name: found[key] for name, key in keys.items() if key in found}
+            
+        except Exception as e:
+            print(f"❌ Error reading generic cache: {e}")
+            return {}
+    
+    def cache_generics(self, generics: Dict[str, str]):
+        """Store determined generic names so later runs can skip the AI lookup."""
+        if not generics:
+            return
+        try:
+            rows = [(name.strip().lower(), generic) for name, generic in generics.items()]
+            with self._lock:
+                cursor = self.conn.cursor()
+                cursor.executemany("""
+                    INSERT OR REPLACE INTO generic_cache (name, generic)
+                    VALUES (?, ?)
+                """, rows)
+                self.conn.commit()
+            
+        except Exception as e:
+            print(f"❌ Error writing generic cache: {e}")
+    
     def get_medicines_by_generic(self, generic_name: str, min_stock: int = 10) -> List[Dict]:
         """Get all medicines with the same generic name and sufficient stock."""
         try:
-            self.cursor.execute("""
+            cursor = self.conn.cursor()
+            cursor.execute("""
                 SELECT name, price, stock_quantity, generic_name, manufacturer, class
                 FROM medicines 
                 WHERE generic_name = ? AND stock_quantity >= ?
@@ -89,7 +349,7 @@ class MedicineDatabaseManager:
             """, (generic_name, min_stock))
             
             medicines = []
-            for row in self.cursor.fetchall():
+            for row in cursor.fetchall():
                 medicines.append({
                     "name": row[0],
                     "price": row[1],
@@ -108,45 +368,49 @@ class MedicineDatabaseManager:
     def find_cheapest_alternatives(self, medicine_name: str, generic_name: str, 
                                  original_price: float, quantity_needed: str, 
                                  min_stock: int = 10, limit: int = 3) -> List[Dict]:
-        """Find cheapest alternatives with the same generic name."""
+        """
+        Find cheapest alternatives with the same generic name.
+        
+        Filtering, ordering and the limit are applied in SQL, served by the
+        (generic_name, price, stock_quantity) index, so only the returned
+        alternatives are fetched.
+        """
         try:
-            # Get all medicines with the same generic name and sufficient stock
-            medicines = self.get_medicines_by_generic(generic_name, min_stock)
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT name, price, stock_quantity, generic_name, manufacturer, class,
+                       ? - price AS savings_amount
+                FROM medicines 
+                WHERE generic_name = ? AND stock_quantity >= ? AND price < ?
+                  AND LOWER(name) != LOWER(?)
+                ORDER BY price ASC
+                LIMIT ?
+            """, (original_price, generic_name, min_stock, original_price, medicine_name, limit))
+            rows = cursor.fetchall()
+            
+            quantity_number = self.extract_quantity_number(quantity_needed)
             
-            # Filter out the original medicine and sort by price
             alternatives = []
-            for medicine in medicines:
-                # Skip if it's the same medicine (case-insensitive)
-                if medicine["name"].lower() != medicine_name.lower():
-                    alternatives.append(medicine)
-            
-            # Sort by price (ascending) and filter only cheaper alternatives
-            alternatives.sort(key=lambda x: x["price"])
-            
-            # Filter only alternatives that are cheaper than original
-            cheaper_alternatives = []
-            for alt in alternatives:
-                if alt["price"] < original_price:
-                    cheaper_alternatives.append(alt)
-            
-            # Take top alternatives (up to limit, but only if they're cheaper)
-            top_alternatives = cheaper_alternatives[:limit]
-            
-            # Calculate savings for each alternative
-            for alt in top_alternatives:
-                savings_amount = original_price - alt["price"]
+            for row in rows:
+                savings_amount = row[6]
                 savings_percent = (savings_amount / original_price) * 100 if original_price > 0 else 0
-                
                 # Calculate total savings based on quantity needed
-                quantity_number = self.extract_quantity_number(quantity_needed)
                 total_savings = savings_amount * quantity_number
                 
-                alt["savings_amount"] = round(savings_amount, 2)
-                alt["savings_percent"] = round(savings_percent, 1)
-                alt["total_savings"] = round(total_savings, 2)
-                alt["quantity_needed"] = quantity_needed
+                alternatives.append({
+                    "name": row[0],
+                    "price": row[1],
+                    "stock_quantity": row[2],
+                    "generic_name": row[3],
+                    "manufacturer": row[4],
+                    "class": row[5],
+                    "savings_amount": round(savings_amount, 2),
+                    "savings_percent": round(savings_percent, 1),
+                    "total_savings": round(total_savings, 2),
+                    "quantity_needed": quantity_needed
+                })
             
-            return top_alternatives
+            return alternatives
             
         except Exception as e:
             print(f"❌ Error finding alternatives: {e}")
@@ -155,13 +419,14 @@ class MedicineDatabaseManager:
     def get_market_price_estimate(self, medicine_name: str, generic_name: str) -> float:
         """Estimate market price based on generic average."""
         try:
-            self.cursor.execute("""
+            cursor = self.conn.cursor()
+            cursor.execute("""
                 SELECT AVG(price) as avg_price
                 FROM medicines 
                 WHERE generic_name = ?
             """, (generic_name,))
             
-            result = self.cursor.fetchone()
+            result = cursor.fetchone()
             if result and result[0]:
                 return round(result[0], 2)
             else:
@@ -174,27 +439,31 @@ class MedicineDatabaseManager:
     
     def extract_quantity_number(self, quantity_str: str) -> int:
         """Extract numeric quantity from quantity string."""
-        import re
         try:
-            # Extract numbers from quantity string (e.g., "10 tablets" -> 10)
-            numbers = re.findall(r'\d+', quantity_str)
-            if numbers:
-                return int(numbers[0])
+            # Plain numbers ("10") need no regex search
+            if quantity_str.isdecimal():
+                return int(quantity_str)
+            # Extract the first number from quantity string (e.g., "10 tablets" -> 10)
+            match = _QUANTITY_NUMBER.search(quantity_str)
+            if match:
+                return int(match.group())
             return 1  # Default to 1 if no number found
-        except:
+        except (AttributeError, TypeError):
+            # Not a string
             return 1
     
     def check_stock_availability(self, medicine_name: str, required_quantity: int) -> bool:
         """Check if medicine has sufficient stock."""
         try:
-            self.cursor.execute("""
+            cursor = self.conn.cursor()
+            cursor.execute("""
                 SELECT stock_quantity
                 FROM medicines 
                 WHERE LOWER(name) = LOWER(?)
                 LIMIT 1
             """, (medicine_name,))
             
-            result = self.cursor.fetchone()
+            result = cursor.fetchone()
             if result:
                 return result[0] >= required_quantity
             return False
@@ -3,18 +3,20 @@ Multi-Database Manager
 Unified interface for querying all medical databases intelligently.
 """
 
+import atexit
 import sqlite3
 import json
+import threading
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple, Any
 from dataclasses import dataclass
 
 # Import individual database managers
 from src.database.manager import MedicineDatabaseManager
-from src.database.drug_interactions_db import DrugInteractionsManager
+from src.database.drug_interactions_db import DrugInteractionsManager, is_severe_interaction
 from src.database.conditions_db import MedicalConditionsManager
 from src.database.dosage_db import DosageGuidelinesManager
-from src.database.side_effects_db import SideEffectsManager
+from src.database.side_effects_db import SideEffectsManager, is_severe_side_effect
 from src.database.effectiveness_db import DrugEffectivenessManager
 from src.database.patterns_db import PrescriptionPatternsManager
 
@@ -87,7 +89,10 @@ class MultiDatabaseManager:
         self._connected = False
     
     def connect_all(self) -> bool:
-        """Connect to all databases."""
+        """Connect to all databases; a no-op if they are already connected."""
+        if self._connected:
+            return True
+        
         try:
             connections = [
                 self.medicine_db.connect(),
@@ -366,14 +371,12 @@ class MultiDatabaseManager:
         warnings = []
         
         # Severe interactions
-        severe_interactions = [i for i in insight.interactions 
-                             if i.get('interaction_severity') in ['severe', 'contraindicated']]
+        severe_interactions = [i for i in insight.interactions if is_severe_interaction(i)]
         for interaction in severe_interactions:
             warnings.append(f"⚠️ SEVERE INTERACTION with {interaction.get('drug2_name', 'unknown drug')}: {interaction.get('description', '')}")
         
         # Severe side effects
-        severe_effects = [se for se in insight.side_effects 
-                         if se.get('severity') in ['severe', 'life_threatening']]
+        severe_effects = [se for se in insight.side_effects if is_severe_side_effect(se)]
         for effect in severe_effects:
             warnings.append(f"⚠️ SEVERE SIDE EFFECT: {effect.get('side_effect', '')} - {effect.get('description', '')}")
         
@@ -437,8 +440,7 @@ class MultiDatabaseManager:
                 monitoring.append(pattern.get('monitoring_requirements', ''))
         
         # From side effects
-        severe_effects = [se for se in insight.side_effects 
-                         if se.get('severity') in ['severe', 'life_threatening']]
+        severe_effects = [se for se in insight.side_effects if is_severe_side_effect(se)]
         for effect in severe_effects:
             if effect.get('when_to_seek_help'):
                 monitoring.append(f"Seek help if: {effect.get('when_to_seek_help', '')}")
@@ -468,8 +470,7 @@ class MultiDatabaseManager:
             score += condition_effectiveness[0].get('effectiveness_rating', 0) * 0.4
         
         # Safety score (inverse of severe side effects)
-        severe_effects = len([se for se in insight.side_effects 
-                            if se.get('severity') in ['severe', 'life_threatening']])
+        severe_effects = sum(1 for se in insight.side_effects if is_severe_side_effect(se))
         safety_score = max(0, 100 - (severe_effects * 20))
         score += safety_score * 0.3
         
@@ -494,8 +495,7 @@ class MultiDatabaseManager:
         warnings = []
         
         # Interaction warnings
-        severe_interactions = [i for i in safety_analysis["interactions_found"] 
-                             if i.get('interaction_severity') in ['severe', 'contraindicated']]
+        severe_interactions = [i for i in safety_analysis["interactions_found"] if is_severe_interaction(i)]
         if severe_interactions:
             warnings.append(f"🚨 {len(severe_interactions)} SEVERE drug interaction(s) detected")
         
@@ -557,6 +557,28 @@ class MultiDatabaseManager:
         return guidelines
 
 
+_shared_manager: Optional[MultiDatabaseManager] = None
+_shared_manager_lock = threading.Lock()
+
+
+def get_multi_db_manager() -> MultiDatabaseManager:
+    """
+    Return the process-wide MultiDatabaseManager.
+    
+    Its connections are opened on first use and kept open for later
+    requests, then closed when the interpreter exits.
+    
+    Returns:
+        MultiDatabaseManager: Shared manager instance
+    """
+    global _shared_manager
+    with _shared_manager_lock:
+        if _shared_manager is None:
+            _shared_manager = MultiDatabaseManager()
+            atexit.register(_shared_manager.close_all)
+        return _shared_manager
+
+
 def test_multi_database_manager():
     """Test the multi-database manager functionality."""
     print("🧪 Testing Multi-Database Manager...")
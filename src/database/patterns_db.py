@@ -17,9 +17,13 @@ class PrescriptionPatternsManager:
         self.conn = None
         
     def connect(self) -> bool:
-        """Connect to the database."""
+        """Connect to the database, reusing the connection if it is already open."""
+        if self.conn is not None:
+            return True
+        
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Agents run lookups on this connection from worker threads
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
             return True
         except Exception as e:
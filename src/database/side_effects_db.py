@@ -7,6 +7,16 @@ import sqlite3
 import json
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
+from src.database.manager import SQLITE_MAX_PARAMS, padded_in_params
+from src.utils.cache import cached_lookup, store_cached
+
+# Side effect severities that need a safety warning
+SEVERE_SIDE_EFFECT_LEVELS = frozenset({'severe', 'life_threatening'})
+
+
+def is_severe_side_effect(side_effect: Optional[Dict]) -> bool:
+    """Return True if a side effect row is severe or life threatening."""
+    return bool(side_effect) and side_effect.get('severity') in SEVERE_SIDE_EFFECT_LEVELS
 
 
 class SideEffectsManager:
@@ -17,9 +27,13 @@ class SideEffectsManager:
         self.conn = None
         
     def connect(self) -> bool:
-        """Connect to the database."""
+        """Connect to the database, reusing the connection if it is already open."""
+        if self.conn is not None:
+            return True
+        
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Agents run lookups on this connection from worker threads
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row
             return True
         except Exception as e:
@@ -392,6 +406,7 @@ class SideEffectsManager:
         count = cursor.fetchone()[0]
         print(f"✅ Inserted {count} side effects")
     
+    @cached_lookup()
     def get_side_effects_for_medicine(self, medicine_name: str) -> List[Dict]:
         """Get all side effects for a specific medicine."""
         if not self.conn:
@@ -401,11 +416,44 @@ class SideEffectsManager:
         cursor.execute('''
             SELECT * FROM side_effects 
             WHERE medicine_name = ?
-            ORDER BY frequency_percentage DESC
+            ORDER BY frequency_percentage DESC, id
         ''', (medicine_name,))
         
         return [dict(row) for row in cursor.fetchall()]
     
+    def get_side_effects_batch(self, medicine_names: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Get all side effects for several medicines with one query per chunk.
+        
+        Args:
+            medicine_names (List[str]): Medicine names to look up
+            
+        Returns:
+            Dict[str, List[Dict]]: Side effects per medicine name, in the same
+                order as get_side_effects_for_medicine, which are also cached
+                for that method
+        """
+        results = {name: [] for name in medicine_names}
+        if not self.conn or not results:
+            return results
+        
+        names = list(results)
+        cursor = self.conn.cursor()
+        for i in range(0, len(names), SQLITE_MAX_PARAMS):
+            placeholders, params = padded_in_params(names[i:i + SQLITE_MAX_PARAMS])
+            cursor.execute(f'''
+                SELECT * FROM side_effects 
+                WHERE medicine_name IN ({placeholders})
+                ORDER BY frequency_percentage DESC, id
+            ''', params)
+            
+            for row in cursor.fetchall():
+                results[row['medicine_name']].append(dict(row))
+        
+        for name, side_effects in results.items():
+            store_cached(self.get_side_effects_for_medicine, side_effects, name)
+        return results
+    
     def get_common_side_effects(self, medicine_name: str) -> List[Dict]:
         """Get common side effects (≥5% frequency) for a medicine."""
         if not self.conn:
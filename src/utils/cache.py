@@ -0,0 +1,190 @@
+"""
+Lookup Cache
+Time-limited memoization for the medical-database lookups that the agents
+repeat across prescriptions (common drugs such as aspirin show up again and again).
+"""
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+# Entries kept for drug lookups, and how long each stays valid
+DRUG_CACHE_SIZE = 4096
+DRUG_CACHE_TTL_SECONDS = 600
+
+# Complete prescription analyses kept, and how long each stays valid
+ANALYSIS_CACHE_SIZE = 512
+ANALYSIS_CACHE_TTL_SECONDS = 3600
+
+_MISSING = object()
+
+
+def _private_copy(result: Any) -> Any:
+    """
+    Deep-copy a lookup result so the cache and its callers never share it.
+    
+    Results are lists of row dicts, row dicts or dataclasses that callers
+    annotate in place; strings and other immutable values come back as is.
+    """
+    return copy.deepcopy(result)
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time."""
+    
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+    
+    def set(self, key: Hashable, value: Any):
+        """Store value under key, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop every entry and reset the hit/miss counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counts and the current number of entries."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+# Shared by every database manager method decorated with cached_lookup
+drug_cache = TTLCache(DRUG_CACHE_SIZE, DRUG_CACHE_TTL_SECONDS)
+
+# Finished LLM analyses as JSON text, keyed by a digest of the request
+analysis_cache = TTLCache(ANALYSIS_CACHE_SIZE, ANALYSIS_CACHE_TTL_SECONDS)
+
+
+def cached_lookup(key: Optional[Callable[..., Tuple]] = None, cache: TTLCache = drug_cache):
+    """
+    Cache a database manager lookup method in a TTLCache.
+    
+    Entries are keyed by method, the manager's db_path and the call arguments,
+    so managers on different files never share results. Calls made while the
+    manager is not connected bypass the cache, since they only return an empty
+    placeholder.
+    
+    The cache keeps its own deep copy of every result and hands each caller
+    a fresh deep copy, so callers may modify what they get back (e.g. add
+    fields to a row) without changing what later calls see.
+    
+    Args:
+        key (Callable, optional): Maps the call arguments to the cache key
+            arguments, e.g. to make a symmetric lookup order-independent
+        cache (TTLCache): Cache to store results in
+    
+    Returns:
+        Callable: Decorator for the lookup method
+    """
+    def decorator(method: Callable) -> Callable:
+        def cache_key(self, *args, **kwargs) -> Tuple:
+            call_key = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+            return (method.__qualname__, self.db_path, call_key)
+        
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if getattr(self, "conn", None) is None:
+                return method(self, *args, **kwargs)
+            
+            entry_key = cache_key(self, *args, **kwargs)
+            result = cache.get(entry_key, _MISSING)
+            if result is _MISSING:
+                result = method(self, *args, **kwargs)
+                cache.set(entry_key, _private_copy(result))
+                return result
+            return _private_copy(result)
+        
+        wrapper.cache = cache
+        wrapper.cache_key = cache_key
+        return wrapper
+    
+    return decorator
+
+
+def peek_cached(lookup: Callable, *args, **kwargs) -> Optional[Any]:
+    """
+    Return the cached result of a cached_lookup call without running it.
+    
+    Args:
+        lookup (Callable): Bound method decorated with cached_lookup
+        *args, **kwargs: Arguments the method would be called with
+    
+    Returns:
+        Optional[Any]: Deep copy of the cached result, or None if it is not
+            cached or the manager is not connected
+    """
+    manager = lookup.__self__
+    if getattr(manager, "conn", None) is None:
+        return None
+    
+    result = lookup.cache.get(lookup.cache_key(manager, *args, **kwargs))
+    return None if result is None else _private_copy(result)
+
+
+def store_cached(lookup: Callable, result: Any, *args, **kwargs):
+    """
+    Store a result for a cached_lookup call that was computed another way,
+    e.g. by a batched query returning the same rows.
+    
+    A deep copy is stored, so the caller keeps ownership of result.
+    
+    Args:
+        lookup (Callable): Bound method decorated with cached_lookup
+        result (Any): Result the method would have returned
+        *args, **kwargs: Arguments the method would be called with
+    """
+    manager = lookup.__self__
+    if getattr(manager, "conn", None) is not None:
+        lookup.cache.set(lookup.cache_key(manager, *args, **kwargs), _private_copy(result))
+
+
+def peek_cached_many(lookup: Callable, keys: List[Any], *args) -> Tuple[Dict[Any, Any], List[Any]]:
+    """
+    Peek at the cached results of a cached_lookup method for several keys.
+    
+    Args:
+        lookup (Callable): Bound method decorated with cached_lookup
+        keys (List[Any]): First argument of each call, e.g. medicine names
+        *args: Remaining arguments, shared by every call
+    
+    Returns:
+        Tuple[Dict[Any, Any], List[Any]]: Cached results by key, and the keys
+            that still have to be fetched
+    """
+    found, missing = {}, []
+    for key in dict.fromkeys(keys):
+        result = peek_cached(lookup, key, *args)
+        if result is None:
+            missing.append(key)
+        else:
+            found[key] = result
+    return found, missing
@@ -5,11 +5,94 @@ Provides fuzzy matching capabilities for medicine names without modifying existi
 This is a standalone module that can be safely added alongside existing functionality.
 """
 
+import copy
+import heapq
 import re
 import sqlite3
-from typing import List, Dict, Tuple, Optional
-from fuzzywuzzy import fuzz, process
-from src.database.manager import MedicineDatabaseManager
+import threading
+from array import array
+from functools import lru_cache
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Dict, Set, Tuple, Optional
+import numpy as np
+from rapidfuzz import fuzz, process
+from src.database.manager import MedicineDatabaseManager, SQLITE_MAX_PARAMS
+
+# Dosage information (500mg, 10ml, 2 tablets, etc.) removed from names before matching
+_DOSAGE_PATTERN = re.compile(r'\d+\s*(?:mg|ml|g|mcg|tablets?|capsules?|tab|cap)\b', re.IGNORECASE)
+# Runs of word characters; everything between them collapses to one space
+_WORD_PATTERN = re.compile(r'\w+')
+
+# Common abbreviations expanded when they are the first word of a normalized name
+_ABBREVIATIONS = {
+    'tab': 'tablet',
+    'tabs': 'tablets', 
+    'cap': 'capsule',
+    'caps': 'capsules',
+    'paracet': 'paracetamol',
+    'ibupro': 'ibuprofen'
+}
+
+# Catalogues larger than this are scored on all cores; below it, starting
+# the worker threads costs more than it saves
+PARALLEL_SCORING_MIN_NAMES = 2000
+
+# Most recent search_with_suggestions results kept per loaded cache
+RESULT_CACHE_SIZE = 1024
+
+# Loaded name caches shared by every searcher on the same database file, keyed
+# by resolved path, so a newly built searcher does not copy the whole
+# medicines table into Python again.
+_SHARED_CACHES: Dict[str, Dict] = {}
+_SHARED_CACHES_LOCK = threading.Lock()
+
+def _data_version(watcher: MedicineDatabaseManager) -> Optional[int]:
+    """
+    Return PRAGMA data_version for a watcher connection.
+    
+    The value changes whenever another connection commits to the database,
+    so an unchanged value means a cache loaded after reading it is current.
+    """
+    try:
+        return watcher.conn.execute("PRAGMA data_version").fetchone()[0]
+    except (sqlite3.Error, AttributeError):
+        return None
+
+# Instance attributes holding a loaded cache, shared between searchers
+_CACHE_FIELDS = (
+    '_ids', '_names', '_generic_names', '_prices', '_stocks',
+    '_normalized', '_generic_arr', '_generic_index', '_trigram_index', '_results'
+)
+
+def _trigrams(text: str) -> Set[str]:
+    """Return the set of 3-character windows in text (empty if shorter)."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+@lru_cache(maxsize=4096)
+def _normalize_medicine_name(name: str) -> str:
+    """
+    Normalize a medicine name; memoized since the same query and generic
+    names are normalized repeatedly.
+    """
+    if not name:
+        return ""
+    
+    # Convert to lowercase
+    normalized = name.lower()
+    
+    # Remove dosage information (500mg, 10ml, etc.)
+    normalized = _DOSAGE_PATTERN.sub('', normalized)
+    
+    # Remove special characters and extra spaces in one pass
+    words = _WORD_PATTERN.findall(normalized)
+    
+    # Handle common abbreviations
+    if words and words[0] in _ABBREVIATIONS:
+        words[0] = _ABBREVIATIONS[words[0]]
+    
+    return ' '.join(words)
 
 class FuzzyMedicineSearch:
     """
@@ -21,8 +104,28 @@ class FuzzyMedicineSearch:
         """Initialize fuzzy search with database connection."""
         self.db_path = db_path
         self.db_manager = MedicineDatabaseManager(db_path)
-        self._medicine_cache = None
         self._cache_valid = False
+        # Cached medicines as parallel columns (struct of arrays): scoring
+        # only reads the normalized names, and the other columns are read
+        # just for the medicines that are returned. Manufacturer and class
+        # are not cached; they are fetched by rowid for returned matches.
+        self._ids = array('q')
+        self._names: List[str] = []
+        self._generic_names: List[str] = []
+        self._prices = array('d')
+        self._stocks = array('i')
+        self._normalized: List[str] = []
+        # Distinct normalized generic names, and each cached medicine's position in it
+        self._generic_arr: List[str] = []
+        self._generic_index = np.zeros(0, dtype=np.intp)
+        # Trigram of a normalized name -> indices of cached medicines containing it
+        self._trigram_index: Dict[str, Set[int]] = {}
+        # (query, limit) -> search_with_suggestions result, least recently used first
+        self._results: OrderedDict = OrderedDict()
+        
+    def close(self):
+        """Close the database connection kept open between searches."""
+        self.db_manager.close()
         
     def _normalize_name(self, name: str) -> str:
         """
@@ -34,97 +137,116 @@ class FuzzyMedicineSearch:
         Returns:
             str: Normalized name
         """
-        if not name:
-            return ""
-            
-        # Convert to lowercase
-        normalized = name.lower().strip()
-        
-        # Remove dosage information (500mg, 10ml, etc.)
-        dosage_patterns = [
-            r'\d+\s*mg\b',
-            r'\d+\s*ml\b', 
-            r'\d+\s*g\b',
-            r'\d+\s*mcg\b',
-            r'\d+\s*tablets?\b',
-            r'\d+\s*capsules?\b',
-            r'\d+\s*tab\b',
-            r'\d+\s*cap\b'
-        ]
-        
-        for pattern in dosage_patterns:
-            normalized = re.sub(pattern, '', normalized, flags=re.IGNORECASE)
-        
-        # Remove extra spaces and special characters
-        normalized = re.sub(r'[^\w\s]', ' ', normalized)
-        normalized = re.sub(r'\s+', ' ', normalized).strip()
-        
-        # Handle common abbreviations
-        abbreviations = {
-            'tab': 'tablet',
-            'tabs': 'tablets', 
-            'cap': 'capsule',
-            'caps': 'capsules',
-            'paracet': 'paracetamol',
-            'ibupro': 'ibuprofen'
-        }
-        
-        for abbrev, full in abbreviations.items():
-            if normalized == abbrev or normalized.startswith(abbrev + ' '):
-                normalized = normalized.replace(abbrev, full, 1)
-        
-        return normalized
+        return _normalize_medicine_name(name)
     
-    def _load_medicine_names(self) -> List[Dict]:
+    def _load_medicine_names(self) -> List[str]:
         """
         Load all medicine names from database for fuzzy matching.
         
         Returns:
-            List[Dict]: List of medicine records with names
+            List[str]: Medicine names, index-aligned with the cached columns
+        """
+        cache_key = str(Path(self.db_path).resolve())
+        with _SHARED_CACHES_LOCK:
+            shared = _SHARED_CACHES.get(cache_key)
+            if shared is not None:
+                version = _data_version(shared['watcher'])
+                if version is not None and version == shared['data_version']:
+                    self._use_shared_cache(shared)
+                    return self._names
+                # Table changed since it was loaded
+                shared['watcher'].close()
+                del _SHARED_CACHES[cache_key]
+            
+            return self._load_from_database(cache_key)
+    
+    def _use_shared_cache(self, shared: Dict):
+        """Point this searcher at a loaded cache shared with other searchers."""
+        for field in _CACHE_FIELDS:
+            setattr(self, field, shared[field])
+        self._cache_valid = True
+    
+    def _load_from_database(self, cache_key: str) -> List[str]:
         """
-        if self._cache_valid and self._medicine_cache:
-            return self._medicine_cache
+        Read every medicine into the in-memory cache and share it.
+        
+        Args:
+            cache_key (str): Resolved database path the cache is shared under
             
+        Returns:
+            List[str]: Medicine names, index-aligned with the cached columns
+        """
         try:
             if not self.db_manager.connect():
                 return []
+            
+            # Read the version before the rows so a commit in between makes
+            # the next load see a changed version and reload
+            watcher = MedicineDatabaseManager(self.db_path)
+            version = _data_version(watcher) if watcher.connect(read_only=True) else None
                 
             # Get all medicines from database
-            cursor = self.db_manager.cursor
+            cursor = self.db_manager.conn.cursor()
             cursor.execute("""
-                SELECT name, generic_name, manufacturer, class, price, stock_quantity
+                SELECT rowid, name, generic_name, price, stock_quantity
                 FROM medicines 
                 WHERE name IS NOT NULL AND name != ''
             """)
             
-            medicines = []
+            ids, names, generic_names, prices, stocks = [], [], [], [], []
             for row in cursor.fetchall():
-                medicines.append({
-                    'name': row[0],
-                    'generic_name': row[1] or '',
-                    'manufacturer': row[2] or '',
-                    'class': row[3] or '',
-                    'price': row[4] or 0,
-                    'stock_quantity': row[5] or 0,
-                    'normalized_name': self._normalize_name(row[0])
-                })
+                ids.append(row[0])
+                names.append(row[1])
+                generic_names.append(row[2] or '')
+                prices.append(row[3] or 0)
+                stocks.append(row[4] or 0)
+            
+            self._ids = array('q', ids)
+            self._names = names
+            self._generic_names = generic_names
+            self._prices = array('d', prices)
+            self._stocks = array('i', stocks)
+            self._normalized = [self._normalize_name(name) for name in names]
+            generic_ids: Dict[str, int] = {}
+            self._generic_index = np.array(
+                [generic_ids.setdefault(self._normalize_name(generic), len(generic_ids)) for generic in generic_names],
+                dtype=np.intp
+            )
+            self._generic_arr = list(generic_ids)
+            
+            trigram_index: Dict[str, Set[int]] = defaultdict(set)
+            for i, normalized_name in enumerate(self._normalized):
+                for trigram in _trigrams(normalized_name):
+                    trigram_index[trigram].add(i)
+            self._trigram_index = dict(trigram_index)
+            # Results computed from the previous load may be stale
+            self._results = OrderedDict()
             
-            self._medicine_cache = medicines
             self._cache_valid = True
             
-            return medicines
+            if version is not None:
+                shared = {field: getattr(self, field) for field in _CACHE_FIELDS}
+                shared['watcher'] = watcher
+                shared['data_version'] = version
+                _SHARED_CACHES[cache_key] = shared
+            else:
+                watcher.close()
+            
+            return names
             
         except Exception as e:
             print(f"Error loading medicine names: {e}")
             return []
-        finally:
-            if self.db_manager.conn:
-                self.db_manager.close()
     
     def search_fuzzy(self, query: str, limit: int = 5, min_score: int = 60) -> List[Dict]:
         """
         Perform fuzzy search for medicine names.
         
+        This is the entry point to use for scoring many names. It scores
+        through process.cdist, which builds the query's bit-parallel
+        pattern once and reuses it for every cached name; calling fuzz
+        scorers pair by pair would rebuild it for each name.
+        
         Args:
             query (str): Search query (medicine name)
             limit (int): Maximum number of results to return
@@ -142,50 +264,125 @@ class FuzzyMedicineSearch:
             return []
         
         # Load all medicine names
-        medicines = self._load_medicine_names()
-        if not medicines:
+        if not self._load_medicine_names():
             return []
         
-        # Perform fuzzy matching
+        # Score the query against every cached name in one batched WRatio
+        # call, which weighs ratio, partial_ratio and the token ratios in a
+        # single pass, then keep the better of it and the generic-name ratio
+        # per medicine. Scores below the cutoff come back as 0; the cutoff is
+        # half a point low because scores are rounded before comparison.
+        cutoff = max(min_score - 0.5, 0)
+        queries = [normalized_query]
+        workers = -1 if len(self._normalized) > PARALLEL_SCORING_MIN_NAMES else 1
+        scores = process.cdist(queries, self._normalized, scorer=fuzz.WRatio,
+                               score_cutoff=cutoff, dtype=np.float64, workers=workers)[0]
+        # Each distinct generic is scored once, then spread to its medicines;
+        # empty generic names score 0
+        generic_scores = process.cdist(queries, self._generic_arr, scorer=fuzz.ratio,
+                                       score_cutoff=cutoff, dtype=np.float64)[0]
+        np.maximum(scores, generic_scores[self._generic_index], out=scores)
+        
+        # RapidFuzz scores are floats; report whole percentages as before
+        scores = np.round(scores).astype(np.int64)
+        
+        # Highest scores first; ties keep database order (the sort is stable).
+        # Filtering and ranking stay in numpy, so Python only touches the
+        # returned matches
+        candidates = np.flatnonzero(scores >= min_score)
+        order = np.argsort(-scores[candidates], kind='stable')[:max(limit, 0)]
+        ranked = candidates[order].tolist()
+        ranked_scores = scores[candidates[order]].tolist()
+        
+        # Only build result dicts for the returned matches
+        details = self._load_details(ranked)
         matches = []
+        for i, score in zip(ranked, ranked_scores):
+            manufacturer, medicine_class = details.get(self._ids[i], ('', ''))
+            matches.append({
+                'name': self._names[i],
+                'generic_name': self._generic_names[i],
+                'manufacturer': manufacturer,
+                'class': medicine_class,
+                'price': self._prices[i],
+                'stock_quantity': self._stocks[i],
+                'similarity_score': score,
+                'match_type': 'fuzzy'
+            })
         
-        for medicine in medicines:
-            # Calculate similarity scores using different algorithms
-            name_score = fuzz.ratio(normalized_query, medicine['normalized_name'])
-            partial_score = fuzz.partial_ratio(normalized_query, medicine['normalized_name'])
-            token_score = fuzz.token_sort_ratio(normalized_query, medicine['normalized_name'])
-            
-            # Use the highest score
-            best_score = max(name_score, partial_score, token_score)
+        return matches
+    
+    def _load_details(self, indices: List[int]) -> Dict[int, Tuple[str, str]]:
+        """
+        Fetch the columns not kept in the cache for the given medicines.
+        
+        Args:
+            indices (List[int]): Positions of medicines in the cache
             
-            # Also check against generic name if available
-            if medicine['generic_name']:
-                normalized_generic = self._normalize_name(medicine['generic_name'])
-                generic_score = fuzz.ratio(normalized_query, normalized_generic)
-                best_score = max(best_score, generic_score)
+        Returns:
+            Dict[int, Tuple[str, str]]: (manufacturer, class) keyed by rowid
+        """
+        details = {}
+        if not indices:
+            return details
+        
+        try:
+            if not self.db_manager.connect():
+                return details
             
-            # Add to matches if above minimum score
-            if best_score >= min_score:
-                matches.append({
-                    'name': medicine['name'],
-                    'generic_name': medicine['generic_name'],
-                    'manufacturer': medicine['manufacturer'],
-                    'class': medicine['class'],
-                    'price': medicine['price'],
-                    'stock_quantity': medicine['stock_quantity'],
-                    'similarity_score': best_score,
-                    'match_type': 'fuzzy'
-                })
-        
-        # Sort by similarity score (highest first)
-        matches.sort(key=lambda x: x['similarity_score'], reverse=True)
-        
-        return matches[:limit]
+            rowids = [self._ids[i] for i in indices]
+            cursor = self.db_manager.conn.cursor()
+            for start in range(0, len(rowids), SQLITE_MAX_PARAMS):
+                chunk = rowids[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"""
+                    SELECT rowid, manufacturer, class
+                    FROM medicines
+                    WHERE rowid IN ({placeholders})
+                """, chunk)
+                for rowid, manufacturer, medicine_class in cursor.fetchall():
+                    details[rowid] = (manufacturer or '', medicine_class or '')
+        except sqlite3.Error as e:
+            print(f"Error loading medicine details: {e}")
+        
+        return details
     
     def search_with_suggestions(self, query: str, limit: int = 5) -> Dict:
         """
         Enhanced search with suggestions and confidence levels.
         
+        Args:
+            query (str): Search query
+            limit (int): Maximum results
+            
+        Returns:
+            Dict: Search results with metadata
+        """
+        # Queries repeat a lot while a user types. The result cache is part
+        # of the shared name cache, so it is dropped when the data changes.
+        self._load_medicine_names()
+        key = (query, limit)
+        with _SHARED_CACHES_LOCK:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
+        results = self._search_with_suggestions_uncached(query, limit)
+        
+        if self._cache_valid:
+            with _SHARED_CACHES_LOCK:
+                self._results[key] = copy.deepcopy(results)
+                if len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+        
+        return results
+    
+    def _search_with_suggestions_uncached(self, query: str, limit: int) -> Dict:
+        """
+        Run the exact and fuzzy searches behind search_with_suggestions.
+        
         Args:
             query (str): Search query
             limit (int): Maximum results
@@ -209,11 +406,8 @@ class FuzzyMedicineSearch:
                         'similarity_score': 100,
                         'match_type': 'exact'
                     })
-        except:
-            pass
-        finally:
-            if self.db_manager.conn:
-                self.db_manager.close()
+        except sqlite3.Error as e:
+            print(f"Error in exact match lookup: {e}")
         
         # If exact match found, return it first
         if exact_matches:
@@ -236,6 +430,68 @@ class FuzzyMedicineSearch:
             'suggestions': [match['name'] for match in all_matches[:3]]
         }
     
+    def match_many(self, queries: List[str], min_score: int = 85) -> List[Optional[Tuple[str, int]]]:
+        """
+        Find the best match for each of several medicine names at once.
+        
+        Picks the same top match as search_with_suggestions(query, limit=1):
+        a database match (exact, else partial) scores 100, otherwise the best
+        fuzzy match is used. Database matches are fetched in bulk, and every
+        remaining query is scored against the cached names in one
+        process.cdist call instead of one search per name.
+        
+        Args:
+            queries (List[str]): Medicine names to match
+            min_score (int): Minimum similarity score (0-100) for a fuzzy match
+        
+        Returns:
+            List[Optional[Tuple[str, int]]]: (matched name, score) per query,
+                or None where nothing scored at least min_score
+        """
+        matches: List[Optional[Tuple[str, int]]] = [None] * len(queries)
+        if not queries:
+            return matches
+        
+        db_matches = {}
+        try:
+            if self.db_manager.connect():
+                db_matches = self.db_manager.get_medicine_info_bulk(queries)
+        except sqlite3.Error as e:
+            print(f"Error in exact match lookup: {e}")
+        
+        pending = []
+        for i, query in enumerate(queries):
+            db_info = db_matches.get(query)
+            if db_info:
+                matches[i] = (db_info['name'], 100)
+            else:
+                normalized_query = self._normalize_name(query)
+                if normalized_query:
+                    pending.append((i, normalized_query))
+        
+        if not pending or not self._load_medicine_names():
+            return matches
+        
+        # Same scoring as search_fuzzy, one row per query
+        cutoff = max(min_score - 0.5, 0)
+        normalized_queries = [normalized_query for _, normalized_query in pending]
+        workers = -1 if len(self._normalized) > PARALLEL_SCORING_MIN_NAMES else 1
+        scores = process.cdist(normalized_queries, self._normalized, scorer=fuzz.WRatio,
+                               score_cutoff=cutoff, dtype=np.float64, workers=workers)
+        generic_scores = process.cdist(normalized_queries, self._generic_arr, scorer=fuzz.ratio,
+                                       score_cutoff=cutoff, dtype=np.float64)
+        np.maximum(scores, generic_scores[:, self._generic_index], out=scores)
+        scores = np.round(scores).astype(np.int64)
+        
+        # argmax returns the first highest score, so ties keep database order
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(best)), best]
+        for (i, _), index, score in zip(pending, best.tolist(), best_scores.tolist()):
+            if score >= min_score:
+                matches[i] = (self._names[index], score)
+        
+        return matches
+        
     def get_suggestions(self, partial_query: str, limit: int = 10) -> List[str]:
         """
         Get search suggestions for autocomplete.
@@ -250,24 +506,68 @@ class FuzzyMedicineSearch:
         if len(partial_query) < 2:  # Too short for meaningful suggestions
             return []
         
-        medicines = self._load_medicine_names()
-        suggestions = []
+        # Autocomplete repeats prefixes; kept in the same shared result cache
+        names = self._load_medicine_names()
+        key = ('suggestions', partial_query, limit)
+        with _SHARED_CACHES_LOCK:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+        if cached is not None:
+            return list(cached)
+        
+        suggestions = set()
         
         normalized_query = self._normalize_name(partial_query)
         
-        for medicine in medicines:
-            # Check if medicine name starts with the query
-            if medicine['normalized_name'].startswith(normalized_query):
-                suggestions.append(medicine['name'])
-            # Also check partial matches
-            elif normalized_query in medicine['normalized_name']:
-                suggestions.append(medicine['name'])
+        # Any name containing the query contains all of its trigrams, so only
+        # medicines in every trigram's posting list need checking
+        query_trigrams = _trigrams(normalized_query)
+        if query_trigrams:
+            postings = sorted((self._trigram_index.get(trigram, set()) for trigram in query_trigrams), key=len)
+            candidates = set.intersection(*postings)
+        else:
+            candidates = range(len(names))
+        
+        for i in candidates:
+            # Names starting with the query, or containing it
+            if normalized_query in self._normalized[i]:
+                suggestions.add(names[i])
         
-        # Remove duplicates and sort
-        suggestions = list(set(suggestions))
-        suggestions.sort()
+        # First names alphabetically, without sorting every suggestion
+        result = heapq.nsmallest(limit, suggestions)
         
-        return suggestions[:limit]
+        if self._cache_valid:
+            with _SHARED_CACHES_LOCK:
+                self._results[key] = list(result)
+                if len(self._results) > RESULT_CACHE_SIZE:
+                    self._results.popitem(last=False)
+        
+        return result
+
+_shared_searcher: Optional[FuzzyMedicineSearch] = None
+_shared_searcher_lock = threading.Lock()
+
+@contextmanager
+def shared_fuzzy_search() -> Iterator[FuzzyMedicineSearch]:
+    """
+    Use the process-wide searcher on the default database, one caller at a time.
+    
+    Callers hold a lock while they use it. Database queries are safe to run
+    concurrently (each opens its own cursor), but the searcher's in-memory
+    state is not: a search that finds the table changed reloads the cache
+    by rebinding its columns one field at a time, so a concurrent search
+    could mix names and prices from different loads, and lookups reorder
+    the shared result cache.
+    
+    Yields:
+        FuzzyMedicineSearch: The shared searcher
+    """
+    global _shared_searcher
+    with _shared_searcher_lock:
+        if _shared_searcher is None:
+            _shared_searcher = FuzzyMedicineSearch()
+        yield _shared_searcher
 
 # Convenience function for easy integration
 def search_medicine_fuzzy(query: str, limit: int = 5) -> Dict:
@@ -281,8 +581,8 @@ def search_medicine_fuzzy(query: str, limit: int = 5) -> Dict:
     Returns:
         Dict: Search results
     """
-    searcher = FuzzyMedicineSearch()
-    return searcher.search_with_suggestions(query, limit)
+    with shared_fuzzy_search() as searcher:
+        return searcher.search_with_suggestions(query, limit)
 
 # Test function
 def test_fuzzy_search():
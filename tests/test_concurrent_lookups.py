@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test that one shared MedicineDatabaseManager answers lookups from many threads.
+The backend runs up to MAX_CONCURRENT_PRESCRIPTIONS analyses at once, all on the
+process-wide manager, so concurrent lookups must match single-threaded ones.
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.manager import MedicineDatabaseManager
+
+THREADS = 8
+ROUNDS = 50
+
+def _lookups(db: MedicineDatabaseManager, names, generics):
+    """Run the lookups and cache writes a prescription analysis makes; returns their results."""
+    db.connect()
+    db.cache_generics(dict(zip(names[:10], generics[:10])))
+    return (
+        db.get_cached_generics(names[:10]),
+        db.get_medicine_info_bulk(names),
+        [db.get_medicine_info(name[:5]) for name in names[:5]],
+        [db.find_cheapest_alternatives(name, generic, 1000.0, "10 tablets")
+         for name, generic in zip(names, generics)],
+        [db.get_medicines_by_generic(generic) for generic in generics[:5]],
+    )
+
+def test_concurrent_lookups():
+    """Compare lookups run from THREADS threads with the same lookups run serially."""
+    print("🧪 Testing concurrent lookups on a shared medicine database...")
+    
+    # Connecting prepares auxiliary tables, so work on a copy of the database
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "medicines.db")
+        shutil.copy("data/medicines.db", db_path)
+        
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute("SELECT name, generic_name FROM medicines ORDER BY id LIMIT 40").fetchall()
+        names = [row[0] for row in rows]
+        generics = [row[1] for row in rows]
+        
+        serial_db = MedicineDatabaseManager(db_path)
+        try:
+            expected = _lookups(serial_db, names, generics)
+        finally:
+            serial_db.close()
+        
+        # The worker threads race to connect the shared manager themselves
+        db = MedicineDatabaseManager(db_path)
+        try:
+            with ThreadPoolExecutor(max_workers=THREADS) as executor:
+                futures = [executor.submit(_lookups, db, names, generics) for _ in range(THREADS * ROUNDS)]
+                results = [future.result() for future in futures]
+        finally:
+            db.close()
+    
+    mismatches = sum(result != expected for result in results)
+    if mismatches:
+        print(f"❌ {mismatches} of {len(results)} concurrent runs returned different results")
+        return False
+    
+    print(f"✅ {len(results)} concurrent runs on {THREADS} threads matched the serial results")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if test_concurrent_lookups() else 1)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test that condition searches answered from the trigram FTS index match the
+LIKE scan they replace, for every short substring of the searched columns.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.conditions_db import MedicalConditionsManager
+
+# Longest substring of the searched text tried as a search term
+MAX_TERM_LENGTH = 7
+
+# Terms that take the LIKE path or need escaping in the FTS query
+EDGE_CASE_TERMS = ["", "a", "ab", "ABC", "pain", "PAIN", 'pa"in', "%", "50%", "_", "a_b", "xyzzy"]
+
+def _search_terms(db: MedicalConditionsManager):
+    """Every 1 to MAX_TERM_LENGTH character substring of the searched columns, plus edge cases."""
+    terms = set(EDGE_CASE_TERMS)
+    rows = db.conn.execute("SELECT condition_name, symptoms, description FROM conditions").fetchall()
+    for row in rows:
+        for text in row:
+            text = (text or "").lower()
+            for length in range(1, MAX_TERM_LENGTH + 1):
+                terms.update(text[i:i + length] for i in range(len(text) - length + 1))
+    return sorted(terms)
+
+def test_condition_search():
+    """Compare search_conditions with and without the FTS index."""
+    print("🧪 Testing condition search: FTS index vs LIKE scan...")
+    
+    # Connecting creates the FTS index, so work on a copy of the database
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "conditions.db")
+        shutil.copy("data/conditions.db", db_path)
+        
+        db = MedicalConditionsManager(db_path)
+        if not db.connect():
+            print("❌ Could not connect to the conditions database")
+            return False
+        
+        try:
+            if not db._has_search_fts:
+                print("⚠️ This SQLite build has no FTS5 trigram tokenizer; only the LIKE scan is in use")
+                return True
+            
+            terms = _search_terms(db)
+            fts_results = [db.search_conditions(term) for term in terms]
+            db._has_search_fts = False
+            like_results = [db.search_conditions(term) for term in terms]
+        finally:
+            db.close()
+    
+    mismatches = [term for term, fts, like in zip(terms, fts_results, like_results) if fts != like]
+    if mismatches:
+        print(f"❌ {len(mismatches)} of {len(terms)} terms differ, e.g. {mismatches[:5]}")
+        return False
+    
+    print(f"✅ FTS and LIKE searches agree on all {len(terms)} terms")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if test_condition_search() else 1)
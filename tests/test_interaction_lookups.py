@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test that check_interactions_bulk returns the same row as check_interactions
+for every ordered drug pair, including pairs stored in both column orders,
+whichever of them fills the shared lookup cache first.
+"""
+
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.drug_interactions_db import DrugInteractionsManager
+from src.utils.cache import drug_cache
+
+# Drugs whose ordered pairs are checked, taken alphabetically from the table
+DRUG_COUNT = 30
+
+def test_interaction_lookups():
+    """Compare bulk and single-pair interaction lookups, in both cache fill orders."""
+    print("🧪 Testing bulk vs single-pair interaction lookups...")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, "drug_interactions.db")
+        shutil.copy("data/drug_interactions.db", db_path)
+        
+        db = DrugInteractionsManager(db_path)
+        if not db.connect():
+            print("❌ Could not connect to the drug interactions database")
+            return False
+        
+        try:
+            drugs = [row[0] for row in db.conn.execute("""
+                SELECT drug1_name FROM drug_interactions
+                UNION SELECT drug2_name FROM drug_interactions
+                ORDER BY 1 LIMIT ?
+            """, (DRUG_COUNT,))]
+            pairs = list(itertools.permutations(drugs, 2))
+            
+            drug_cache.clear()
+            single = {pair: db.check_interactions(*pair) for pair in pairs}
+            drug_cache.clear()
+            bulk = db.check_interactions_bulk(pairs)
+            # Answered from the cache the bulk call filled
+            cached = {pair: db.check_interactions(*pair) for pair in pairs}
+            
+            drug_cache.clear()
+            for pair in pairs:
+                db.check_interactions(*pair[::-1])
+            reverse_filled = {pair: db.check_interactions(*pair) for pair in pairs}
+        finally:
+            drug_cache.clear()
+            db.close()
+    
+    found = sum(interaction is not None for interaction in single.values())
+    for label, results in (("bulk", bulk), ("bulk-filled cache", cached), ("reverse-filled cache", reverse_filled)):
+        mismatches = [pair for pair in pairs if results[pair] != single[pair]]
+        if mismatches:
+            print(f"❌ {label}: {len(mismatches)} of {len(pairs)} pairs differ, e.g. {mismatches[:3]}")
+            return False
+    
+    print(f"✅ {len(pairs)} ordered pairs ({found} interactions) agree across bulk, single and cached lookups")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if test_interaction_lookups() else 1)
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Test that _JSONListStream decodes the streamed medicine_alternatives list
+item by item, whatever chunk sizes the model's text arrives in.
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agents.optimized_alternative_agent import _JSONListStream
+
+CHUNK_SIZES = [1, 2, 3, 7, 16, 64, 1 << 20]
+
+ALTERNATIVES = [
+    {"original_medicine": "Tylenol", "alternatives": [{"name": "Acetaminophen", "price": 4.5}]},
+    {"original_medicine": "Advil [200mg]", "notes": "Brackets ] [ and braces } { inside strings, plus commas, ,"},
+    {"original_medicine": "Zyrtec", "notes": "Escaped \"quotes\" and a backslash \\ stay intact"},
+    {"original_medicine": "Lípitor", "alternatives": [], "warnings": ["é, ü and 漢字"]},
+]
+
+# Shaped like a model answer: prose and a code fence around the object,
+# other keys before the list and after it
+RESPONSE = (
+    "Here is the analysis you asked for:\n```json\n"
+    + json.dumps({
+        "summary": {"total": len(ALTERNATIVES), "note": "list follows"},
+        "medicine_alternatives": ALTERNATIVES,
+        "safety_alerts": [{"level": "info"}],
+    }, ensure_ascii=False, indent=2)
+    + "\n```\nLet me know if you need anything else."
+)
+
+def _decode_in_chunks(chunk_size: int):
+    """Feed RESPONSE in chunks; return the decoded items and how much text each needed."""
+    stream = _JSONListStream("medicine_alternatives")
+    items, fed_at = [], []
+    for start in range(0, len(RESPONSE), chunk_size):
+        for item in stream.feed(RESPONSE[start:start + chunk_size]):
+            items.append(item)
+            fed_at.append(min(start + chunk_size, len(RESPONSE)))
+    return items, fed_at
+
+def test_json_list_stream():
+    """Decode RESPONSE at several chunk sizes and compare with the list it encodes."""
+    print("🧪 Testing incremental decoding of the medicine_alternatives list...")
+    
+    # Where the text of the first list item ends
+    list_start = RESPONSE.index("[", RESPONSE.index('"medicine_alternatives"')) + 1
+    first_item_start = len(RESPONSE) - len(RESPONSE[list_start:].lstrip())
+    _, first_item_end = json.JSONDecoder().raw_decode(RESPONSE, first_item_start)
+    
+    for chunk_size in CHUNK_SIZES:
+        items, fed_at = _decode_in_chunks(chunk_size)
+        if items != ALTERNATIVES:
+            print(f"❌ Chunk size {chunk_size}: decoded {items}")
+            return False
+        # Items must be emitted as they complete, not once the whole answer is in
+        if fed_at[0] > first_item_end + chunk_size:
+            print(f"❌ Chunk size {chunk_size}: first item emitted after {fed_at[0]} characters, "
+                  f"though complete after {first_item_end}")
+            return False
+    
+    print(f"✅ Decoded {len(ALTERNATIVES)} items correctly at chunk sizes {CHUNK_SIZES}")
+    return True
+
+if __name__ == "__main__":
+    sys.exit(0 if test_json_list_stream() else 1)